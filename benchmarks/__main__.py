@@ -0,0 +1,199 @@
+"""
+Offline benchmark suite for the radio catalogue.
+
+    python -m benchmarks run --sizes 1k,10k --output bench.json
+    python -m benchmarks run --sizes 1k,10k,100k,1m --backends sqlite,postgresql
+    python -m benchmarks compare baseline.json bench.json --threshold 0.2
+    python -m benchmarks run --only radio_list_search,dashboard --profile production --output prod.json
+
+Each backend runs in its own process against a throwaway test database
+(PostgreSQL is used when the DB_* settings reach a server, otherwise it is
+reported as unavailable). `compare` exits with status 1 when any benchmark
+is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_backend(args):
+    """Child process: set up Django for one backend and run the suite."""
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCH_DB'] = args.backend
+    os.environ['BENCH_PROFILE'] = args.profile
+    import django
+    django.setup()
+    from django.db import connection
+    from .suite import Context, run_suite
+
+    output = {'backend': args.backend, 'results': []}
+    try:
+        connection.ensure_connection()
+    except Exception as e:
+        output['unavailable'] = f"{type(e).__name__}: {e}".strip()
+        _write_json(args.result_file, output)
+        return
+
+    output['vendor'] = connection.vendor
+    test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with tempfile.TemporaryDirectory(prefix='radio_bench_') as tmpdir:
+            ctx = Context(tmpdir)
+            output['results'] = run_suite(
+                ctx, args.sizes, args.backend,
+                repeat=args.repeat, budget=args.budget, only=args.only,
+                log=lambda line: print(line, file=sys.stderr, flush=True),
+            )
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+    _write_json(args.result_file, output)
+
+
+def run(args):
+    import django
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'profile': args.profile,
+        },
+        'backends': {},
+        'results': [],
+    }
+    for backend in args.backends:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            result_file = f.name
+        try:
+            cmd = [
+                sys.executable, '-m', 'benchmarks', '_backend', backend, result_file,
+                '--sizes', ','.join(args.sizes), '--repeat', str(args.repeat), '--budget', str(args.budget),
+                '--profile', args.profile,
+            ]
+            if args.only:
+                cmd += ['--only', ','.join(args.only)]
+            proc = subprocess.run(cmd, cwd=BASE_DIR)
+            if proc.returncode != 0:
+                report['backends'][backend] = {'error': f'exit status {proc.returncode}'}
+                continue
+            with open(result_file) as f:
+                output = json.load(f)
+        finally:
+            os.unlink(result_file)
+        if 'unavailable' in output:
+            print(f"{backend}: unavailable ({output['unavailable']})", file=sys.stderr)
+            report['backends'][backend] = {'unavailable': output['unavailable']}
+            continue
+        report['backends'][backend] = {'vendor': output.get('vendor')}
+        report['results'].extend(output['results'])
+    _write_json(args.output, report)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    def index(report):
+        return {
+            (r['benchmark'], r['size'], r['backend']): r
+            for r in report['results'] if 'seconds' in r
+        }
+
+    base, cur = index(baseline), index(current)
+    regressions = 0
+    print(f"{'benchmark':<24} {'size':>5} {'backend':>10} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key in sorted(cur):
+        if key not in base:
+            continue
+        before, after = base[key]['seconds'], cur[key]['seconds']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        name, size, backend = key
+        print(f"{name:<24} {size:>5} {backend:>10} {before:>9.4f}s {after:>9.4f}s {change:>+7.1%}{flag}")
+    missing = sorted(set(base) - set(cur))
+    for name, size, backend in missing:
+        print(f"{name:<24} {size:>5} {backend:>10}  missing from current run")
+    if regressions:
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def _csv_list(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def main(argv=None):
+    from .suite import SIZES, BENCHMARKS
+
+    def sizes(value):
+        labels = [v.lower() for v in _csv_list(value)]
+        unknown = [v for v in labels if v not in SIZES]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown size(s) {unknown}; choose from {list(SIZES)}")
+        return labels
+
+    def benchmarks(value):
+        names = _csv_list(value)
+        unknown = [v for v in names if v not in BENCHMARKS]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown benchmark(s) {unknown}; choose from {list(BENCHMARKS)}")
+        return names
+
+    def common(p):
+        p.add_argument('--sizes', type=sizes, default=['1k', '10k'], help='Comma-separated sizes: 1k,10k,100k,1m (default: 1k,10k)')
+        p.add_argument('--repeat', type=int, default=3, help='Timed runs per read-only benchmark (default: 3)')
+        p.add_argument('--budget', type=float, default=30.0, help='Skip larger sizes once a run takes longer than this many seconds (default: 30)')
+        p.add_argument('--only', type=benchmarks, default=None, help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+        p.add_argument('--profile', choices=['default', 'production'], default='default', help='Settings profile to measure (default: default)')
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help='Run the suite and write a JSON report')
+    common(p)
+    p.add_argument('--backends', type=_csv_list, default=['sqlite', 'postgresql'], help='Comma-separated backends (default: sqlite,postgresql)')
+    p.add_argument('--output', default='bench_results.json', help='Report path (default: bench_results.json)')
+    p.set_defaults(func=run)
+
+    p = sub.add_parser('compare', help='Compare two reports and flag regressions')
+    p.add_argument('baseline')
+    p.add_argument('current')
+    p.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown flagged as a regression (default: 0.2)')
+    p.set_defaults(func=compare)
+
+    p = sub.add_parser('_backend', help=argparse.SUPPRESS)
+    p.add_argument('backend', choices=['sqlite', 'postgresql'])
+    p.add_argument('result_file')
+    common(p)
+    p.set_defaults(func=run_backend)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Settings for the benchmark suite: the project settings with the database
+chosen by BENCH_DB ('sqlite' or 'postgresql') and instrumentation disabled.
+BENCH_PROFILE=production starts from radio_database.settings_production
+instead, to measure what persistent connections and the caches save.
+"""
+import os
+import tempfile
+
+BENCH_PROFILE = os.environ.get('BENCH_PROFILE', 'default')
+
+if BENCH_PROFILE == 'production':
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark-only')
+    os.environ.setdefault('CACHE_BACKEND', 'locmem')
+    from radio_database.settings_production import *  # noqa: F401,F403
+    from radio_database.settings_production import CONNECTION_SETTINGS
+else:
+    from radio_database.settings import *  # noqa: F401,F403
+    CONNECTION_SETTINGS = {}
+
+BENCH_DB = os.environ.get('BENCH_DB', 'sqlite')
+
+if BENCH_DB == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.gettempdir(), 'radio_bench.sqlite3'),
+            'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'radio_bench_test.sqlite3')},
+            **CONNECTION_SETTINGS,
+        }
+    }
+else:
+    # PostgreSQL from the usual DB_* environment variables; a test_ database is created
+    DATABASES['default']['TEST'] = {'NAME': os.environ.get('BENCH_PG_NAME', 'radio_database_bench')}  # noqa: F405
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+QUERY_STATS_ENABLED = False
+IMPORT_TRACE_MEMORY = False
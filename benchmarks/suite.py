@@ -0,0 +1,306 @@
+"""
+Benchmark definitions for the ingest, search and dedup hot paths.
+
+Each benchmark has a setup step (untimed) that prepares synthetic input or
+database rows for a catalogue size, and a timed step. Read-only benchmarks
+are set up once per size and timed `repeat` times; benchmarks that write are
+timed once against a freshly cleared table. Page benchmarks clear the
+Django cache in every timed run, so each repeat measures the queries rather
+than the cached fragments the first run leaves behind.
+"""
+import io
+import json
+import os
+import statistics
+import time
+
+from . import synthetic
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Extra synthetic grantees on top of the real ones, roughly the size of the FCC grantee list
+EXTRA_GRANTEES = 2000
+
+
+class Context:
+    """Shared state for one benchmark session."""
+
+    def __init__(self, tmpdir):
+        self.tmpdir = tmpdir
+        self.xml_templates = synthetic.load_xml_templates()
+        self.csv_fieldnames, self.csv_templates = synthetic.load_csv_templates()
+        self.grantee_map = synthetic.grantee_map(self.xml_templates, extra=EXTRA_GRANTEES)
+        self.codes = sorted(self.grantee_map)
+        self.populated = None
+
+    def fcc_rows(self, n):
+        return synthetic.fcc_rows(n, self.xml_templates, self.codes)
+
+    def populate(self, n):
+        """Fill the Radio table with `n` synthetic radios (kept across read-only benchmarks)."""
+        if self.populated == n:
+            return
+        from radios.models import Radio
+        Radio.objects.all().delete()
+        rows = synthetic.catalogue_rows(n, self.csv_fieldnames, self.csv_templates)
+        batch = []
+        for row in rows:
+            batch.append(Radio(
+                brand=row['Brand'], model=row['Model'], fcc_id=row.get('FCC_ID', ''),
+                freq_bands_tx=row.get('Freq. Bands (TX)', ''), power_watts=row.get('Power (W)', ''),
+                gps=row.get('GPS', ''), aprs=row.get('APRS', ''), dmr=row.get('DMR', ''),
+                cost_approx=row.get('Cost (Approx)', ''),
+            ))
+            if len(batch) >= 5000:
+                Radio.objects.bulk_create(batch)
+                batch = []
+        Radio.objects.bulk_create(batch)
+        self.populated = n
+
+    def clear(self):
+        from radios.models import Radio
+        Radio.objects.all().delete()
+        self.populated = None
+
+
+# --- benchmarks: each returns the callable to time --------------------------------------------
+
+def xml_parse(ctx, n):
+    from radios.fcc_xml import parse_file
+    path = os.path.join(ctx.tmpdir, f'fcc_{n}.xml')
+    if not os.path.exists(path):
+        synthetic.write_fcc_xml(path, ctx.fcc_rows(n))
+
+    def run():
+        # Chunked reads through the incremental parser, as the upload handler sees them
+        return len(parse_file(path).records)
+    return run
+
+
+def parse_fcc_id(ctx, n):
+    from radios.views_import import parse_fcc_id as parse
+    fcc_ids = [row['fcc_id'] for row in ctx.fcc_rows(n)]
+
+    def run():
+        for fcc_id in fcc_ids:
+            parse(fcc_id, ctx.grantee_map)
+    return run
+
+
+def grantee_import_confirm(ctx, n):
+    from radios.views_import import parse_fcc_id as parse, import_grantee_records
+    ctx.clear()
+    preview = []
+    for row in ctx.fcc_rows(n):
+        code, model = parse(row['fcc_id'], ctx.grantee_map)
+        preview.append({'brand': ctx.grantee_map[code], 'grantee_code': code, 'model': model})
+    # Round-trip through JSON like the job params stored by the confirm step
+    records = json.loads(json.dumps(preview))
+
+    def run():
+        import_grantee_records(records, False)
+    return run
+
+
+def import_radios(ctx, n):
+    from django.core.management import call_command
+    path = os.path.join(ctx.tmpdir, f'catalogue_{n}.csv')
+    if not os.path.exists(path):
+        rows = synthetic.catalogue_rows(n, ctx.csv_fieldnames, ctx.csv_templates)
+        synthetic.write_catalogue_csv(path, ctx.csv_fieldnames, rows)
+    ctx.clear()
+
+    def run():
+        call_command('import_radios', path, stdout=io.StringIO())
+    return run
+
+
+def deduplicate_radios(ctx, n):
+    from django.core.management import call_command
+    ctx.populate(n)
+
+    def run():
+        call_command('deduplicate_radios', stdout=io.StringIO())
+    return run
+
+
+def radio_list_search(ctx, n):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+    ctx.populate(n)
+    client = Client()
+    url = reverse('radio_list')
+
+    def run():
+        cache.clear()
+        client.get(url, {'query': 'UV'})
+    return run
+
+
+def dashboard(ctx, n):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+    ctx.populate(n)
+    client = Client()
+    url = reverse('dashboard')
+
+    def run():
+        cache.clear()
+        client.get(url)
+    return run
+
+
+def dashboard_async(ctx, n):
+    from asgiref.sync import async_to_sync
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.test import AsyncRequestFactory
+    from radios.views import adashboard_view
+    ctx.populate(n)
+    request = AsyncRequestFactory().get('/')
+    request.user, request.session = AnonymousUser(), {}
+    view = async_to_sync(adashboard_view)
+
+    def run():
+        cache.clear()
+        view(request)
+    return run
+
+
+def catalogue_stats(ctx, n):
+    from django.test import Client
+    from django.urls import reverse
+    from radios.stats import refresh_all
+    ctx.populate(n)
+    refresh_all(force=True)
+    client = Client()
+    page, data = reverse('catalogue_stats'), reverse('catalogue_stats_json')
+
+    def run():
+        client.get(page, {'brand': 'Baofeng'})
+        client.get(data, {'summary': 'feature_adoption'})
+    return run
+
+
+def similar_radios(ctx, n):
+    from radios import similarity
+    from radios.models import Radio
+    ctx.populate(n)
+    similarity._index = similarity.SpecIndex()
+    index = similarity.get_index()
+    pks = list(Radio.objects.order_by('?').values_list('pk', flat=True)[:100])
+
+    def run():
+        # 100 top-10 lookups
+        for pk in pks:
+            index.similar(pk, 10)
+    return run
+
+
+def admin_changelist(ctx, n):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.urls import reverse
+    ctx.populate(n)
+    user = User.objects.filter(username='bench-admin').first() or User.objects.create_superuser('bench-admin', '', 'bench')
+    client = Client()
+    client.force_login(user)
+    url = reverse('admin:radios_radio_changelist')
+
+    def run():
+        client.get(url)
+        client.get(url, {'q': 'UV', 'p': '2'})
+    return run
+
+
+def snapshot_lookup(ctx, n):
+    from radios.models import Radio
+    from radios.snapshot import Snapshot, write_snapshot
+    ctx.populate(n)
+    path = os.path.join(ctx.tmpdir, f'catalogue_{n}.snap')
+    write_snapshot(path)
+    keys = list(Radio.objects.order_by('?').values_list('brand', 'model')[:1000])
+
+    def run():
+        # Cold start: map the file and answer lookups with no load step
+        with Snapshot(path) as snap:
+            for brand, model in keys:
+                snap.lookup(brand, model)
+    return run
+
+
+def autocomplete(ctx, n):
+    import random
+    from radios.autocomplete import PrefixIndex
+    ctx.populate(n)
+    index = PrefixIndex()
+    index.build()
+    rng = random.Random(n)
+    prefixes = [model[:rng.randint(1, 5)] for _, model, _ in rng.sample(list(index.radios.values()), min(1000, n))]
+
+    def run():
+        # Uncached lookups: the per-process result cache is cleared first
+        index._results.clear()
+        for prefix in prefixes:
+            index.complete(prefix)
+    return run
+
+
+# name -> (setup, writes to the database)
+BENCHMARKS = {
+    'xml_parse': (xml_parse, False),
+    'parse_fcc_id': (parse_fcc_id, False),
+    'grantee_import_confirm': (grantee_import_confirm, True),
+    'import_radios': (import_radios, True),
+    'deduplicate_radios': (deduplicate_radios, False),
+    'radio_list_search': (radio_list_search, False),
+    'dashboard': (dashboard, False),
+    'dashboard_async': (dashboard_async, False),
+    'catalogue_stats': (catalogue_stats, False),
+    'similar_radios': (similar_radios, False),
+    'admin_changelist': (admin_changelist, False),
+    'snapshot_lookup': (snapshot_lookup, False),
+    'autocomplete': (autocomplete, False),
+}
+
+
+def run_suite(ctx, sizes, backend, repeat=3, budget=30.0, only=None, log=print):
+    """
+    Run every benchmark for every size. A benchmark whose median exceeds
+    `budget` seconds is skipped for the larger sizes.
+    """
+    results = []
+    for name, (setup, writes) in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        over_budget = False
+        for label in sizes:
+            n = SIZES[label]
+            entry = {'benchmark': name, 'size': label, 'rows': n, 'backend': backend}
+            if over_budget:
+                entry['skipped'] = f'previous size exceeded the {budget:.0f}s budget'
+                results.append(entry)
+                continue
+            runs = []
+            fn = None
+            for _ in range(1 if writes else repeat):
+                if fn is None or writes:
+                    fn = setup(ctx, n)
+                start = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - start)
+            median = statistics.median(runs)
+            entry.update(
+                seconds=median,
+                min=min(runs),
+                runs=runs,
+                rows_per_sec=n / median if median else None,
+            )
+            log(f"{backend:>10} {name:<24} {label:>5}  {entry['seconds']:.4f}s")
+            results.append(entry)
+            over_budget = entry['seconds'] > budget
+        if writes:
+            ctx.clear()
+    return results
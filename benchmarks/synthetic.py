@@ -0,0 +1,125 @@
+"""
+Synthetic catalogue generators.
+
+Rows are modelled on the real inputs in data/: FCC authorization search
+exports (data/*authorization_search_results.xml) and the radio master CSV
+(data/merged_master_with_fcc.csv). Real rows are used as templates and
+mutated so any number of unique rows can be produced offline and
+deterministically from a seed.
+"""
+import csv
+import glob
+import os
+import random
+import re
+import string
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+MASTER_CSV = os.path.join(DATA_DIR, 'merged_master_with_fcc.csv')
+
+XML_FIELDS = [
+    'applicant_name', 'address', 'city', 'state', 'country', 'zip_code', 'fcc_id',
+    'application_purpose', 'grant_date', 'lower_freq_mhz', 'upper_freq_mhz',
+]
+
+
+def grantee_code_of(fcc_id):
+    """FCC grantee codes are 3 characters, or 5 when they start with a digit (2AJGM)."""
+    return fcc_id[:5] if fcc_id[:1].isdigit() else fcc_id[:3]
+
+
+def load_xml_templates():
+    """Every <Row> of the real FCC exports as a dict."""
+    templates = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, '*authorization_search_results.xml'))):
+        with open(path, 'rb') as f:
+            content = f.read().decode('iso-8859-1')
+        content = re.sub(r'&(?!(amp|lt|gt|quot|apos|#)\b)', '&amp;', content)
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError:
+            continue
+        for row in root.findall('Row'):
+            record = {field: (row.findtext(field) or '').strip() for field in XML_FIELDS}
+            if record['fcc_id']:
+                templates.append(record)
+    return templates
+
+
+def load_csv_templates():
+    with open(MASTER_CSV, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def _product_code(rng, length):
+    return ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(length))
+
+
+def grantee_map(templates, extra=0, seed=0):
+    """Grantee code -> applicant name from the templates plus `extra` synthetic grantees."""
+    rng = random.Random(seed)
+    mapping = {grantee_code_of(t['fcc_id']): t['applicant_name'] for t in templates}
+    target = len(mapping) + extra
+    while len(mapping) < target:
+        code = '2' + ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(4))
+        mapping.setdefault(code, f"SYNTHETIC GRANTEE {code} CO LTD")
+    return mapping
+
+
+def fcc_rows(n, templates, codes, seed=0):
+    """`n` FCC authorization rows with unique FCC IDs spread over `codes`."""
+    rng = random.Random(seed)
+    seen = set()
+    rows = []
+    while len(rows) < n:
+        template = rng.choice(templates)
+        code = rng.choice(codes)
+        product = template['fcc_id'][len(grantee_code_of(template['fcc_id'])):].lstrip('-')
+        product = product[:3] + _product_code(rng, max(3, len(product) - 3))
+        sep = '-' if rng.random() < 0.5 else ''
+        fcc_id = f"{code}{sep}{product}"
+        if fcc_id in seen:
+            continue
+        seen.add(fcc_id)
+        rows.append(dict(template, fcc_id=fcc_id))
+    return rows
+
+
+def write_fcc_xml(path, rows):
+    """Write rows in the FCC export layout, ampersands left unescaped like the real files."""
+    with open(path, 'w', encoding='iso-8859-1', errors='replace') as f:
+        f.write('<?xml version="1.0" encoding="ISO-8859-1" standalone="no"?>\n<Results>\n')
+        for row in rows:
+            f.write('\n  <Row>\n')
+            for field in XML_FIELDS:
+                value = escape(row.get(field, '')).replace('&amp;', '&')
+                f.write(f'     <{field}>{value}</{field}>\n')
+            f.write('  </Row>\n')
+        f.write('</Results>\n')
+
+
+def catalogue_rows(n, fieldnames, templates, seed=0):
+    """`n` master-CSV rows with unique (Brand, Model); brands grow with the catalogue."""
+    rng = random.Random(seed)
+    brands = sorted({t['Brand'] for t in templates if t['Brand']})
+    extra_brands = [f"Brand{i:05d}" for i in range(max(0, n // 200 - len(brands)))]
+    brands += extra_brands
+    rows = []
+    for i in range(n):
+        template = rng.choice(templates)
+        row = dict(template)
+        row['Brand'] = brands[i % len(brands)]
+        row['Model'] = f"{template['Model'] or 'X'}-{i:07d}"
+        rows.append({k: row.get(k, '') for k in fieldnames})
+    return rows
+
+
+def write_catalogue_csv(path, fieldnames, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
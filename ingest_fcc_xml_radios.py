@@ -1,16 +1,23 @@
 """
 Script to ingest FCC XML search results for radios, using results.xml for grantee code lookup.
+
+Only rows not seen in an earlier run are written (see radios.fcc_ingest), so
+re-running it on a refreshed export costs time in proportion to what changed.
 """
+import argparse
 import os
 import django
 import xml.etree.ElementTree as ET
-from datetime import datetime
 
 # Setup Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radio_database.settings')
 django.setup()
 
+from django.db import transaction
 from radios.models import Radio, Brand
+from radios.import_telemetry import track_import
+from radios.fcc_ingest import normalize_row, classify_rows, record_rows, split_fcc_id
+from radios.caching import catalogue_changes
 
 XML_PATH = 'authorization_search_results.xml'  # Update path if needed
 RESULTS_XML = os.path.join('data', 'results.xml')
@@ -26,23 +33,29 @@ def load_grantee_map(results_xml):
             grantee_map[code] = name
     return grantee_map
 
-def parse_fcc_xml(xml_path, grantee_map):
+def parse_fcc_xml(xml_path):
+    """Normalized rows (see radios.fcc_ingest) of every <Row> with a product code in its FCC ID."""
     tree = ET.parse(xml_path)
     root = tree.getroot()
-    radios = []
+    rows = []
     for row in root.findall('Row'):
-        fcc_id = row.findtext('fcc_id', '').strip()
-        if not fcc_id or '-' not in fcc_id:
+        record = normalize_row(row)
+        record['grantee_code'], product_code = split_fcc_id(record['fcc_id'])
+        if not product_code:
             continue
-        grantee_code, model = fcc_id.split('-', 1)
-        grantee_code = grantee_code.strip()
-        model = model.strip()
+        rows.append(record)
+    return rows
+
+def rows_to_radios(rows, grantee_map):
+    radios = []
+    for row in rows:
+        fcc_id = row['fcc_id']
+        grantee_code, model = split_fcc_id(fcc_id)
         brand_name = grantee_map.get(grantee_code, grantee_code)
-        grant_date = row.findtext('grant_date', '').strip()
-        lower_freq = row.findtext('lower_freq_mhz', '').strip()
-        upper_freq = row.findtext('upper_freq_mhz', '').strip()
-        purpose = row.findtext('application_purpose', '').strip()
-        notes = f"FCC Grant Date: {grant_date}; Purpose: {purpose}; Freq: {lower_freq}-{upper_freq} MHz"
+        notes = (
+            f"FCC Grant Date: {row['grant_date']}; Purpose: {row['application_purpose']}; "
+            f"Freq: {row['lower_freq_mhz']}-{row['upper_freq_mhz']} MHz"
+        )
         radios.append({
             'brand': brand_name,
             'model': model,
@@ -52,20 +65,43 @@ def parse_fcc_xml(xml_path, grantee_map):
     return radios
 
 def ingest_radios(radios):
-    count = 0
+    """Create the radios whose (brand, model) is not in the database yet; one read, batched inserts."""
+    brands = {radio['brand'] for radio in radios}
+    existing = set(Radio.objects.filter(brand__in=brands).values_list('brand', 'model'))
+    new_radios = []
     for radio in radios:
-        if Radio.objects.filter(brand=radio['brand'], model=radio['model']).exists():
+        key = (radio['brand'], radio['model'])
+        if key in existing:
             continue
-        Radio.objects.create(
-            brand=radio['brand'],
-            model=radio['model'],
-            fcc_id=radio['fcc_id'],
-            notes=radio['notes'],
-        )
-        count += 1
-    print(f"Imported {count} new radios.")
+        existing.add(key)
+        radio = Radio(**radio)
+        # bulk_create skips save(), which derives these
+        radio.set_fcc_id_parts()
+        new_radios.append(radio)
+    Radio.objects.bulk_create(new_radios, batch_size=1000)
+    print(f"Imported {len(new_radios)} new radios.")
+    return len(new_radios)
 
 if __name__ == '__main__':
-    grantee_map = load_grantee_map(RESULTS_XML)
-    radios = parse_fcc_xml(XML_PATH, grantee_map)
-    ingest_radios(radios)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('xml_path', nargs='?', default=XML_PATH, help='FCC authorization search export')
+    parser.add_argument('--full', action='store_true', help='Hash every row instead of skipping rows older than the grantee watermark')
+    args = parser.parse_args()
+
+    with track_import('ingest_fcc_xml_radios', source=args.xml_path) as run:
+        with run.stage('grantee_resolution'):
+            grantee_map = load_grantee_map(RESULTS_XML)
+        with run.stage('parse'):
+            run.add_bytes(os.path.getsize(args.xml_path))
+            rows = parse_fcc_xml(args.xml_path)
+        run.add_rows(len(rows))
+        with run.stage('delta'):
+            delta = classify_rows(rows, full=args.full)
+            radios = rows_to_radios(delta.rows, grantee_map)
+        print(f"FCC rows: {delta.summary()}")
+        with run.stage('db_write'):
+            with catalogue_changes(), transaction.atomic():
+                run.counts['created'] = ingest_radios(radios)
+                record_rows(delta.states)
+        run.counts.update(delta.counts)
+    print(f"Telemetry: {run.summary()}")
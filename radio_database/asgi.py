@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radio_database.settings')
+# Under ASGI the dashboard and list aggregates run on the async ORM
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'radios.middleware.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -138,5 +139,24 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# Per-request SQL/latency instrumentation (Server-Timing header + /radios/stats/requests.json)
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true' if DEBUG else 'false').lower() == 'true'
+QUERY_STATS_WINDOW = 500  # samples kept per URL name for percentiles
+QUERY_STATS_DUPLICATE_WARNING = 10  # log a warning when one statement repeats this often in a request
+
+# Record peak Python memory of import jobs with tracemalloc (adds some overhead,
+# and runs that overlap in one process record no peak)
+IMPORT_TRACE_MEMORY = os.environ.get('IMPORT_TRACE_MEMORY', 'false').lower() == 'true'
+
+# Worker processes parsing the XML files of an uploaded zip in the grantee import, started
+# per upload request; 1 parses them in the web process
+IMPORT_PARSE_WORKERS = int(os.environ.get('IMPORT_PARSE_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Serve the dashboard and radio list from their async views; asgi.py turns this on
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'false').lower() == 'true'
+
+# Spec vectors and neighbour lists written by build_similar_radios; loaded by each process when present
+SIMILAR_RADIOS_PATH = os.environ.get('SIMILAR_RADIOS_PATH', str(BASE_DIR / 'similar_radios.npz'))
+
 # NPM binary path (for django-tailwind)
 NPM_BIN_PATH = "/usr/local/bin/npm"
@@ -0,0 +1,30 @@
+"""
+Read-only profile for offline deployments, serving the SQLite replica built by
+`python manage.py build_edge_replica`:
+
+    EDGE_REPLICA_PATH=/srv/edge_replica.sqlite3 \
+    DJANGO_SETTINGS_MODULE=radio_database.settings_edge python manage.py runserver
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE
+import os
+
+EDGE_REPLICA = True
+EDGE_REPLICA_PATH = os.environ.get('EDGE_REPLICA_PATH', str(BASE_DIR / 'edge_replica.sqlite3'))
+
+# mode=ro makes SQLite refuse every write, whatever the code path
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{EDGE_REPLICA_PATH}?mode=ro',
+    }
+}
+
+# Nothing may be stored server side
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+MIDDLEWARE = MIDDLEWARE + ['radios.middleware.ReadOnlyReplicaMiddleware']
+
+# Imports run against the primary database only
+IMPORT_TRACE_MEMORY = False
@@ -0,0 +1,67 @@
+"""
+Production profile: persistent database connections, a shared cache, the
+cached template loader and cached sessions.
+
+    DJANGO_SETTINGS_MODULE=radio_database.settings_production \
+    DJANGO_SECRET_KEY=... ALLOWED_HOSTS=radios.example.org gunicorn radio_database.wsgi
+
+CACHE_BACKEND picks the cache:
+
+    file     (default) FileBasedCache under CACHE_LOCATION, shared by every process on the host
+    locmem   per-process memory; every process renders its own pages, and sees
+             other processes' catalogue changes up to caching.VERSION_TTL late
+    redis    RedisCache at CACHE_LOCATION (redis://host:6379/0); needs the redis package
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, TEMPLATES, DATABASES
+from django.core.exceptions import ImproperlyConfigured
+import os
+
+DEBUG = os.environ.get('DJANGO_DEBUG', 'false').lower() == 'true'
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY for the production profile')
+
+ALLOWED_HOSTS = [h.strip() for h in os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if h.strip()]
+
+# Keep connections open between requests and check them before reuse
+CONNECTION_SETTINGS = {'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')), 'CONN_HEALTH_CHECKS': True}
+DATABASES = {'default': dict(DATABASES['default'], **CONNECTION_SETTINGS)}
+
+
+def cache_settings(backend, location=None):
+    if backend == 'locmem':
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'radios'}
+    if backend == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location or str(BASE_DIR / '.cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    if backend == 'redis':
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': location or 'redis://127.0.0.1:6379/0',
+        }
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {backend!r}; use file, locmem or redis")
+
+
+CACHES = {
+    'default': cache_settings(os.environ.get('CACHE_BACKEND', 'file'), os.environ.get('CACHE_LOCATION')),
+}
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Compile each template once per process
+TEMPLATES = [dict(TEMPLATES[0], APP_DIRS=False)]
+TEMPLATES[0]['OPTIONS'] = dict(TEMPLATES[0]['OPTIONS'], loaders=[
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+])
+
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'false').lower() == 'true'
+IMPORT_TRACE_MEMORY = os.environ.get('IMPORT_TRACE_MEMORY', 'false').lower() == 'true'
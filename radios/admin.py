@@ -1,5 +1,98 @@
 from django.contrib import admin
-from .models import Radio, Brand
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .models import Radio, Brand, RadioMergeLog, MergeCandidate, ImportRun, Job, GranteeWatermark, FccGrant, RadioRelation, StatsRefresh
+from .bulk_edit import BulkEditForm, apply_bulk_edit
+from .fcc_ingest import fcc_id_key
+from . import caching
+
+# Distinct values of the low-cardinality filter columns change rarely; a full
+# scan of a large table per changelist view does not pay for itself
+FILTER_TIMEOUT = 60 * 10
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the planner's row estimate instead of COUNT(*) for
+    an unfiltered queryset of a large PostgreSQL table. Filtered querysets
+    and small tables are counted exactly.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[self.object_list.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                        [self.object_list.model._meta.db_table],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_threshold:
+                    return row[0]
+        return super().count
+
+
+class CachedValuesFilter(admin.SimpleListFilter):
+    """Choices are the distinct values of `parameter_name`, cached for FILTER_TIMEOUT seconds."""
+
+    def lookups(self, request, model_admin):
+        values = [str(value) for value in self.values()]
+        # A value missing from the cached choices (new since, or a brand with no
+        # Brand row) must still filter rather than be dropped from the query
+        if self.value() and self.value() not in values:
+            values.append(self.value())
+        return [(value, value) for value in values]
+
+    def values(self):
+        return cache.get_or_set(f'radios:admin_filter:{self.parameter_name}', self.distinct_values, FILTER_TIMEOUT)
+
+    def distinct_values(self):
+        field = self.parameter_name
+        values = Radio.objects.filter(**{f'{field}__isnull': False}).order_by(field).values_list(field, flat=True).distinct()
+        return [value for value in values if value != '']
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class BrandListFilter(CachedValuesFilter):
+    """Brand choices from the Brand table rather than SELECT DISTINCT over every radio."""
+    title = 'brand'
+    parameter_name = 'brand'
+
+    def values(self):
+        return caching.cached('admin_brand_names', lambda: list(Brand.objects.values_list('name', flat=True)))
+
+
+class IntroYearFilter(CachedValuesFilter):
+    title = 'intro year'
+    parameter_name = 'intro_year'
+
+
+class DmrFilter(CachedValuesFilter):
+    title = 'DMR'
+    parameter_name = 'dmr'
+
+
+class GpsFilter(CachedValuesFilter):
+    title = 'GPS'
+    parameter_name = 'gps'
+
+
+class AprsFilter(CachedValuesFilter):
+    title = 'APRS'
+    parameter_name = 'aprs'
 
 
 @admin.register(Brand)
@@ -25,10 +118,13 @@ class BrandAdmin(admin.ModelAdmin):
                 new_name = form.cleaned_data['new_name']
                 old_name = brand.name
                 # Update Brand
-                Brand.objects.filter(name=old_name).update(name=new_name)
+                # QuerySet.update() skips auto_now; updated_at drives the page caches and edge syncs
+                now = timezone.now()
+                Brand.objects.filter(name=old_name).update(name=new_name, updated_at=now)
                 # Update Radio
                 from radios.models import Radio
-                Radio.objects.filter(brand=old_name).update(brand=new_name)
+                Radio.objects.filter(brand=old_name).update(brand=new_name, updated_at=now)
+                caching.bump_catalogue_version()
                 self.message_user(request, f"Renamed brand and all radios from '{old_name}' to '{new_name}'.")
                 return
         else:
@@ -40,10 +136,21 @@ class BrandAdmin(admin.ModelAdmin):
 @admin.register(Radio)
 class RadioAdmin(admin.ModelAdmin):
     list_display = ['brand', 'model', 'intro_year', 'freq_bands_tx', 'power_watts', 'cost_approx']
-    list_filter = ['brand', 'intro_year', 'dmr', 'gps', 'aprs']
-    search_fields = ['brand', 'model', 'fcc_id']
+    list_filter = [BrandListFilter, IntroYearFilter, DmrFilter, GpsFilter, AprsFilter]
+    # Prefix matches, answered by the UPPER(...) text_pattern_ops indexes on PostgreSQL
+    # (migration 0015); FCC IDs are matched on fcc_id_key in get_search_results
+    search_fields = ['^brand', '^model']
     ordering = ['brand', 'model']
-    
+    # Large-table changelists: no second COUNT(*) for the "N total" link, an
+    # estimated count when unfiltered, no per-choice facet counts
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    # Nothing in list_display follows a foreign key
+    list_select_related = False
+
+    actions = ['bulk_edit_fields', 'delete_radios']
+
     fieldsets = (
         ('Basic Information', {
             'fields': ('brand', 'model', 'fcc_id', 'intro_year')
@@ -64,3 +171,115 @@ class RadioAdmin(admin.ModelAdmin):
             'fields': ('notes',)
         }),
     )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name and match.url_name.endswith('_changelist'):
+            # The changelist shows a handful of columns; skip the long text fields
+            queryset = queryset.only('pk', *self.list_display)
+        return queryset
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Replaced by delete_radios, which does not list every object it deletes
+        actions.pop('delete_selected', None)
+        return actions
+
+    def _action_page(self, request, queryset, action, form=None):
+        return render(request, 'admin/radios/bulk_action.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': self.get_action(action)[2],
+            'action': action,
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
+
+    def bulk_edit_fields(self, request, queryset):
+        form = BulkEditForm(request.POST if 'apply' in request.POST else None)
+        if form.is_bound and form.is_valid():
+            updated = apply_bulk_edit(queryset, form.changes())
+            self.message_user(request, f"Updated {', '.join(form.changes())} on {updated} radios.")
+            return None
+        return self._action_page(request, queryset, 'bulk_edit_fields', form)
+    bulk_edit_fields.short_description = "Edit fields of selected radios (one UPDATE)"
+    bulk_edit_fields.allowed_permissions = ('change',)
+
+    def delete_radios(self, request, queryset):
+        if 'apply' in request.POST:
+            with caching.catalogue_changes(), transaction.atomic():
+                deleted = queryset.delete()[1].get(Radio._meta.label, 0)
+            self.message_user(request, f"Deleted {deleted} radios.")
+            return None
+        return self._action_page(request, queryset, 'delete_radios')
+    delete_radios.short_description = "Delete selected radios"
+    delete_radios.allowed_permissions = ('delete',)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        key = fcc_id_key(search_term)
+        if key:
+            results |= queryset.filter(fcc_id_key__startswith=key)
+        return results, may_have_duplicates
+
+
+@admin.register(RadioMergeLog)
+class RadioMergeLogAdmin(admin.ModelAdmin):
+    list_display = ['kept_label', 'kept_radio', 'created_at']
+    search_fields = ['kept_label']
+    readonly_fields = ['kept_radio', 'kept_label', 'merged_radios', 'field_sources', 'created_at']
+
+
+@admin.register(MergeCandidate)
+class MergeCandidateAdmin(admin.ModelAdmin):
+    list_display = ['block_key', 'size', 'score', 'status', 'created_at']
+    list_filter = ['status']
+    ordering = ['-score']
+
+
+@admin.register(ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'source', 'status', 'started_at', 'duration_s', 'rows', 'rows_per_sec', 'peak_memory_bytes']
+    list_filter = ['kind', 'status']
+    search_fields = ['source']
+    readonly_fields = [f.name for f in ImportRun._meta.fields]
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['description', 'kind', 'status', 'lock_keys', 'progress_done', 'progress_total', 'worker', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['description', 'lock_keys']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'heartbeat_at']
+
+
+@admin.register(GranteeWatermark)
+class GranteeWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['grantee_code', 'last_grant_date', 'rows', 'updated_at']
+    search_fields = ['grantee_code']
+
+
+@admin.register(FccGrant)
+class FccGrantAdmin(admin.ModelAdmin):
+    list_display = ['fcc_id', 'grant_date', 'application_purpose', 'lower_freq_mhz', 'upper_freq_mhz', 'applicant_name']
+    list_filter = ['application_purpose']
+    search_fields = ['=grantee_code', 'fcc_id', 'applicant_name']
+    date_hierarchy = 'grant_date'
+
+
+@admin.register(StatsRefresh)
+class StatsRefreshAdmin(admin.ModelAdmin):
+    list_display = ['name', 'rows', 'rows_written', 'duration_s', 'refreshed_at']
+    readonly_fields = [f.name for f in StatsRefresh._meta.fields]
+
+
+@admin.register(RadioRelation)
+class RadioRelationAdmin(admin.ModelAdmin):
+    list_display = ['source', 'target', 'kind', 'note']
+    list_filter = ['kind']
+    list_select_related = ['source', 'target']
+    raw_id_fields = ['source', 'target']
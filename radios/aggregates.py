@@ -0,0 +1,110 @@
+"""
+Dashboard and radio list aggregates, in a sync and an async flavour.
+
+    context = dashboard_stats()              # WSGI views
+    context = await adashboard_stats()       # ASGI views
+
+The dashboard needs the radio and brand totals, the newest radios and the
+biggest brands; the list page needs the radio count and the per-brand
+counts. The queries do not depend on one another, so the async functions
+start them all with asyncio.gather and wait once.
+
+Django's async ORM still hands each query to sync_to_async, on the request's
+own thread and connection, so the queries themselves run one after another;
+what the async path saves is the worker thread that would otherwise block for
+the whole view. The sync functions are what WSGI deployments use and what the
+async ones fall back to on the edge replica, whose facet counts are read with
+a raw cursor.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+
+from . import caching, edge
+from .models import Radio
+
+RECENT_RADIOS = 10
+TOP_BRANDS = 10
+
+
+def _recent_radios():
+    return Radio.objects.order_by('-created_at')[:RECENT_RADIOS]
+
+
+def _top_brands():
+    return Radio.objects.values('brand').annotate(count=Count('id')).order_by('-count')[:TOP_BRANDS]
+
+
+def _edge_dashboard_stats():
+    # Precomputed facet counts on the read-only replica
+    brand_counts = edge.facet_counts('brand', order_by_count=True)
+    return {
+        'total_radios': Radio.objects.count(),
+        'total_brands': len(brand_counts),
+        'recent_radios': list(_recent_radios()),
+        'top_brands': [{'brand': b, 'count': n} for b, n in brand_counts[:TOP_BRANDS]],
+    }
+
+
+def dashboard_stats():
+    """Context for the dashboard: total_radios, total_brands, recent_radios, top_brands."""
+    if edge.is_edge():
+        return _edge_dashboard_stats()
+    return {
+        'total_radios': Radio.objects.count(),
+        'total_brands': Radio.objects.aggregate(n=Count('brand', distinct=True))['n'],
+        'recent_radios': list(_recent_radios()),
+        'top_brands': list(_top_brands()),
+    }
+
+
+async def adashboard_stats():
+    """dashboard_stats() with the queries awaited together."""
+    if edge.is_edge():
+        return await sync_to_async(_edge_dashboard_stats)()
+    total_radios, brands, recent_radios, top_brands = await asyncio.gather(
+        Radio.objects.acount(),
+        Radio.objects.aaggregate(n=Count('brand', distinct=True)),
+        _alist(_recent_radios()),
+        _alist(_top_brands()),
+    )
+    return {
+        'total_radios': total_radios,
+        'total_brands': brands['n'],
+        'recent_radios': recent_radios,
+        'top_brands': top_brands,
+    }
+
+
+def brand_counts():
+    """[{'brand': ..., 'count': ...}] for every brand, by name."""
+    if edge.is_edge():
+        return [{'brand': b, 'count': n} for b, n in edge.facet_counts('brand')]
+    return list(Radio.objects.values('brand').annotate(count=Count('id')).order_by('brand'))
+
+
+async def abrand_counts():
+    if edge.is_edge():
+        return await sync_to_async(brand_counts)()
+    return await _alist(Radio.objects.values('brand').annotate(count=Count('id')).order_by('brand'))
+
+
+def list_aggregates():
+    """The radio list's total_count and brands, cached per catalogue version."""
+    return {
+        'total_count': caching.cached('radio_count', Radio.objects.count),
+        'brands': caching.cached('brand_counts', brand_counts),
+    }
+
+
+async def alist_aggregates():
+    total_count, brands = await asyncio.gather(
+        caching.acached('radio_count', Radio.objects.acount),
+        caching.acached('brand_counts', abrand_counts),
+    )
+    return {'total_count': total_count, 'brands': brands}
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
@@ -5,3 +5,7 @@ class RadiosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'radios'
     verbose_name = 'Ham Radios'
+
+    def ready(self):
+        from . import signals
+        signals.connect()
@@ -0,0 +1,233 @@
+"""
+In-memory prefix index for the search box typeahead.
+
+    complete('uv5')   # [{'kind': 'model', 'label': 'Baofeng UV-5R', ...}, ...]
+
+Keys are brand names, models, "brand model" and FCC IDs, normalized to
+lower-case letters and digits so 'uv5' finds UV-5R. They are kept in one
+sorted list; a lookup is a bisect to the range of keys with the prefix and a
+scan of it. Completions rank exact matches first, then by the number of
+radios of the brand, so popular brands come before rare ones.
+
+Ranges longer than MAX_SCAN (one- and two-letter prefixes) are ranked in
+full once and their best TOP_N completions per kind kept in `tops`. The
+one- and two-letter ones are computed with the index; the others, and
+every one after an in-place change, on first use.
+
+Radio saves and deletes update the index in place through signals. Brand
+changes and bulk writes (anything in caching.catalogue_changes) leave it
+alone and the next lookup rebuilds it, since the catalogue version moved.
+Other processes notice the version change the same way.
+"""
+import bisect
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from urllib.parse import urlencode
+
+from django.db import transaction
+from django.urls import reverse
+
+from . import caching
+
+BRAND = 'brand'
+MODEL = 'model'
+FCC_ID = 'fcc_id'
+KINDS = (BRAND, MODEL, FCC_ID)
+
+# Ranges longer than this are served from the precomputed tops
+MAX_SCAN = 5000
+# Completions kept per kind for those prefixes; the endpoint asks for at most 25
+TOP_N = 25
+# Prefixes whose tops are computed when the index is built
+SHORT_PREFIX = 2
+RESULT_CACHE_SIZE = 1024
+
+
+def normalize(text):
+    return ''.join(c for c in (text or '').casefold() if c.isalnum())
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys = []          # sorted (key, kind, ref); ref is a radio pk, or the name for brands
+        self.radios = {}        # pk -> (brand, model, fcc_id)
+        self.brand_counts = Counter()
+        self.brands = set()     # names from the Brand table
+        self.tops = {}          # prefix -> {kind: [(rank, (kind, ref)), ...]} for long ranges
+        self.version = None
+        self.lock = threading.RLock()
+        self._results = OrderedDict()
+
+    # --- building ---
+
+    def build(self):
+        from .models import Radio, Brand
+        version = caching.catalogue_version()
+        radios = {}
+        for pk, brand, model, fcc_id in Radio.objects.values_list('pk', 'brand', 'model', 'fcc_id').iterator(chunk_size=5000):
+            radios[pk] = (brand, model, fcc_id)
+        brands = set(Brand.objects.values_list('name', flat=True))
+        counts = Counter(brand for brand, _, _ in radios.values())
+        keys = [(normalize(name), BRAND, name) for name in brands | set(counts)]
+        for pk, radio in radios.items():
+            keys.extend(self._radio_keys(pk, *radio))
+        keys.sort()
+        with self.lock:
+            self.keys, self.radios, self.brand_counts, self.brands = keys, radios, counts, brands
+            self.version = version
+            self._changed()
+            for prefix in sorted({key[:n] for key, _, _ in keys for n in range(1, SHORT_PREFIX + 1)}):
+                start, end = self._range(prefix)
+                if end - start > MAX_SCAN:
+                    self.tops[prefix] = self._tops(prefix, start, end)
+
+    def _changed(self):
+        self._results.clear()
+        self.tops = {}
+
+    @staticmethod
+    def _radio_keys(pk, brand, model, fcc_id):
+        keys = [(normalize(model), MODEL, pk), (normalize(f'{brand} {model}'), MODEL, pk)]
+        if fcc_id:
+            keys.append((normalize(fcc_id), FCC_ID, pk))
+        return [k for k in keys if k[0]]
+
+    def _insert(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+
+    def _remove(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def add_radio(self, pk, brand, model, fcc_id):
+        with self.lock:
+            self.remove_radio(pk)
+            self.radios[pk] = (brand, model, fcc_id)
+            if not self.brand_counts[brand] and brand not in self.brands:
+                self._insert((normalize(brand), BRAND, brand))
+            self.brand_counts[brand] += 1
+            for key in self._radio_keys(pk, brand, model, fcc_id):
+                self._insert(key)
+            self._changed()
+
+    def remove_radio(self, pk):
+        with self.lock:
+            radio = self.radios.pop(pk, None)
+            if radio is None:
+                return
+            brand = radio[0]
+            for key in self._radio_keys(pk, *radio):
+                self._remove(key)
+            self.brand_counts[brand] -= 1
+            if self.brand_counts[brand] <= 0:
+                del self.brand_counts[brand]
+                if brand not in self.brands:
+                    self._remove((normalize(brand), BRAND, brand))
+            self._changed()
+
+    # --- lookups ---
+
+    def complete(self, prefix, limit=10, kinds=KINDS):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        cache_key = (prefix, limit, tuple(kinds))
+        with self.lock:
+            if cache_key in self._results:
+                self._results.move_to_end(cache_key)
+                return self._results[cache_key]
+            start, end = self._range(prefix)
+            if end - start <= MAX_SCAN or limit > TOP_N:
+                ranked = self._rank_range(prefix, start, end, kinds)
+            else:
+                if prefix not in self.tops:
+                    self.tops[prefix] = self._tops(prefix, start, end)
+                ranked = [entry for kind in kinds for entry in self.tops[prefix][kind]]
+            top = heapq.nsmallest(limit, ranked)
+            results = [self._result(kind, ref) for _, (kind, ref) in top]
+            self._results[cache_key] = results
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return results
+
+    def _range(self, prefix):
+        """(start, end) of the keys starting with `prefix`."""
+        start = bisect.bisect_left(self.keys, (prefix,))
+        # Keys are letters and digits; the next string after every key with the prefix
+        end = bisect.bisect_left(self.keys, (prefix[:-1] + chr(ord(prefix[-1]) + 1),), start)
+        return start, end
+
+    def _rank_range(self, prefix, start, end, kinds):
+        """(rank, (kind, ref)) of every completion among keys[start:end], at its best key."""
+        best = {}
+        for key, kind, ref in self.keys[start:end]:
+            if kind not in kinds:
+                continue
+            brand = ref if kind == BRAND else self.radios[ref][0]
+            rank = (key != prefix, -self.brand_counts[brand], len(key))
+            if rank < best.get((kind, ref), (True, 1, float('inf'))):
+                best[(kind, ref)] = rank
+        return [(rank, item) for item, rank in best.items()]
+
+    def _tops(self, prefix, start, end):
+        ranked = self._rank_range(prefix, start, end, KINDS)
+        return {kind: heapq.nsmallest(TOP_N, [entry for entry in ranked if entry[1][0] == kind]) for kind in KINDS}
+
+    def _result(self, kind, ref):
+        if kind == BRAND:
+            return {
+                'kind': BRAND, 'value': ref, 'label': ref, 'count': self.brand_counts[ref],
+                'url': f"{reverse('radio_list')}?{urlencode({'brand': ref})}",
+            }
+        brand, model, fcc_id = self.radios[ref]
+        result = {'kind': kind, 'value': model if kind == MODEL else fcc_id, 'url': reverse('radio_detail', args=[ref])}
+        result['label'] = f'{brand} {model}' if kind == MODEL else f'{fcc_id} ({brand} {model})'
+        return result
+
+
+_index = PrefixIndex()
+
+
+def get_index():
+    """The process-wide index, rebuilt when the catalogue version moved since it was built."""
+    if _index.version is None or _index.version != caching.catalogue_version():
+        with _index.lock:
+            if _index.version is None or _index.version != caching.catalogue_version():
+                _index.build()
+    return _index
+
+
+def complete(prefix, limit=10, kinds=KINDS):
+    return get_index().complete(prefix, limit, kinds)
+
+
+# --- signal receivers ---
+
+def _keep_version(seen):
+    # Our own change bumps the version by one; anything else means another writer, so rebuild
+    current = caching.catalogue_version()
+    if _index.version is None and isinstance(seen, int) and current == seen + 1:
+        _index.version = current
+
+
+def _apply(change):
+    if _index.version is None or caching.in_bulk_change():
+        return
+    with _index.lock:
+        seen = _index.version
+        # Not trusted until the transaction commits; a rollback leaves it to a rebuild
+        _index.version = None
+        change()
+    transaction.on_commit(lambda: _keep_version(seen))
+
+
+def radio_saved(sender, instance, **kwargs):
+    _apply(lambda: _index.add_radio(instance.pk, instance.brand, instance.model, instance.fcc_id))
+
+
+def radio_deleted(sender, instance, **kwargs):
+    _apply(lambda: _index.remove_radio(instance.pk))
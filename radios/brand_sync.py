@@ -0,0 +1,109 @@
+"""
+Bulk synchronization of the Brand table.
+
+One engine behind sync_radio_brands, import_grantees and import_brands: the
+existing brands are read once, the set difference against the incoming
+records is computed in memory, and the result is written with batched
+bulk_create(ignore_conflicts=True) / bulk_create(update_conflicts=True).
+"""
+from django.db import transaction
+from .models import Brand
+from .caching import catalogue_changes
+
+
+def sync_brands(records, key='grantee_code', update_fields=(), fill_blank_only=False,
+                batch_size=1000, progress=None):
+    """
+    Create or update Brand rows from an iterable of dicts of Brand field values.
+
+    key             -- unique Brand field identifying a record ('grantee_code' or 'name')
+    update_fields   -- fields refreshed on brands that already exist (none: create only)
+    fill_blank_only -- only fill update_fields that are currently blank
+    progress        -- optional callable(done, total) invoked after every written batch
+
+    Returns a dict of counts: created, updated, unchanged and conflicts, the
+    latter being records skipped because their name belongs to another brand.
+    """
+    update_fields = list(update_fields)
+
+    # Deduplicate the input on the key; the last record wins, as with update_or_create
+    incoming = {}
+    for rec in records:
+        value = (rec.get(key) or '').strip()
+        if value and (rec.get('name') or '').strip():
+            incoming[value] = rec
+
+    existing = {}
+    name_owner = {}
+    for row in Brand.objects.values('pk', 'name', 'grantee_code', *update_fields):
+        if row[key]:
+            existing[row[key]] = row
+        name_owner[row['name']] = row[key]
+
+    to_create = []
+    to_update = []
+    unchanged = 0
+    conflicts = 0
+    for value, rec in incoming.items():
+        row = existing.get(value)
+        if row is None:
+            name = rec['name'].strip()
+            if name in name_owner:
+                conflicts += 1
+                continue
+            name_owner[name] = value
+            to_create.append(Brand(**_brand_values(rec, key, value, update_fields)))
+            continue
+        values = {f: row[f] for f in update_fields}
+        changed = False
+        for f in update_fields:
+            new = (rec.get(f) or '').strip()
+            if fill_blank_only and row[f]:
+                continue
+            if new != (row[f] or ''):
+                values[f] = new
+                changed = True
+        if not changed:
+            unchanged += 1
+            continue
+        if 'name' in values and name_owner.get(values['name'], value) != value:
+            conflicts += 1
+            continue
+        name_owner[values.get('name', row['name'])] = value
+        values[key] = value
+        values.setdefault('name', row['name'])
+        to_update.append(Brand(**values))
+
+    total = len(to_create) + len(to_update)
+    done = 0
+    with catalogue_changes(), transaction.atomic():
+        for start in range(0, len(to_create), batch_size):
+            batch = to_create[start:start + batch_size]
+            Brand.objects.bulk_create(batch, ignore_conflicts=True)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+        for start in range(0, len(to_update), batch_size):
+            batch = to_update[start:start + batch_size]
+            Brand.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=[key],
+                update_fields=update_fields + ['updated_at'],
+            )
+            done += len(batch)
+            if progress:
+                progress(done, total)
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged,
+        'conflicts': conflicts,
+    }
+
+
+def _brand_values(rec, key, value, update_fields):
+    values = {f: (rec.get(f) or '').strip() for f in ['name'] + update_fields}
+    values[key] = value
+    return values
@@ -0,0 +1,104 @@
+"""
+Bulk field edits: one UPDATE for a selection or a filtered queryset, or one
+bulk_update when every radio gets its own value.
+
+    apply_bulk_edit(Radio.objects.filter(brand='TYT'), {'dmr': 'Yes'})
+    apply_row_edits({12: {'intro_year': 2014}, 15: {'intro_year': 2016}})
+
+Neither sends save signals, so both set updated_at themselves (the edge
+replica sync and the per-row fragment cache key on it) and run inside
+caching.catalogue_changes() so the cached pages and the typeahead index are
+invalidated once, after the transaction commits.
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import catalogue_changes
+from .models import Radio
+
+# Brand, model and FCC ID stay out: they take part in the (brand, model)
+# uniqueness and the derived FCC ID columns, which per-radio saves maintain
+BULK_EDIT_FIELDS = [
+    'intro_year', 'freq_bands_tx', 'power_watts',
+    'satellite_tracking', 'harmonic_suppression', 'gps', 'aprs', 'air_band', 'dmr',
+    'display', 'battery_mah', 'cost_approx', 'website', 'notes',
+]
+
+INPUT_CLASS = 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm'
+
+
+class BulkEditForm(forms.Form):
+    """A value per editable field and a checkbox choosing whether to set it, so a field can be cleared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in BULK_EDIT_FIELDS:
+            model_field = Radio._meta.get_field(name)
+            self.fields[f'set_{name}'] = forms.BooleanField(required=False, label=f'Set {model_field.verbose_name}')
+            field = model_field.formfield(required=False)
+            field.widget.attrs.setdefault('class', INPUT_CLASS)
+            if isinstance(field.widget, forms.Textarea):
+                field.widget.attrs['rows'] = 2
+            self.fields[name] = field
+
+    def rows(self):
+        return [(self[f'set_{name}'], self[name]) for name in BULK_EDIT_FIELDS]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.changes():
+            raise ValidationError('Tick at least one field to set.')
+        return cleaned_data
+
+    def changes(self):
+        return {
+            name: self.cleaned_data.get(name)
+            for name in BULK_EDIT_FIELDS if self.cleaned_data.get(f'set_{name}')
+        }
+
+
+def clean_values(values):
+    """Validate {field: value} from a JSON request against the model fields; raises ValidationError."""
+    cleaned, errors = {}, {}
+    for name, value in values.items():
+        if name not in BULK_EDIT_FIELDS:
+            errors[name] = ['This field cannot be edited in bulk.']
+            continue
+        field = Radio._meta.get_field(name)
+        if value is None and not field.null:
+            value = ''
+        try:
+            cleaned[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def apply_bulk_edit(queryset, changes):
+    """Set the same values on every radio in `queryset` with one UPDATE; returns the row count."""
+    with catalogue_changes(), transaction.atomic():
+        return queryset.update(updated_at=timezone.now(), **changes)
+
+
+def apply_row_edits(rows, batch_size=500):
+    """
+    Per-radio values, {pk: {field: value}}, written with bulk_update. Unknown
+    pks are skipped; returns the number of radios updated.
+    """
+    fields = sorted({name for values in rows.values() for name in values})
+    if not fields:
+        return 0
+    now = timezone.now()
+    with catalogue_changes(), transaction.atomic():
+        radios = Radio.objects.only('pk', *fields).in_bulk(list(rows))
+        for pk, radio in radios.items():
+            for name, value in rows[pk].items():
+                setattr(radio, name, value)
+            # bulk_update does not apply auto_now
+            radio.updated_at = now
+        Radio.objects.bulk_update(radios.values(), fields + ['updated_at'], batch_size=batch_size)
+    return len(radios)
@@ -0,0 +1,125 @@
+"""
+Cached rendering for the radio list and detail pages.
+
+Cache keys carry a catalogue version: a counter in the database (one
+CatalogueVersion row) that is bumped whenever a Radio or Brand changes, so
+stale fragments are never deleted, they just stop being looked up. The
+counter lives in the database so that bumps from job workers and management
+commands reach every web process whatever the cache backend. Each process
+keeps the value it read in the cache for VERSION_TTL; with a process-local
+cache (LocMemCache, the default) another process's change shows up within
+that time, with a shared cache at once.
+
+    version = catalogue_version()
+    with catalogue_changes():       # bulk paths: one bump when the block ends
+        Radio.objects.filter(...).update(...)
+
+Per-object saves and deletes bump the counter through signals (see
+radios.signals). QuerySet.update(), bulk_create() and bulk_update() send no
+signals, so the bulk commands call bump_catalogue_version() themselves; they
+also set updated_at, which the fragment keys, Last-Modified and the edge
+replica's delta sync read.
+Bumps are deferred until the surrounding transaction commits; bumping
+earlier would let a concurrent request cache the old rows under the new
+version.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+VERSION_KEY = 'radios:catalogue_version'
+# Seconds a process reuses the version it read before reading it again
+VERSION_TTL = 2
+
+# Fragments are keyed on the version, so the timeout only bounds memory use
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+_state = threading.local()
+
+
+def catalogue_version():
+    from . import edge
+    if edge.is_edge():
+        # The replica is rewritten by build_edge_replica, not through the models
+        from django.db import connection
+        return f"edge.{edge.get_meta(connection, 'last_sync')}"
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _read_version()
+        cache.set(VERSION_KEY, version, VERSION_TTL)
+    return version
+
+
+def _read_version():
+    from .models import CatalogueVersion
+    version = CatalogueVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    if version is None:
+        # Start from the clock so a recreated row never reuses an old version
+        version = CatalogueVersion.objects.get_or_create(pk=1, defaults={'version': int(time.time() * 1000)})[0].version
+    return version
+
+
+def _bump():
+    from .models import CatalogueVersion
+    if not CatalogueVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        _read_version()
+    cache.delete(VERSION_KEY)
+
+
+def bump_catalogue_version():
+    """Invalidate every cached fragment once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def catalogue_changed(**kwargs):
+    """post_save / post_delete receiver for Radio and Brand."""
+    if not in_bulk_change():
+        bump_catalogue_version()
+
+
+def in_bulk_change():
+    return bool(getattr(_state, 'depth', 0))
+
+
+@contextmanager
+def catalogue_changes():
+    """Collect the signal bumps of a bulk write into a single bump at the end of the block."""
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if not _state.depth:
+            bump_catalogue_version()
+
+
+def versioned_key(name, *parts):
+    digest = hashlib.md5(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f'radios:{name}:{catalogue_version()}:{digest}'
+
+
+def cached(name, compute, *parts, timeout=FRAGMENT_TIMEOUT):
+    """`compute()` cached under the current catalogue version."""
+    key = versioned_key(name, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def acached(name, compute, *parts, timeout=FRAGMENT_TIMEOUT):
+    """cached() for async views: `await compute()` cached under the current catalogue version."""
+    # The version lookup reads the replica's metadata table on the edge
+    key = await sync_to_async(versioned_key)(name, *parts)
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        await cache.aset(key, value, timeout)
+    return value
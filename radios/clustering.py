@@ -0,0 +1,130 @@
+"""
+Duplicate detection for the radio catalogue.
+
+Radios are grouped into small blocks (normalized brand + model prefix, and FCC
+grantee code + model prefix) and only pairs inside a block are compared, using
+Jaccard similarity over character trigrams of the normalized model name.
+Similar pairs are joined with union-find into scored candidate groups.
+"""
+import re
+from collections import defaultdict
+
+from .fcc_ingest import split_fcc_id
+
+NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+# Blocks larger than this are compared against a sliding window of sorted neighbours only
+MAX_BLOCK_SIZE = 200
+WINDOW = 20
+# Minimum trigram Jaccard similarity for two radios to be paired
+DEFAULT_THRESHOLD = 0.7
+
+
+def normalize_key(value):
+    """Uppercase and strip everything but letters and digits: 'UV-5R Plus' -> 'UV5RPLUS'."""
+    return NON_ALNUM.sub('', (value or '').upper())
+
+
+def trigrams(value):
+    padded = f"  {value} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def grantee_code_for(fcc_id, brand_code):
+    """Grantee code of an FCC ID, dashed or not (see split_fcc_id), falling back to the brand's code."""
+    if fcc_id and fcc_id.strip():
+        return normalize_key(split_fcc_id(fcc_id)[0])
+    return normalize_key(brand_code)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _block_pairs(members):
+    """Yield index pairs to compare inside one block."""
+    n = len(members)
+    if n <= MAX_BLOCK_SIZE:
+        for i in range(n):
+            for j in range(i + 1, n):
+                yield i, j
+    else:
+        for i in range(n):
+            for j in range(i + 1, min(n, i + WINDOW + 1)):
+                yield i, j
+
+
+def find_candidate_groups(rows, brand_codes=None, threshold=DEFAULT_THRESHOLD, prefix_len=2):
+    """
+    Cluster radios into merge candidate groups.
+
+    rows        -- iterable of (pk, brand, model, fcc_id)
+    brand_codes -- optional {brand name: grantee code} from the Brand table
+    Returns a list of (score, [pk, ...], block_key) sorted by descending score,
+    where score is the mean similarity of the pairs that joined the group.
+    """
+    brand_codes = brand_codes or {}
+    grams = {}
+    blocks = defaultdict(list)
+    for pk, brand, model, fcc_id in rows:
+        norm_model = normalize_key(model)
+        if not norm_model:
+            continue
+        grams[pk] = (norm_model, trigrams(norm_model))
+        prefix = norm_model[:prefix_len]
+        blocks[('brand', normalize_key(brand), prefix)].append(pk)
+        code = grantee_code_for(fcc_id, brand_codes.get(brand))
+        if code:
+            blocks[('grantee', code, prefix)].append(pk)
+
+    uf = UnionFind()
+    edges = {}
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda pk: grams[pk][0])
+        for i, j in _block_pairs(members):
+            a, b = members[i], members[j]
+            pair = (a, b) if a < b else (b, a)
+            if pair in edges:
+                continue
+            na, ga = grams[a]
+            nb, gb = grams[b]
+            score = 1.0 if na == nb else jaccard(ga, gb)
+            if score >= threshold:
+                edges[pair] = (score, key)
+                uf.union(a, b)
+
+    groups = defaultdict(lambda: {'pks': set(), 'scores': [], 'key': None})
+    for (a, b), (score, key) in edges.items():
+        group = groups[uf.find(a)]
+        group['pks'].update((a, b))
+        group['scores'].append(score)
+        group['key'] = group['key'] or key
+    result = [
+        (sum(g['scores']) / len(g['scores']), sorted(g['pks']), ':'.join(g['key']))
+        for g in groups.values()
+    ]
+    result.sort(key=lambda g: (-g[0], g[1]))
+    return result
@@ -0,0 +1,234 @@
+"""
+Read-only SQLite replica of the catalogue for offline field deployments.
+
+    python manage.py build_edge_replica edge_replica.sqlite3          # full build, then deltas
+    DJANGO_SETTINGS_MODULE=radio_database.settings_edge python manage.py runserver
+
+The replica has the Django schema (built with migrate), the Radio and Brand
+rows, an FTS5 index over brand/model/fcc_id kept current by triggers, and
+facet tables with precomputed counts. Later runs copy only rows whose
+updated_at changed since the last sync and drop rows deleted upstream, so
+bulk update() paths have to set updated_at as well (see radios.caching).
+Imports stamp updated_at before their transaction commits, so a delta also
+re-reads the SYNC_OVERLAP before the last sync; rows that come back with the
+updated_at the replica already has are left alone.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.utils import load_backend
+from django.utils import timezone
+
+from .models import Radio, Brand
+
+EDGE_ALIAS = 'edge'
+
+FTS_TABLE = 'edge_radio_fts'
+FACET_TABLE = 'edge_facet'
+META_TABLE = 'edge_meta'
+
+# Re-read rows stamped this long before the previous sync; longer than any write transaction
+SYNC_OVERLAP = timedelta(minutes=10)
+
+# Facet name -> Radio column; counts are precomputed per distinct value
+FACETS = {
+    'brand': 'brand',
+    'gps': 'gps',
+    'dmr': 'dmr',
+    'aprs': 'aprs',
+    'air_band': 'air_band',
+    'satellite_tracking': 'satellite_tracking',
+    'freq_bands_tx': 'freq_bands_tx',
+    'intro_year': 'intro_year',
+}
+
+EDGE_SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    f"CREATE TABLE IF NOT EXISTS {FACET_TABLE} (facet TEXT NOT NULL, value TEXT, count INTEGER NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS {FACET_TABLE}_facet ON {FACET_TABLE} (facet, count DESC)",
+    # External-content FTS5 table over radios_radio, kept in step by triggers
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        brand, model, fcc_id, content='radios_radio', content_rowid='id', tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON radios_radio BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, brand, model, fcc_id) VALUES (new.id, new.brand, new.model, new.fcc_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON radios_radio BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, brand, model, fcc_id) VALUES ('delete', old.id, old.brand, old.model, old.fcc_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON radios_radio BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, brand, model, fcc_id) VALUES ('delete', old.id, old.brand, old.model, old.fcc_id);
+        INSERT INTO {FTS_TABLE}(rowid, brand, model, fcc_id) VALUES (new.id, new.brand, new.model, new.fcc_id);
+    END""",
+]
+
+
+def edge_connection(path, alias=EDGE_ALIAS):
+    """
+    Open `path` as a writable SQLite connection under `alias`. The wrapper is
+    attached to the connection handler without touching settings.DATABASES.
+    """
+    current = getattr(connections._connections, alias, None)
+    if current is not None and current.settings_dict['NAME'] == str(path):
+        return current
+    settings_dict = connections.configure_settings({
+        'default': {},
+        alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(path)},
+    })[alias]
+    connection = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, alias)
+    connections[alias] = connection
+    return connection
+
+
+def get_meta(connection, key):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT value FROM {META_TABLE} WHERE key = %s", [key])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def set_meta(connection, key, value):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {META_TABLE} (key, value) VALUES (%s, %s) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [key, str(value)],
+        )
+
+
+def create_edge_schema(connection):
+    with connection.cursor() as cursor:
+        for statement in EDGE_SCHEMA:
+            cursor.execute(statement)
+
+
+def _upsert_sql(model, fields, changed_only=False):
+    table = model._meta.db_table
+    columns = [f'"{f.column}"' for f in fields]
+    placeholders = ', '.join(['%s'] * len(columns))
+    updates = ', '.join(f'{c} = excluded.{c}' for c in columns if c != '"id"')
+    sql = (
+        f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({placeholders}) '
+        f'ON CONFLICT("id") DO UPDATE SET {updates}'
+    )
+    if changed_only:
+        sql += f' WHERE excluded."updated_at" IS NOT "{table}"."updated_at"'
+    return sql
+
+
+def copy_rows(model, connection, since=None, batch_size=2000):
+    """
+    Upsert rows of `model` changed since `since` (all rows when None) into the
+    replica, streaming the source with iterator(), and return how many were
+    written. Raw SQL keeps the source updated_at, which bulk_create would
+    overwrite through auto_now. With `since`, rows whose updated_at the
+    replica already has are skipped and not counted.
+    """
+    fields = [f for f in model._meta.concrete_fields]
+    queryset = model.objects.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    sql = _upsert_sql(model, fields, changed_only=since is not None)
+    adapt = [f.get_db_prep_value for f in fields]
+    copied = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for row in queryset.values_list(*[f.attname for f in fields]).iterator(chunk_size=batch_size):
+            batch.append([prep(value, connection, prepared=False) for prep, value in zip(adapt, row)])
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                copied += cursor.rowcount
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            copied += cursor.rowcount
+    return copied
+
+
+def delete_missing(model, connection, batch_size=500):
+    """Drop replica rows whose primary key no longer exists upstream."""
+    source = set(model.objects.values_list('pk', flat=True).iterator(chunk_size=10000))
+    replica = set(model.objects.using(connection.alias).values_list('pk', flat=True).iterator(chunk_size=10000))
+    gone = sorted(replica - source)
+    for i in range(0, len(gone), batch_size):
+        model.objects.using(connection.alias).filter(pk__in=gone[i:i + batch_size]).delete()
+    return len(gone)
+
+
+def refresh_facets(connection):
+    table = Radio._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FACET_TABLE}")
+        for facet, column in FACETS.items():
+            cursor.execute(
+                f"INSERT INTO {FACET_TABLE} (facet, value, count) "
+                f"SELECT %s, CAST(\"{column}\" AS TEXT), COUNT(*) FROM \"{table}\" "
+                f"WHERE \"{column}\" IS NOT NULL AND \"{column}\" != '' GROUP BY \"{column}\"",
+                [facet],
+            )
+
+
+def sync_replica(connection, full=False, batch_size=2000):
+    """
+    Bring the replica up to date: everything on the first run (or with
+    full=True), afterwards only rows with an updated_at after the last sync
+    less SYNC_OVERLAP.
+    """
+    started = timezone.now()
+    last_sync = None if full else get_meta(connection, 'last_sync')
+    since = None
+    if last_sync:
+        since = datetime.fromisoformat(last_sync) - SYNC_OVERLAP
+    counts = {}
+    with transaction.atomic(using=connection.alias):
+        counts['brands_deleted'] = delete_missing(Brand, connection)
+        counts['radios_deleted'] = delete_missing(Radio, connection)
+        counts['brands_copied'] = copy_rows(Brand, connection, since, batch_size)
+        counts['radios_copied'] = copy_rows(Radio, connection, since, batch_size)
+        refresh_facets(connection)
+        with connection.cursor() as cursor:
+            if since is None:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        set_meta(connection, 'last_sync', started.isoformat())
+        set_meta(connection, 'radios', Radio.objects.using(connection.alias).count())
+    if since is None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute("ANALYZE")
+    counts['full'] = since is None
+    return counts
+
+
+# --- read side, used by the views when settings.EDGE_REPLICA is on ---------------------------
+
+def is_edge():
+    return getattr(settings, 'EDGE_REPLICA', False)
+
+
+def fts_query(text):
+    """FTS5 MATCH expression: every word as a quoted prefix term."""
+    terms = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+
+def fts_filter(queryset, text):
+    """Restrict a Radio queryset to FTS5 matches of `text`."""
+    from django.db.models.expressions import RawSQL
+    match = fts_query(text)
+    if not match:
+        return queryset
+    return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+
+
+def facet_counts(facet, order_by_count=False, limit=None):
+    """[(value, count)] from the precomputed facet table."""
+    sql = f"SELECT value, count FROM {FACET_TABLE} WHERE facet = %s ORDER BY "
+    sql += "count DESC, value" if order_by_count else "value"
+    params = [facet]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connections['default'].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -0,0 +1,103 @@
+"""
+Rebadge/clone families.
+
+RadioRelation edges come from two sources: the free-text rebadges_clones
+field, parsed into references to other radios in the catalogue, and radios
+sharing a canonical FCC ID (the same grantee and product code). Connected
+components of the edge graph are closed with union-find and every member
+gets the smallest pk of its component as family_id, so the whole family of
+a radio is one indexed query:
+
+    Radio.objects.filter(family_id=radio.family_id)
+
+Run `python manage.py build_radio_families` after imports or edits.
+"""
+import re
+from collections import defaultdict
+
+from .clustering import UnionFind, normalize_key
+
+# "Retevis H777, Arcshell AR-5" / "Radtel RT-860 / BinTolk BT7700"; a bare slash
+# stays inside a token because models use it ("AT-D868/878")
+SEPARATORS = re.compile(r'\s+/\s+|[,;\n]|\s+or\s+|\s+and\s+', re.IGNORECASE)
+QUALIFIER = re.compile(r'\(([^)]*)\)')
+NOT_A_RADIO = re.compile(r'^(n/?a|none|unknown|-+)$|\.(com|net|org|cn)\b', re.IGNORECASE)
+
+
+def split_references(text):
+    """[(reference, qualifier)] from a rebadges_clones value."""
+    references = []
+    for token in SEPARATORS.split(text or ''):
+        qualifiers = QUALIFIER.findall(token)
+        token = ' '.join(QUALIFIER.sub(' ', token).split())
+        if not token or NOT_A_RADIO.search(token):
+            continue
+        references.append((token, ', '.join(q.strip() for q in qualifiers if q.strip())))
+    return references
+
+
+class ReferenceResolver:
+    """Resolves free-text references ("Retevis H777", "UV-5R") to radio pks."""
+
+    def __init__(self, rows):
+        self.by_brand_model = {}
+        self.by_model = defaultdict(set)
+        self.brand_models = defaultdict(dict)
+        for pk, brand, model in rows:
+            brand_key, model_key = normalize_key(brand), normalize_key(model)
+            self.by_brand_model.setdefault(brand_key + model_key, pk)
+            self.by_model[model_key].add(pk)
+            self.brand_models[brand_key].setdefault(model_key, pk)
+
+    def resolve(self, reference, brand=''):
+        """pk of the referenced radio, or None when it is not in the catalogue or ambiguous."""
+        key = normalize_key(reference)
+        if key in self.by_brand_model:
+            return self.by_brand_model[key]
+        # A model of the referring radio's own brand ("DJ-VX50" on an Alinco)
+        own = self.brand_models.get(normalize_key(brand), {})
+        if key in own:
+            return own[key]
+        matches = self.by_model.get(key, ())
+        if len(matches) == 1:
+            return next(iter(matches))
+        return None
+
+
+def parse_relations(rows):
+    """
+    Edges from the rebadges_clones text and from shared FCC IDs.
+
+    rows -- iterable of (pk, brand, model, fcc_id_key, rebadges_clones)
+    Returns ({(source, target, kind): note}, unresolved reference count).
+    """
+    from .models import RadioRelation
+    rows = list(rows)
+    resolver = ReferenceResolver((pk, brand, model) for pk, brand, model, _, _ in rows)
+    edges = {}
+    unresolved = 0
+    for pk, brand, model, _, text in rows:
+        for reference, qualifier in split_references(text):
+            target = resolver.resolve(reference, brand)
+            if target is None:
+                unresolved += 1
+            elif target != pk:
+                edges.setdefault((pk, target, RadioRelation.KIND_REBADGE), qualifier[:200])
+    by_fcc_id = defaultdict(list)
+    for pk, _, _, key, _ in rows:
+        if key:
+            by_fcc_id[key].append(pk)
+    for pks in by_fcc_id.values():
+        # A star on the smallest pk is enough to connect the group
+        first, *rest = sorted(pks)
+        for pk in rest:
+            edges.setdefault((first, pk, RadioRelation.KIND_FCC_ID), '')
+    return edges, unresolved
+
+
+def family_ids(edges):
+    """{pk: family_id} for every radio with at least one edge; family_id is the component's smallest pk."""
+    uf = UnionFind()
+    for source, target, _ in edges:
+        uf.union(source, target)
+    return {pk: uf.find(pk) for pk in uf.parent}
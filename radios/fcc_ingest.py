@@ -0,0 +1,273 @@
+"""
+Incremental ingest of FCC authorization exports.
+
+Every ingested <Row> is normalized, hashed and stored as an FccGrant; the
+hashes are kept in FccRowHash and the newest grant date per grantee in
+GranteeWatermark. A
+later run of the same (or a refreshed) export only passes on the rows that
+were not seen before:
+
+    rows = [normalize_row(el) for el in root.findall('Row')]
+    delta = classify_rows(rows)
+    ... write radios for delta.rows ...
+    record_rows(delta.states)
+
+Rows older than the grantee's watermark whose FCC ID is already known are
+treated as unchanged without hashing; pass full=True to hash every row.
+The state is keyed on the grantee code split_fcc_id() derives from the FCC
+ID, whichever importer wrote it.
+"""
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import FccGrant, FccRowHash, GranteeWatermark
+
+ROW_FIELDS = (
+    'applicant_name', 'address', 'city', 'state', 'country', 'zip_code', 'fcc_id',
+    'application_purpose', 'grant_date', 'lower_freq_mhz', 'upper_freq_mhz',
+)
+
+GRANT_DATE_FORMATS = ('%m/%d/%Y', '%Y-%m-%d')
+
+
+def parse_grant_date(value):
+    """FCC exports use MM/DD/YYYY; returns a date or None."""
+    if isinstance(value, date):
+        return value
+    value = (value or '').strip()
+    for fmt in GRANT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_freq(value):
+    # 462.55000000 and 462.55 are the same frequency
+    try:
+        return f"{float(value):.6f}"
+    except ValueError:
+        return value
+
+
+def normalize_row(row):
+    """
+    Normalized field dict for an FCC <Row> element (or a dict of its fields):
+    whitespace collapsed, FCC ID upper-cased, frequencies and dates in one format.
+    """
+    get = row.findtext if hasattr(row, 'findtext') else row.get
+    record = {field: ' '.join((get(field) or '').split()) for field in ROW_FIELDS}
+    record['fcc_id'] = record['fcc_id'].upper()
+    for field in ('lower_freq_mhz', 'upper_freq_mhz'):
+        if record[field]:
+            record[field] = _normalize_freq(record[field])
+    grant_date = parse_grant_date(record['grant_date'])
+    if grant_date:
+        record['grant_date'] = grant_date.isoformat()
+    return record
+
+
+def split_fcc_id(fcc_id):
+    """
+    (grantee_code, product_code) of an FCC ID. Grantee codes are 3 characters,
+    or 5 when they start with a digit (assigned since 2013, e.g. 2AJGM).
+    """
+    fcc_id = (fcc_id or '').strip().upper()
+    code_length = 5 if fcc_id[:1].isdigit() else 3
+    return fcc_id[:code_length], fcc_id[code_length:].lstrip('-')
+
+
+def fcc_id_key(fcc_id):
+    """Canonical lookup form of an FCC ID: upper case without dashes or spaces."""
+    return ''.join((fcc_id or '').upper().replace('-', ' ').split())
+
+
+def row_hash(record):
+    content = '\x1f'.join(record.get(field, '') for field in ROW_FIELDS)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def row_state(row, h=None):
+    """JSON-serializable record of a normalized row, as stored by record_rows."""
+    state = {field: row[field] for field in ROW_FIELDS}
+    grant_date = parse_grant_date(row.get('grant_date'))
+    grantee_code, product_code = split_fcc_id(row['fcc_id'])
+    state.update(
+        row_hash=h or row_hash(row),
+        grantee_code=grantee_code,
+        product_code=product_code,
+        grant_date=grant_date.isoformat() if grant_date else None,
+    )
+    return state
+
+
+class IngestDelta:
+    """Result of classify_rows: the rows to write and the state to record once written."""
+
+    def __init__(self):
+        self.rows = []
+        self.states = []
+        self.new_fcc_ids = set()
+        self.changed_fcc_ids = set()
+        self.unchanged_fcc_ids = set()
+        self.rows_skipped = 0
+
+    @property
+    def counts(self):
+        return {
+            'new': len(self.new_fcc_ids),
+            'changed': len(self.changed_fcc_ids),
+            'unchanged': len(self.unchanged_fcc_ids),
+            'rows_delta': len(self.rows),
+            'rows_skipped': self.rows_skipped,
+        }
+
+    def summary(self):
+        counts = self.counts
+        return (
+            f"{counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged FCC IDs "
+            f"({counts['rows_delta']} rows to write, {counts['rows_skipped']} skipped)"
+        )
+
+
+def classify_rows(rows, full=False):
+    """
+    Split normalized rows into the delta and the unchanged rest. FCC IDs
+    count as new when none of their rows were seen before and as changed
+    when some were. Reads the stored state for the grantees involved in two
+    queries.
+    """
+    rows = list(rows)
+    codes = {split_fcc_id(row['fcc_id'])[0] for row in rows}
+    watermarks = dict(
+        GranteeWatermark.objects.filter(grantee_code__in=codes).values_list('grantee_code', 'last_grant_date')
+    )
+    known_hashes = set()
+    known_fcc_ids = set()
+    for h, fcc_id in FccRowHash.objects.filter(grantee_code__in=codes).values_list('row_hash', 'fcc_id').iterator():
+        known_hashes.add(h)
+        known_fcc_ids.add(fcc_id)
+
+    delta = IngestDelta()
+    touched = set()
+    for row in rows:
+        fcc_id = row['fcc_id']
+        grant_date = parse_grant_date(row.get('grant_date'))
+        watermark = watermarks.get(split_fcc_id(fcc_id)[0])
+        if (not full and watermark and grant_date and grant_date < watermark
+                and fcc_id in known_fcc_ids):
+            delta.rows_skipped += 1
+            continue
+        h = row_hash(row)
+        if h in known_hashes:
+            delta.rows_skipped += 1
+            continue
+        known_hashes.add(h)
+        delta.rows.append(row)
+        delta.states.append(row_state(row, h))
+        touched.add(fcc_id)
+
+    for fcc_id in {row['fcc_id'] for row in rows}:
+        if fcc_id not in touched:
+            delta.unchanged_fcc_ids.add(fcc_id)
+        elif fcc_id in known_fcc_ids:
+            delta.changed_fcc_ids.add(fcc_id)
+        else:
+            delta.new_fcc_ids.add(fcc_id)
+    return delta
+
+
+def _decimal_or_none(value):
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+
+
+def grant_from_state(state):
+    return FccGrant(
+        row_hash=state['row_hash'],
+        grantee_code=state['grantee_code'],
+        product_code=state['product_code'],
+        fcc_id=state['fcc_id'],
+        applicant_name=state.get('applicant_name', ''),
+        address=state.get('address', ''),
+        city=state.get('city', ''),
+        state=state.get('state', ''),
+        country=state.get('country', ''),
+        zip_code=state.get('zip_code', ''),
+        application_purpose=state.get('application_purpose', ''),
+        grant_date=parse_grant_date(state['grant_date']),
+        lower_freq_mhz=_decimal_or_none(state.get('lower_freq_mhz')),
+        upper_freq_mhz=_decimal_or_none(state.get('upper_freq_mhz')),
+    )
+
+
+def store_grants(states, batch_size=1000):
+    """
+    Store the grant rows as FccGrant, skipping rows already stored (by
+    row_hash). Does not touch the ingest state, so radio imports still see
+    these rows as new.
+    """
+    FccGrant.objects.bulk_create(
+        [grant_from_state(s) for s in states],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return len(states)
+
+
+def record_rows(states, batch_size=1000):
+    """
+    Store the grant rows and their hashes and advance the per-grantee
+    watermarks after the delta was written.
+    """
+    if not states:
+        return 0
+    latest = {}
+    added = set()
+    for state in states:
+        code = state['grantee_code']
+        added.add(code)
+        grant_date = parse_grant_date(state['grant_date'])
+        if grant_date and (code not in latest or grant_date > latest[code]):
+            latest[code] = grant_date
+
+    with transaction.atomic():
+        FccRowHash.objects.bulk_create(
+            [FccRowHash(
+                row_hash=s['row_hash'], grantee_code=s['grantee_code'],
+                fcc_id=s['fcc_id'], grant_date=parse_grant_date(s['grant_date']),
+            ) for s in states],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        store_grants(states, batch_size)
+        row_counts = dict(
+            FccRowHash.objects.filter(grantee_code__in=list(added))
+            .values('grantee_code').annotate(n=Count('pk')).values_list('grantee_code', 'n')
+        )
+        existing = GranteeWatermark.objects.select_for_update().in_bulk(list(added), field_name='grantee_code')
+        now = timezone.now()
+        created, updated = [], []
+        for code in added:
+            watermark = existing.get(code)
+            if watermark is None:
+                watermark = GranteeWatermark(grantee_code=code)
+                created.append(watermark)
+            else:
+                # bulk_update does not apply auto_now
+                watermark.updated_at = now
+                updated.append(watermark)
+            if latest.get(code) and (watermark.last_grant_date is None or latest[code] > watermark.last_grant_date):
+                watermark.last_grant_date = latest[code]
+            watermark.rows = row_counts.get(code, 0)
+        GranteeWatermark.objects.bulk_create(created, ignore_conflicts=True)
+        GranteeWatermark.objects.bulk_update(updated, ['last_grant_date', 'rows', 'updated_at'])
+    return len(states)
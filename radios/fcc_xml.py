@@ -0,0 +1,304 @@
+"""
+Incremental parsing of FCC authorization search exports.
+
+    parser = FccXmlParser()
+    for chunk in uploaded_file.chunks():
+        parser.feed(chunk)
+    records = parser.close()        # normalize_row() of every <Row>
+
+Bytes are decoded with the encoding named in the XML declaration (the FCC
+declares ISO-8859-1). Without a declaration they are read as UTF-8, and from
+the first byte that is not valid UTF-8 on as ISO-8859-1. Unescaped '&' in
+company names is escaped as the text arrives. Each <Row> is normalized and
+dropped from the tree as soon as it ends, so memory holds the records rather
+than the document.
+
+FccXmlUploadHandler runs the parser on the chunks of an upload as they are
+received, so nothing is buffered and the rows are ready when the request body
+has been read. Zip archives cannot be read before they are complete; their
+XML members are parsed afterwards by parse_uploads, in a process pool when
+there are several. The pool runs inside the web request, which starts up to
+`workers` processes (IMPORT_PARSE_WORKERS; 1 parses in the web process), and
+an archive is read up to MAX_ZIP_MEMBERS members; the rest are reported as
+an error.
+"""
+import codecs
+import io
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .fcc_ingest import normalize_row
+
+DECLARATION = re.compile(rb'^\s*<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']')
+BOMS = [(codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+
+# Bytes looked at for the declaration before the first '>' turns up
+HEAD_SIZE = 1024
+# Longest entity reference ('&#x10FFFF;'); a trailing '&' closer to the end of a
+# chunk than this is held back until the next chunk shows whether it is escaped
+ENTITY_SIZE = 10
+READ_SIZE = 64 * 1024
+MAX_ZIP_MEMBERS = 500
+
+
+def sanitize_xml_content(content):
+    """
+    Sanitize XML content to fix common issues like unescaped ampersands.
+    FCC XML files often have '&' instead of '&amp;' in company names.
+    """
+    # Replace unescaped & with &amp; (but not already-escaped entities like &amp; &lt; &gt; &quot; &apos;)
+    # This regex finds & not followed by amp; lt; gt; quot; apos; or #
+    content = re.sub(r'&(?!(amp|lt|gt|quot|apos|#)\b)', '&amp;', content)
+    return content
+
+
+class FccXmlParser:
+    def __init__(self, row_tag='Row'):
+        self.row_tag = row_tag
+        self.records = []
+        self.encoding = None
+        self.bytes = 0
+        self.seconds = 0.0
+        self._head = b''
+        self._decoder = None
+        self._pending = ''
+        self._root = None
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+
+    def feed(self, data):
+        """Parse the next chunk of bytes; raises ET.ParseError on malformed XML."""
+        start = time.perf_counter()
+        self.bytes += len(data)
+        if self._decoder is None:
+            self._head += data
+            if b'>' not in self._head and len(self._head) < HEAD_SIZE:
+                return
+            data, self._head = self._head, b''
+            self._detect_encoding(data)
+        self._parse(self._decode(data))
+        self.seconds += time.perf_counter() - start
+
+    def close(self):
+        """Finish the document and return the records."""
+        start = time.perf_counter()
+        data = b''
+        if self._decoder is None:
+            data, self._head = self._head, b''
+            self._detect_encoding(data)
+        self._parse(self._decode(data, final=True), final=True)
+        self._parser.close()
+        self._collect()
+        self.seconds += time.perf_counter() - start
+        return self.records
+
+    def _detect_encoding(self, head):
+        encoding = None
+        for bom, name in BOMS:
+            if head.startswith(bom):
+                encoding = name
+                break
+        match = DECLARATION.match(head)
+        if encoding is None and match:
+            try:
+                encoding = codecs.lookup(match.group(1).decode('ascii')).name
+            except LookupError:
+                encoding = None
+        if encoding:
+            self.encoding = encoding
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        else:
+            # Strict, so the first byte that is not UTF-8 switches to ISO-8859-1 in _decode
+            self.encoding = 'utf-8'
+            self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _decode(self, data, final=False):
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            self.encoding = 'iso8859-1'
+            self._decoder = codecs.getincrementaldecoder('iso8859-1')()
+            return e.object[:e.start].decode('utf-8') + e.object[e.start:].decode('iso8859-1')
+
+    def _parse(self, text, final=False):
+        text = self._pending + text
+        self._pending = ''
+        if not final:
+            amp = text.rfind('&', max(0, len(text) - ENTITY_SIZE))
+            if amp != -1 and ';' not in text[amp:]:
+                text, self._pending = text[:amp], text[amp:]
+        if text:
+            self._parser.feed(sanitize_xml_content(text))
+            self._collect()
+
+    def _collect(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+            elif element.tag == self.row_tag:
+                self.records.append(normalize_row(element))
+                # The row is finished with; drop it (and any before it) from the tree
+                self._root.clear()
+
+
+class ParsedFile:
+    """Picklable outcome of parsing one export: its records, or the parse error."""
+
+    def __init__(self, name, records=(), encoding=None, size=0, seconds=0.0, error=''):
+        self.name = name
+        self.records = list(records)
+        self.encoding = encoding
+        self.size = size
+        self.seconds = seconds
+        self.error = error
+
+    @classmethod
+    def from_parser(cls, name, parser, error=None):
+        if error is not None:
+            return cls(name, size=parser.bytes, seconds=parser.seconds, error=str(error))
+        return cls(name, parser.records, parser.encoding, parser.bytes, parser.seconds)
+
+
+def parse_chunks(name, chunks):
+    parser = FccXmlParser()
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    except ET.ParseError as e:
+        return ParsedFile.from_parser(name, parser, e)
+    return ParsedFile.from_parser(name, parser)
+
+
+def parse_file(path, read_size=READ_SIZE):
+    """ParsedFile of an FCC XML file on disk, read in chunks."""
+    def chunks():
+        with open(path, 'rb') as f:
+            while chunk := f.read(read_size):
+                yield chunk
+    return parse_chunks(str(path), chunks())
+
+
+def parse_zip_member(archive, member, read_size=READ_SIZE):
+    """ParsedFile of one member of a zip archive (a path, or the archive's bytes)."""
+    def chunks():
+        source = archive if isinstance(archive, str) else io.BytesIO(archive)
+        with zipfile.ZipFile(source) as zf, zf.open(member) as f:
+            while chunk := f.read(read_size):
+                yield chunk
+    return parse_chunks(member, chunks())
+
+
+def _init_worker():
+    # Spawned workers (macOS, Windows) start without Django; normalize_row needs the app registry
+    import django
+    django.setup()
+
+
+def parse_uploads(files, workers=None):
+    """
+    One ParsedFile per export in `files`, in upload order. XML uploads were
+    parsed by FccXmlParser while they arrived; the .xml members of zip
+    archives are parsed here, in up to `workers` processes.
+    """
+    results = []
+    tasks = []
+    for uploaded in files:
+        if isinstance(uploaded, StreamedXmlFile):
+            results.append(ParsedFile.from_parser(uploaded.name, uploaded.parser, uploaded.error))
+        elif zipfile.is_zipfile(uploaded):
+            uploaded.seek(0)
+            # Large uploads are on disk already; workers open the archive themselves
+            archive = uploaded.temporary_file_path() if hasattr(uploaded, 'temporary_file_path') else uploaded.read()
+            with zipfile.ZipFile(archive if isinstance(archive, str) else io.BytesIO(archive)) as zf:
+                members = [
+                    info.filename for info in zf.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith('.xml')
+                ]
+            if not members:
+                results.append(ParsedFile(uploaded.name, error='no .xml files in the archive'))
+            elif len(members) > MAX_ZIP_MEMBERS:
+                results.append(ParsedFile(uploaded.name, error=(
+                    f'{len(members) - MAX_ZIP_MEMBERS} of its {len(members)} .xml files were not read; '
+                    f'upload at most {MAX_ZIP_MEMBERS} per archive'
+                )))
+                members = members[:MAX_ZIP_MEMBERS]
+            for member in members:
+                tasks.append((len(results), archive, member))
+                results.append(None)
+        else:
+            uploaded.seek(0)
+            results.append(parse_chunks(uploaded.name, uploaded.chunks()))
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            futures = [(i, pool.submit(parse_zip_member, archive, member)) for i, archive, member in tasks]
+            for i, future in futures:
+                results[i] = future.result()
+    else:
+        for i, archive, member in tasks:
+            results[i] = parse_zip_member(archive, member)
+    return results
+
+
+class StreamedXmlFile(UploadedFile):
+    """
+    What FccXmlUploadHandler leaves in request.FILES: the parser (with its
+    records, or the parse error) in place of the file's bytes.
+    """
+
+    def __init__(self, name, content_type, size, charset, parser, error=None):
+        super().__init__(io.BytesIO(), name, content_type, size, charset)
+        self.parser = parser
+        self.error = error
+
+
+class FccXmlUploadHandler(FileUploadHandler):
+    """
+    Feeds each `field_name` upload to an FccXmlParser chunk by chunk and keeps
+    none of its bytes. Zip archives and other fields go on to the next
+    handlers. It has to be installed before request.POST is read:
+
+        request.upload_handlers.insert(0, FccXmlUploadHandler(request))
+    """
+
+    def __init__(self, request=None, field_name='xml_file'):
+        super().__init__(request)
+        self.field_name = field_name
+        self.parser = None
+        self.error = None
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        streamed = field_name == self.field_name and not file_name.lower().endswith('.zip') and 'zip' not in content_type
+        self.parser = FccXmlParser() if streamed else None
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.parser is None:
+            return raw_data
+        if self.error is None:
+            try:
+                self.parser.feed(raw_data)
+            except ET.ParseError as e:
+                self.error = e
+        return None
+
+    def file_complete(self, file_size):
+        if self.parser is None:
+            return None
+        if self.error is None:
+            try:
+                self.parser.close()
+            except ET.ParseError as e:
+                self.error = e
+        parser, self.parser = self.parser, None
+        return StreamedXmlFile(self.file_name, self.content_type, file_size, self.charset, parser, self.error)
@@ -101,7 +101,9 @@ class RadioSearchForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={
             'class': 'block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm',
-            'placeholder': 'Search by brand, model, or FCC ID...'
+            'placeholder': 'Search by brand, model, or FCC ID...',
+            'list': 'radio-suggestions',
+            'autocomplete': 'off',
         })
     )
     
@@ -109,20 +111,45 @@ class RadioSearchForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={
             'class': 'block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm',
-            'placeholder': 'Filter by brand...'
+            'placeholder': 'Filter by brand...',
+            'list': 'brand-suggestions',
+            'autocomplete': 'off',
         })
     )
 
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """FileField taking several files; cleans to a list."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)) and data:
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)]
+
+
 class ImportGranteeXMLForm(forms.Form):
     """Form for uploading FCC XML files"""
     
-    xml_file = forms.FileField(
-        label="FCC XML File",
-        help_text="Upload FCC XML file for a specific grantee."
+    xml_file = MultipleFileField(
+        label="FCC XML Files",
+        help_text="Upload one or more FCC XML exports, or a zip of them."
     )
     overwrite_records = forms.BooleanField(
         label="Overwrite existing records",
         required=False,
         help_text="If checked, existing records will be updated."
     )
+    full_recheck = forms.BooleanField(
+        label="Re-check all rows",
+        required=False,
+        help_text="If checked, rows already imported from an earlier export are previewed again."
+    )
@@ -1,14 +1,17 @@
 from django import forms
 from .models import Radio
 
+# Fields the user can pick a value for when merging radios
+MERGE_FORM_FIELDS = [
+    'brand', 'model', 'fcc_id', 'intro_year', 'freq_bands_tx', 'power_watts',
+    'satellite_tracking', 'harmonic_suppression', 'gps', 'aprs', 'air_band', 'dmr',
+    'display', 'battery_mah', 'cost_approx', 'rebadges_clones', 'website', 'notes']
+
 class MergeRadiosFieldsForm(forms.Form):
     def __init__(self, radios, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # For each field, let user pick which radio's value to keep
-        for field in [
-            'brand', 'model', 'fcc_id', 'intro_year', 'freq_bands_tx', 'power_watts',
-            'satellite_tracking', 'harmonic_suppression', 'gps', 'aprs', 'air_band', 'dmr',
-            'display', 'battery_mah', 'cost_approx', 'rebadges_clones', 'website', 'notes']:
+        for field in MERGE_FORM_FIELDS:
             choices = [(str(r.pk), getattr(r, field, '')) for r in radios]
             self.fields[field] = forms.ChoiceField(
                 choices=choices,
@@ -0,0 +1,161 @@
+"""
+Shared instrumentation for import jobs.
+
+Usage:
+
+    with track_import('import_radios', source=csv_file) as run:
+        with run.stage('read'):
+            rows = ...
+        run.add_rows(len(rows))
+        run.counts['created'] = created
+
+Every run times its stages, counts rows and bytes, and is saved as an
+ImportRun row when the block exits, even when it raises. With
+IMPORT_TRACE_MEMORY it also records peak Python memory with tracemalloc.
+tracemalloc is process-wide: it runs while any traced run is active, and a
+run that overlapped another one (a concurrent request or job thread) records
+no peak, since the peak it would read covers both.
+"""
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_tracing_lock = threading.Lock()
+_tracing_runs = set()       # traced recorders currently running
+_started_tracing = False    # whether tracemalloc was started by us rather than by the process
+
+
+class ImportRecorder:
+    def __init__(self, kind, source='', trace_memory=True):
+        self.kind = kind
+        self.source = source
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counts = {}
+        self.rows = 0
+        self.error = ''
+        self.bytes = 0
+        self.peak_memory = None
+        self.started_at = timezone.now()
+        self._start = time.perf_counter()
+        self.duration = None
+        self._overlapped = False
+
+    @contextmanager
+    def stage(self, name):
+        """Time a named stage; repeated stages accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def fail(self, message):
+        """Mark the run as failed without raising (e.g. missing input file)."""
+        self.error = message
+
+    def add_rows(self, n):
+        self.rows += n
+
+    def add_bytes(self, n):
+        self.bytes += n
+
+    def start(self):
+        global _started_tracing
+        if not self.trace_memory:
+            return
+        with _tracing_lock:
+            if _tracing_runs:
+                for run in _tracing_runs:
+                    run._overlapped = True
+                self._overlapped = True
+            else:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+                tracemalloc.reset_peak()
+            _tracing_runs.add(self)
+
+    def stop(self):
+        global _started_tracing
+        self.duration = time.perf_counter() - self._start
+        if not self.trace_memory:
+            return
+        with _tracing_lock:
+            if self not in _tracing_runs:
+                return
+            _tracing_runs.discard(self)
+            if not self._overlapped and tracemalloc.is_tracing():
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if not _tracing_runs and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.duration if self.duration else 0.0
+
+    @property
+    def bytes_per_sec(self):
+        return self.bytes / self.duration if self.duration else 0.0
+
+    def summary(self):
+        """One-line human readable summary for command output and messages."""
+        stages = ', '.join(f"{name} {secs:.2f}s" for name, secs in self.stages.items())
+        parts = [f"{self.rows} rows in {self.duration or 0:.2f}s ({self.rows_per_sec:.0f} rows/s)"]
+        if self.bytes:
+            parts.append(f"{self.bytes_per_sec / 1024:.0f} KiB/s")
+        if self.peak_memory is not None:
+            parts.append(f"peak {self.peak_memory / 1024 / 1024:.1f} MiB")
+        if stages:
+            parts.append(stages)
+        return ' • '.join(parts)
+
+    def save(self, status, error=''):
+        from .models import ImportRun
+        return ImportRun.objects.create(
+            kind=self.kind,
+            source=str(self.source)[:500],
+            status=status,
+            error=error,
+            started_at=self.started_at,
+            duration_s=self.duration or 0.0,
+            rows=self.rows,
+            bytes=self.bytes,
+            rows_per_sec=self.rows_per_sec,
+            bytes_per_sec=self.bytes_per_sec,
+            peak_memory_bytes=self.peak_memory,
+            stages={name: round(secs, 6) for name, secs in self.stages.items()},
+            counts=self.counts,
+        )
+
+
+@contextmanager
+def track_import(kind, source='', trace_memory=None):
+    """Context manager yielding an ImportRecorder that is saved as an ImportRun on exit."""
+    from .models import ImportRun
+    if trace_memory is None:
+        trace_memory = getattr(settings, 'IMPORT_TRACE_MEMORY', False)
+    run = ImportRecorder(kind, source, trace_memory=trace_memory)
+    run.start()
+    try:
+        yield run
+    except Exception as e:
+        run.stop()
+        try:
+            run.save(ImportRun.STATUS_ERROR, error=f"{type(e).__name__}: {e}")
+        except Exception:
+            logger.exception("Could not record failed %s import run", kind)
+        raise
+    run.stop()
+    if run.error:
+        run.save(ImportRun.STATUS_ERROR, error=run.error)
+    else:
+        run.save(ImportRun.STATUS_OK)
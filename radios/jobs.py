@@ -0,0 +1,213 @@
+"""
+Lightweight background jobs using the database as the queue.
+
+    job = enqueue('deduplicate_radios', description='Deduplicate radios')
+
+Workers started with `python manage.py run_job_workers` claim queued jobs
+with a conditional UPDATE, so no broker is needed and several workers can
+share the table. A job names the keys it locks (e.g. ['grantee:2AJGM']);
+jobs sharing a key never run at the same time, and 'catalogue' (jobs that
+touch every brand or grantee) excludes every other key. A running job
+holds its keys as JobLock rows, and claims of locked jobs take turns on one
+JobLock row, so each sees the locks taken before it. Handlers report
+progress through the Job row, which the status page polls.
+"""
+import io
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job, JobLock
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+# Lock key of jobs that touch the whole catalogue; it conflicts with every other key
+CATALOGUE_KEY = 'catalogue'
+# JobLock row every claim of a locked job updates first (created by migration 0018)
+CLAIM_KEY = 'claim'
+
+# Maintenance commands that can be queued from the web UI: kind -> label
+MAINTENANCE_COMMANDS = {
+    'deduplicate_radios': 'Deduplicate radios by (brand, model)',
+    'merge_brand_radios': 'Merge one brand into another',
+    'clean_grantee_prefix': 'Strip grantee code prefixes from model names',
+    'sync_radio_brands': 'Create missing brands from radios',
+    'find_merge_candidates': 'Find merge candidates',
+    'build_radio_families': 'Rebuild rebadge/clone families',
+    'refresh_catalogue_stats': 'Refresh catalogue statistics',
+}
+
+
+def job_handler(kind):
+    """Register a function(job, progress, **params) as the handler for `kind`."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, params=None, lock_keys=(), description=''):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(
+        kind=kind, params=params or {}, lock_keys=sorted(set(lock_keys)),
+        description=description[:300] or kind,
+    )
+
+
+def conflicts(keys, held):
+    """Whether a job locking `keys` has to wait while the keys in `held` are locked."""
+    if not keys or not held:
+        return False
+    return CATALOGUE_KEY in keys or CATALOGUE_KEY in held or not held.isdisjoint(keys)
+
+
+def _held_keys():
+    return set(JobLock.objects.filter(job__isnull=False).values_list('key', flat=True))
+
+
+def _take_turn():
+    """Wait for claims running in other workers; the row lock lasts until the transaction ends."""
+    if not JobLock.objects.filter(key=CLAIM_KEY, job__isnull=True).update(key=CLAIM_KEY):
+        JobLock.objects.get_or_create(key=CLAIM_KEY)
+
+
+def claim_next(worker):
+    """Claim the oldest queued job whose lock keys are free; returns the Job or None."""
+    held = _held_keys()
+    queued = Job.objects.filter(status=Job.STATUS_QUEUED).order_by('created_at', 'pk')
+    for job in queued.only('pk', 'lock_keys')[:50]:
+        if conflicts(job.lock_keys, held):
+            continue
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                if job.lock_keys:
+                    _take_turn()
+                    held = _held_keys()
+                    if conflicts(job.lock_keys, held):
+                        continue
+                claimed = Job.objects.filter(pk=job.pk, status=Job.STATUS_QUEUED).update(
+                    status=Job.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+                )
+                if claimed:
+                    JobLock.objects.bulk_create([JobLock(key=key, job_id=job.pk) for key in job.lock_keys])
+        except IntegrityError:
+            # A worker outside the turn took one of the keys first
+            held = _held_keys()
+            continue
+        if claimed:
+            return Job.objects.get(pk=job.pk)
+    return None
+
+
+def _release(job_pks, **fields):
+    """Update the jobs and drop the lock keys they hold, together."""
+    with transaction.atomic():
+        JobLock.objects.filter(job__in=job_pks).delete()
+        return Job.objects.filter(pk__in=job_pks).update(**fields)
+
+
+class ProgressReporter:
+    """Callable(done, total=None, message='') writing progress to the job row, throttled."""
+
+    def __init__(self, job, interval=0.5):
+        self.job = job
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, done, total=None, message=''):
+        now = time.monotonic()
+        if now - self._last < self.interval and (total is None or done < total):
+            return
+        self._last = now
+        fields = {'progress_done': done, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            fields['progress_total'] = total
+        if message:
+            fields['message'] = message[:500]
+        Job.objects.filter(pk=self.job.pk).update(**fields)
+
+
+def _heartbeat(job_pk, stop, interval):
+    from django.db import connection
+    try:
+        while not stop.wait(interval):
+            Job.objects.filter(pk=job_pk, status=Job.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def run_job(job, heartbeat_interval=10):
+    """Run a claimed job and record its outcome."""
+    stop = threading.Event()
+    beat = None
+    if heartbeat_interval:
+        beat = threading.Thread(target=_heartbeat, args=(job.pk, stop, heartbeat_interval), daemon=True)
+        beat.start()
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        result = handler(job, ProgressReporter(job), **job.params)
+        fields = {'status': Job.STATUS_DONE, 'result': result}
+        if isinstance(result, dict) and result.get('message'):
+            fields['message'] = str(result['message'])[:500]
+    except Exception as e:
+        logger.exception("Job %s failed", job)
+        fields = {
+            'status': Job.STATUS_FAILED,
+            'error': traceback.format_exc(),
+            'message': f"{type(e).__name__}: {e}"[:500],
+        }
+    finally:
+        stop.set()
+        if beat:
+            beat.join()
+    fields['finished_at'] = timezone.now()
+    _release([job.pk], **fields)
+
+
+def requeue_stale(stale_after):
+    """Put running jobs back in the queue when their worker stopped sending heartbeats."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = list(Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=cutoff).values_list('pk', flat=True))
+    return _release(stale, status=Job.STATUS_QUEUED, worker='', message='Requeued after worker timeout')
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:100]
+
+
+# --- handlers ----------------------------------------------------------------------------------
+
+@job_handler('import_grantee_radios')
+def import_grantee_radios_job(job, progress, records, overwrite=False, row_states=()):
+    from .views_import import import_grantee_records, grantee_import_summary
+    counts = import_grantee_records(records, overwrite, progress=progress, row_states=row_states)
+    return dict(counts, message=grantee_import_summary(records, counts))
+
+
+def _command_job(command):
+    def handler(job, progress, args=(), options=None):
+        progress(0, message=f"Running {command}...")
+        out = io.StringIO()
+        call_command(command, *args, stdout=out, stderr=out, **(options or {}))
+        output = out.getvalue()
+        lines = [line for line in output.splitlines() if line.strip()]
+        return {'output': output[-20000:], 'message': lines[-1] if lines else f"{command} finished"}
+    return handler
+
+
+for _command in MAINTENANCE_COMMANDS:
+    job_handler(_command)(_command_job(_command))
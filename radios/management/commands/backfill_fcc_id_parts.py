@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from radios.models import Radio
+from radios.caching import catalogue_changes
+
+
+class Command(BaseCommand):
+    help = 'Fill grantee_code, product_code and fcc_id_key on every radio from its FCC ID.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows read and written per batch (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Count the radios that would change without writing')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = ['fcc_id'] + Radio.FCC_ID_PARTS
+        checked = changed = 0
+        last_pk = 0
+        with catalogue_changes():
+            while True:
+                # Keyset pagination keeps every batch an index range scan
+                batch = list(Radio.objects.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                checked += len(batch)
+                to_update = [radio for radio in batch if radio.set_fcc_id_parts()]
+                changed += len(to_update)
+                if to_update and not options['dry_run']:
+                    # updated_at moves so incremental edge replica syncs pick up the new columns
+                    now = timezone.now()
+                    for radio in to_update:
+                        radio.updated_at = now
+                    with transaction.atomic():
+                        Radio.objects.bulk_update(to_update, Radio.FCC_ID_PARTS + ['updated_at'])
+        prefix = '[dry run] Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{prefix} FCC ID parts of {changed} of {checked} radios.'))
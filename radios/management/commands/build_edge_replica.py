@@ -0,0 +1,32 @@
+import os
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from radios.edge import edge_connection, create_edge_schema, sync_replica, EDGE_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Build or incrementally update a read-only SQLite replica of the catalogue for offline deployments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='edge_replica.sqlite3', help='Replica file (default: edge_replica.sqlite3)')
+        parser.add_argument('--full', action='store_true', help='Copy every row instead of only those updated since the last sync')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per iterator() chunk and insert batch (default: 2000)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        start = time.perf_counter()
+        new_file = not os.path.exists(path)
+        connection = edge_connection(path)
+        # migrate is a no-op on an up-to-date replica and adds new tables after upgrades
+        call_command('migrate', database=EDGE_ALIAS, interactive=False, verbosity=0)
+        create_edge_schema(connection)
+        counts = sync_replica(connection, full=options['full'] or new_file, batch_size=options['batch_size'])
+        connection.close()
+
+        kind = 'Full build' if counts['full'] else 'Delta'
+        self.stdout.write(self.style.SUCCESS(
+            f"{kind} of {path}: {counts['radios_copied']} radios and {counts['brands_copied']} brands copied, "
+            f"{counts['radios_deleted']} radios and {counts['brands_deleted']} brands removed "
+            f"in {time.perf_counter() - start:.2f}s."
+        ))
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from radios.models import Radio, RadioRelation
+from radios.families import parse_relations, family_ids
+from radios.caching import catalogue_changes
+
+
+class Command(BaseCommand):
+    help = "Rebuild the rebadge/clone graph from rebadges_clones text and shared FCC IDs, and store each radio's family_id."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk writes (default: 1000)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = Radio.objects.values_list('pk', 'brand', 'model', 'fcc_id_key', 'rebadges_clones').iterator(chunk_size=5000)
+        edges, unresolved = parse_relations(rows)
+        families = family_ids(edges)
+        current = dict(Radio.objects.filter(family_id__isnull=False).values_list('pk', 'family_id'))
+        changed = {pk for pk in set(current) | set(families) if current.get(pk) != families.get(pk)}
+        computed = time.perf_counter()
+
+        batch_size = options['batch_size']
+        now = timezone.now()
+        with catalogue_changes(), transaction.atomic():
+            RadioRelation.objects.all().delete()
+            RadioRelation.objects.bulk_create(
+                [RadioRelation(source_id=s, target_id=t, kind=kind, note=note) for (s, t, kind), note in edges.items()],
+                batch_size=batch_size,
+            )
+            # updated_at moves so detail pages and edge replicas see the new family
+            to_update = [Radio(pk=pk, family_id=families.get(pk), updated_at=now) for pk in sorted(changed)]
+            Radio.objects.bulk_update(to_update, ['family_id', 'updated_at'], batch_size=batch_size)
+        written = time.perf_counter()
+
+        self.stdout.write(
+            f"Timing: parse {computed - start:.3f}s, write {written - computed:.3f}s, total {written - start:.3f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(edges)} relations in {len(set(families.values()))} families "
+            f"({len(changed)} radios changed family, {unresolved} references not in the catalogue)."
+        ))
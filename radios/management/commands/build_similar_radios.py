@@ -0,0 +1,32 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from radios.similarity import METRICS, L2, SpecIndex
+
+
+class Command(BaseCommand):
+    help = "Encode every radio's specs and write the similarity matrix (and optionally each radio's neighbours) for the web processes to load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Output file (default: SIMILAR_RADIOS_PATH)')
+        parser.add_argument('--neighbours', type=int, default=0, help='Store the top N similar radios of every radio (default: 0, computed per lookup)')
+        parser.add_argument('--metric', choices=METRICS, default=L2, help='Metric of the stored neighbours (default: l2)')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.SIMILAR_RADIOS_PATH
+        if not path:
+            raise CommandError('Give an output path or set SIMILAR_RADIOS_PATH.')
+        start = time.perf_counter()
+        index = SpecIndex()
+        index.build()
+        built = time.perf_counter()
+        index.save(path, neighbours=options['neighbours'], metric=options['metric'])
+        written = time.perf_counter()
+
+        self.stdout.write(
+            f"Timing: encode {built - start:.3f}s, write {written - built:.3f}s, total {written - start:.3f}s"
+        )
+        neighbours = f" with {options['neighbours']} {options['metric']} neighbours each" if options['neighbours'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote spec vectors of {index.size} radios ({int(index.valid.sum())} with specs){neighbours} to {path}."
+        ))
@@ -1,41 +1,132 @@
-from django.core.management.base import BaseCommand
-from radios.models import Radio
+import time
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Length, Substr, Trim
+from django.utils import timezone
+from radios.models import Radio, Brand
+from radios.merging import MERGE_FIELDS, merge_radio_fields
+from radios.caching import catalogue_changes
+
+
+def strip_grantee_prefix(model, grantee_code):
+    """Python twin of the SQL rename expression: drop the code, leading dashes and spaces."""
+    return model[len(grantee_code):].lstrip('-').strip(' ')
+
+
+def rename_passes(renames):
+    """
+    Order renames given as {pk: (current key, new key)} into passes of pks.
+    A new key can be another renamed radio's current key (ABCABCX -> ABCX
+    while ABCX -> X), and (brand, model) uniqueness is checked row by row,
+    so that radio has to move in an earlier pass. Stripping shortens every
+    name, so there are no cycles.
+    """
+    pending = dict(renames)
+    passes = []
+    while pending:
+        in_use = {current for current, _ in pending.values()}
+        ready = sorted(pk for pk, (_, new) in pending.items() if new not in in_use)
+        passes.append(ready)
+        for pk in ready:
+            del pending[pk]
+    return passes
+
 
 class Command(BaseCommand):
-    help = "Remove grantee code prefix from radio model names for a given brand and grantee code, merging duplicates."
+    help = ("Remove grantee code prefixes from radio model names, merging duplicates. "
+            "With no arguments every brand in the Brand table is cleaned using its grantee code.")
 
     def add_arguments(self, parser):
-        parser.add_argument('brand', type=str, help='Brand name (e.g., PO FUNG ELECTRONIC (HK) INTERNATONAL GROUP COMPANY LIMITED)')
-        parser.add_argument('grantee_code', type=str, help='Grantee code prefix to remove (e.g., 2AJGM)')
+        parser.add_argument('brand', type=str, nargs='?', help='Brand name (e.g., PO FUNG ELECTRONIC (HK) INTERNATONAL GROUP COMPANY LIMITED)')
+        parser.add_argument('grantee_code', type=str, nargs='?', help='Grantee code prefix to remove (e.g., 2AJGM)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing to the database')
+        parser.add_argument('--batch-size', type=int, default=500, help='Batch size for bulk updates (default: 500)')
 
     def handle(self, *args, **options):
         brand = options['brand']
         grantee_code = options['grantee_code']
-        radios = Radio.objects.filter(brand=brand, model__startswith=grantee_code)
-        count = 0
-        merged = 0
-        for radio in radios:
-            new_model = radio.model[len(grantee_code):].lstrip('-').strip()
-            if new_model != radio.model:
-                # Check for duplicate
-                try:
-                    existing = Radio.objects.get(brand=brand, model=new_model)
-                    # Merge: keep the most complete, merge notes
-                    fields = [
-                        'fcc_id','intro_year','freq_bands_tx','power_watts','satellite_tracking','harmonic_suppression','gps','aprs','air_band','dmr','display','battery_mah','cost_approx','rebadges_clones','website','notes'
-                    ]
-                    for f in fields:
-                        val = getattr(existing, f)
-                        if not val:
-                            setattr(existing, f, getattr(radio, f))
-                    # Merge notes
-                    if radio.notes and radio.notes not in (existing.notes or ''):
-                        existing.notes = (existing.notes or '') + '\n' + radio.notes
-                    existing.save()
-                    radio.delete()
-                    merged += 1
-                except Radio.DoesNotExist:
-                    radio.model = new_model
-                    radio.save()
-                    count += 1
-        self.stdout.write(self.style.SUCCESS(f"Cleaned grantee code prefix from {count} radios and merged {merged} duplicates for brand '{brand}'."))
+        if bool(brand) != bool(grantee_code):
+            raise CommandError('Give both a brand and a grantee code, or neither to clean every brand.')
+
+        start = time.perf_counter()
+        # One query for every radio whose model starts with its brand's grantee code
+        if brand:
+            code_expr = Value(grantee_code)
+            candidates = Radio.objects.filter(brand=brand, model__startswith=grantee_code).annotate(prefix=code_expr)
+        else:
+            code_expr = Subquery(
+                Brand.objects.filter(name=OuterRef('brand')).values('grantee_code')[:1]
+            )
+            candidates = Radio.objects.annotate(prefix=code_expr).filter(
+                prefix__isnull=False, model__startswith=F('prefix')
+            ).exclude(prefix='')
+        candidates = list(candidates)
+
+        # Compute stripped model names in bulk and group rows that end up on the same key
+        groups = defaultdict(list)
+        for radio in candidates:
+            new_model = strip_grantee_prefix(radio.model, radio.prefix)
+            if new_model and new_model != radio.model:
+                groups[(radio.brand, new_model)].append(radio)
+        candidate_pks = {r.pk for rows in groups.values() for r in rows}
+
+        # One query to find existing radios already using a stripped name
+        existing = {}
+        if groups:
+            brands = {b for b, _ in groups}
+            models = {m for _, m in groups}
+            for r in Radio.objects.filter(brand__in=brands, model__in=models).exclude(pk__in=candidate_pks):
+                existing[(r.brand, r.model)] = r
+        loaded = time.perf_counter()
+
+        to_update = {}
+        to_delete = []
+        to_rename = {}
+        for key, rows in groups.items():
+            rows.sort(key=lambda r: r.pk)
+            keep = existing.get(key)
+            if keep is None:
+                # No collision with an untouched row: the oldest candidate is renamed in place
+                keep = rows.pop(0)
+                to_rename[keep.pk] = ((keep.brand, keep.model), key)
+            for radio in rows:
+                if merge_radio_fields(keep, radio):
+                    to_update[keep.pk] = keep
+                to_delete.append(radio.pk)
+        computed = time.perf_counter()
+
+        scope = f"brand '{brand}'" if brand else 'all brands'
+        if options['dry_run']:
+            self.stdout.write(
+                f"[dry run] Would clean grantee code prefix from {len(to_rename)} radios and merge "
+                f"{len(to_delete)} duplicates for {scope}."
+            )
+        else:
+            now = timezone.now()
+            for r in to_update.values():
+                r.updated_at = now
+            with catalogue_changes(), transaction.atomic():
+                Radio.objects.bulk_update(
+                    to_update.values(), MERGE_FIELDS + Radio.FCC_ID_PARTS + ['updated_at'], batch_size=options['batch_size']
+                )
+                Radio.objects.filter(pk__in=to_delete).delete()
+                # UPDATE ... SET model = TRIM(LTRIM(SUBSTR(model, LENGTH(code) + 1), '-')), one per pass
+                for pks in rename_passes(to_rename):
+                    Radio.objects.filter(pk__in=pks).update(
+                        model=Trim(Func(
+                            Substr('model', Length(code_expr) + 1), Value('-'), function='LTRIM'
+                        )),
+                        updated_at=now,
+                    )
+        written = time.perf_counter()
+
+        self.stdout.write(
+            f"Timing: load {loaded - start:.3f}s, compute {computed - loaded:.3f}s, "
+            f"write {written - computed:.3f}s, total {written - start:.3f}s"
+        )
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Cleaned grantee code prefix from {len(to_rename)} radios and merged {len(to_delete)} duplicates for {scope}."
+            ))
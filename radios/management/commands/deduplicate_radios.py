@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from radios.models import Radio
+from radios.caching import catalogue_changes
 from collections import defaultdict
 
 class Command(BaseCommand):
@@ -10,20 +11,21 @@ class Command(BaseCommand):
         for radio in Radio.objects.all():
             grouped[(radio.brand, radio.model)].append(radio)
         deduped = 0
-        for (brand, model), radios in grouped.items():
-            if len(radios) > 1:
-                # Keep the one with the most non-empty fields
-                def score(r):
-                    return sum(bool(getattr(r, f)) for f in [
-                        'fcc_id','intro_year','freq_bands_tx','power_watts','satellite_tracking','harmonic_suppression','gps','aprs','air_band','dmr','display','battery_mah','cost_approx','rebadges_clones','website','notes'])
-                radios = sorted(radios, key=score, reverse=True)
-                keep = radios[0]
-                # Merge notes from all
-                merged_notes = '\n'.join(r.notes for r in radios if r.notes)
-                keep.notes = merged_notes
-                keep.save()
-                # Delete the rest
-                for r in radios[1:]:
-                    r.delete()
-                deduped += len(radios) - 1
+        with catalogue_changes():
+            for (brand, model), radios in grouped.items():
+                if len(radios) > 1:
+                    # Keep the one with the most non-empty fields
+                    def score(r):
+                        return sum(bool(getattr(r, f)) for f in [
+                            'fcc_id','intro_year','freq_bands_tx','power_watts','satellite_tracking','harmonic_suppression','gps','aprs','air_band','dmr','display','battery_mah','cost_approx','rebadges_clones','website','notes'])
+                    radios = sorted(radios, key=score, reverse=True)
+                    keep = radios[0]
+                    # Merge notes from all
+                    merged_notes = '\n'.join(r.notes for r in radios if r.notes)
+                    keep.notes = merged_notes
+                    keep.save()
+                    # Delete the rest
+                    for r in radios[1:]:
+                        r.delete()
+                    deduped += len(radios) - 1
         self.stdout.write(self.style.SUCCESS(f"Deduplicated {deduped} radios by (brand, model)."))
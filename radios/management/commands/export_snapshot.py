@@ -0,0 +1,22 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from radios.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the Radio and Brand tables to a compact binary snapshot for read-only kiosks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file to write (e.g. catalogue.snap)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        start = time.perf_counter()
+        # Write next to the target and rename, so readers never map a half-written file
+        tmp_path = f'{path}.tmp'
+        count = write_snapshot(tmp_path)
+        os.replace(tmp_path, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {count} radios to {path} ({os.path.getsize(path) / 1024:.0f} KiB in {time.perf_counter() - start:.2f}s).'
+        ))
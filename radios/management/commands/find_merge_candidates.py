@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from radios.models import Radio, Brand, MergeCandidate
+from radios.clustering import DEFAULT_THRESHOLD, find_candidate_groups
+
+class Command(BaseCommand):
+    help = "Propose groups of duplicate radios (blocked on brand/model and FCC grantee code) for review in the merge view."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_THRESHOLD,
+            help=f'Minimum trigram Jaccard similarity for a pair (default: {DEFAULT_THRESHOLD})',
+        )
+        parser.add_argument('--prefix-length', type=int, default=2, help='Normalized model prefix length used for blocking (default: 2)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk inserts (default: 1000)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        brand_codes = dict(
+            Brand.objects.exclude(grantee_code__isnull=True).values_list('name', 'grantee_code')
+        )
+        rows = Radio.objects.values_list('pk', 'brand', 'model', 'fcc_id').iterator(chunk_size=5000)
+        groups = find_candidate_groups(
+            rows, brand_codes, threshold=options['threshold'], prefix_len=options['prefix_length']
+        )
+        clustered = time.perf_counter()
+
+        # Groups the user already dismissed are not proposed again
+        dismissed = {
+            tuple(ids) for ids in MergeCandidate.objects.filter(
+                status=MergeCandidate.STATUS_DISMISSED
+            ).values_list('radio_ids', flat=True)
+        }
+        candidates = [
+            MergeCandidate(radio_ids=pks, size=len(pks), score=round(score, 4), block_key=key[:300])
+            for score, pks, key in groups
+            if tuple(pks) not in dismissed
+        ]
+        with transaction.atomic():
+            MergeCandidate.objects.filter(status=MergeCandidate.STATUS_OPEN).delete()
+            MergeCandidate.objects.bulk_create(candidates, batch_size=options['batch_size'])
+        written = time.perf_counter()
+
+        self.stdout.write(
+            f"Timing: cluster {clustered - start:.3f}s, write {written - clustered:.3f}s, total {written - start:.3f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {len(candidates)} merge candidate groups covering {sum(c.size for c in candidates)} radios."
+        ))
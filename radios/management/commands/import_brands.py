@@ -1,6 +1,10 @@
 import csv
+import os
 from django.core.management.base import BaseCommand
 from radios.models import Brand
+from radios.caching import catalogue_changes
+from radios.brand_sync import sync_brands
+from radios.import_telemetry import track_import
 
 
 class Command(BaseCommand):
@@ -17,71 +21,80 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing brands before importing'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Batch size for bulk writes (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
         
-        if options['clear']:
-            self.stdout.write('Clearing existing brands...')
-            Brand.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Cleared existing brands'))
-        
-        self.stdout.write(f'Importing brands from {csv_file}...')
-        
-        created_count = 0
-        updated_count = 0
-        error_count = 0
-        
+        with catalogue_changes():
+            if options['clear']:
+                self.stdout.write('Clearing existing brands...')
+                Brand.objects.all().delete()
+                self.stdout.write(self.style.SUCCESS('Cleared existing brands'))
+            
+            self.stdout.write(f'Importing brands from {csv_file}...')
+            
+            with track_import('import_brands', source=csv_file) as run:
+                self.import_file(csv_file, run, options['batch_size'])
+        self.stdout.write(f'Telemetry: {run.summary()}')
+
+    def import_file(self, csv_file, run, batch_size):
+        records = []
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
+            with open(csv_file, 'r', encoding='utf-8') as f, run.stage('read'):
+                run.add_bytes(os.fstat(f.fileno()).st_size)
                 reader = csv.DictReader(f)
                 
                 for row in reader:
-                    try:
-                        name = row.get('Name', '').strip()
-                        grantee_code = row.get('Grantee_Code', '').strip()
-                        
-                        if not name or not grantee_code:
-                            continue
-                        
-                        # Get or create brand
-                        brand, created = Brand.objects.update_or_create(
-                            grantee_code=grantee_code,
-                            defaults={
-                                'name': name,
-                                'full_name': row.get('Full_Name', '').strip(),
-                                'website': row.get('Website', '').strip(),
-                                'country': row.get('Country', '').strip(),
-                                'notes': row.get('Notes', '').strip(),
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                            self.stdout.write(f'Created: {brand}')
-                        else:
-                            updated_count += 1
-                            self.stdout.write(f'Updated: {brand}')
+                    run.add_rows(1)
+                    name = (row.get('Name') or '').strip()
+                    grantee_code = (row.get('Grantee_Code') or '').strip()
                     
-                    except Exception as e:
-                        error_count += 1
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'Error importing {row.get("Name")} ({row.get("Grantee_Code")}): {str(e)}'
-                            )
-                        )
+                    if not name or not grantee_code:
+                        continue
+                    
+                    records.append({
+                        'grantee_code': grantee_code,
+                        'name': name,
+                        'full_name': row.get('Full_Name') or '',
+                        'website': row.get('Website') or '',
+                        'country': row.get('Country') or '',
+                        'notes': row.get('Notes') or '',
+                    })
         
         except FileNotFoundError:
+            run.fail(f'File not found: {csv_file}')
             self.stdout.write(self.style.ERROR(f'File not found: {csv_file}'))
             return
         except Exception as e:
+            run.fail(f'Error reading file: {str(e)}')
             self.stdout.write(self.style.ERROR(f'Error reading file: {str(e)}'))
             return
         
+        self.stdout.write(f'Read {len(records)} brands, writing in batches of {batch_size}...')
+        with run.stage('db_write'):
+            result = sync_brands(
+                records,
+                key='grantee_code',
+                update_fields=['name', 'full_name', 'website', 'country', 'notes'],
+                batch_size=batch_size,
+                progress=lambda done, total: self.stdout.write(f'Wrote {done}/{total} brands...'),
+            )
+        run.counts.update(result)
+        created_count = result['created']
+        updated_count = result['updated']
+        error_count = result['conflicts']
+        
         self.stdout.write(self.style.SUCCESS('\n' + '='*60))
         self.stdout.write(self.style.SUCCESS('Import complete!'))
         self.stdout.write(self.style.SUCCESS(f'  Created: {created_count}'))
         self.stdout.write(self.style.SUCCESS(f'  Updated: {updated_count}'))
+        self.stdout.write(self.style.SUCCESS(f"  Unchanged: {result['unchanged']}"))
         if error_count > 0:
-            self.stdout.write(self.style.WARNING(f'  Errors: {error_count}'))
+            self.stdout.write(self.style.WARNING(f'  Skipped (name used by another brand): {error_count}'))
         self.stdout.write(self.style.SUCCESS('='*60))
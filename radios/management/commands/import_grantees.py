@@ -1,28 +1,46 @@
 import os
 import xml.etree.ElementTree as ET
 from django.core.management.base import BaseCommand
-from radios.models import Brand
+from radios.brand_sync import sync_brands
+from radios.import_telemetry import track_import
 
 RESULTS_XML = os.path.join('data', 'results.xml')
 
 class Command(BaseCommand):
     help = 'Import FCC grantee codes and names from results.xml into Brand table.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk inserts (default: 1000)')
+
     def handle(self, *args, **options):
-        tree = ET.parse(RESULTS_XML)
-        root = tree.getroot()
-        count = 0
-        for row in root.findall('Row'):
-            grantee_code = row.findtext('grantee_code', '').strip()
-            grantee_name = row.findtext('grantee_name', '').strip()
-            if not grantee_code or not grantee_name:
-                continue
-            brand, created = Brand.objects.get_or_create(
-                grantee_code=grantee_code,
-                defaults={'name': grantee_name}
-            )
-            if not created and not brand.name:
-                brand.name = grantee_name
-                brand.save()
-            count += int(created)
-        self.stdout.write(self.style.SUCCESS(f'Imported {count} new grantee codes into Brand table.'))
+        with track_import('import_grantees', source=RESULTS_XML) as run:
+            with run.stage('parse'):
+                run.add_bytes(os.path.getsize(RESULTS_XML))
+                tree = ET.parse(RESULTS_XML)
+                root = tree.getroot()
+                records = []
+                for row in root.findall('Row'):
+                    run.add_rows(1)
+                    grantee_code = row.findtext('grantee_code', '').strip()
+                    grantee_name = row.findtext('grantee_name', '').strip()
+                    if not grantee_code or not grantee_name:
+                        continue
+                    records.append({'grantee_code': grantee_code, 'name': grantee_name})
+            self.stdout.write(f'Read {len(records)} grantee rows from {RESULTS_XML}.')
+            # Existing brands keep their name unless it is blank
+            with run.stage('db_write'):
+                result = sync_brands(
+                    records,
+                    key='grantee_code',
+                    update_fields=['name'],
+                    fill_blank_only=True,
+                    batch_size=options['batch_size'],
+                    progress=lambda done, total: self.stdout.write(f'Wrote {done}/{total} brands...'),
+                )
+            run.counts.update(result)
+        self.stdout.write(f'Telemetry: {run.summary()}')
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} new grantee codes into Brand table."))
+        if result['conflicts']:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {result['conflicts']} grantee codes whose name is already used by another brand."
+            ))
@@ -1,6 +1,9 @@
 import csv
+import os
 from django.core.management.base import BaseCommand
 from radios.models import Radio
+from radios.caching import catalogue_changes
+from radios.import_telemetry import track_import
 
 
 class Command(BaseCommand):
@@ -21,22 +24,30 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         csv_file = options['csv_file']
         
-        if options['clear']:
-            self.stdout.write('Clearing existing radios...')
-            Radio.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Cleared existing radios'))
-        
-        self.stdout.write(f'Importing from {csv_file}...')
-        
+        with catalogue_changes():
+            if options['clear']:
+                self.stdout.write('Clearing existing radios...')
+                Radio.objects.all().delete()
+                self.stdout.write(self.style.SUCCESS('Cleared existing radios'))
+            
+            self.stdout.write(f'Importing from {csv_file}...')
+            
+            with track_import('import_radios', source=csv_file) as run:
+                self.import_file(csv_file, run)
+        self.stdout.write(f'Telemetry: {run.summary()}')
+
+    def import_file(self, csv_file, run):
         created_count = 0
         updated_count = 0
         error_count = 0
         
         try:
             with open(csv_file, 'r', encoding='utf-8') as f:
+                run.add_bytes(os.fstat(f.fileno()).st_size)
                 reader = csv.DictReader(f)
                 
                 for row in reader:
+                    run.add_rows(1)
                     try:
                         # Skip rows with empty brand or model
                         brand = row.get('Brand', '').strip()
@@ -62,34 +73,29 @@ class Command(BaseCommand):
                                 battery_mah = int(match.group())
                         
                         # Get or create radio
-                        radio, created = Radio.objects.update_or_create(
-                            brand=brand,
-                            model=model,
-                            defaults={
-                                'fcc_id': row.get('FCC_ID', '').strip(),
-                                'intro_year': intro_year,
-                                'freq_bands_tx': row.get('Freq. Bands (TX)', '').strip(),
-                                'power_watts': row.get('Power (W)', '').strip(),
-                                'frequency_range': row.get('Frequency Range', '').strip(),
-                                'power_output': row.get('Power Output', '').strip(),
-                                'modulation': row.get('Modulation', '').strip(),
-                                'bands': row.get('Bands', '').strip(),
-                                'digital_modes': row.get('Digital Modes', '').strip(),
-                                'channels': row.get('Channels', '').strip(),
-                                'satellite_tracking': row.get('Satellite Tracking', '').strip(),
-                                'harmonic_suppression': row.get('Harmonic Suppression Status', '').strip(),
-                                'gps': row.get('GPS', '').strip(),
-                                'aprs': row.get('APRS', '').strip(),
-                                'air_band': row.get('Air Band', '').strip(),
-                                'dmr': row.get('DMR', '').strip(),
-                                'display': row.get('Display', '').strip(),
-                                'battery_mah': battery_mah,
-                                'cost_approx': row.get('Cost (Approx)', '').strip(),
-                                'rebadges_clones': row.get('Known Rebadges / Clones', '').strip(),
-                                'website': row.get('Website', '').strip(),
-                                'notes': '',
-                            }
-                        )
+                        with run.stage('db_write'):
+                            radio, created = Radio.objects.update_or_create(
+                                brand=brand,
+                                model=model,
+                                defaults={
+                                    'fcc_id': row.get('FCC_ID', '').strip(),
+                                    'intro_year': intro_year,
+                                    'freq_bands_tx': row.get('Freq. Bands (TX)', '').strip(),
+                                    'power_watts': row.get('Power (W)', '').strip(),
+                                    'satellite_tracking': row.get('Satellite Tracking', '').strip(),
+                                    'harmonic_suppression': row.get('Harmonic Suppression Status', '').strip(),
+                                    'gps': row.get('GPS', '').strip(),
+                                    'aprs': row.get('APRS', '').strip(),
+                                    'air_band': row.get('Air Band', '').strip(),
+                                    'dmr': row.get('DMR', '').strip(),
+                                    'display': row.get('Display', '').strip(),
+                                    'battery_mah': battery_mah,
+                                    'cost_approx': row.get('Cost (Approx)', '').strip(),
+                                    'rebadges_clones': row.get('Known Rebadges / Clones', '').strip(),
+                                    'website': row.get('Website', '').strip(),
+                                    'notes': '',
+                                }
+                            )
                         
                         if created:
                             created_count += 1
@@ -108,12 +114,16 @@ class Command(BaseCommand):
                         )
         
         except FileNotFoundError:
+            run.fail(f'File not found: {csv_file}')
             self.stdout.write(self.style.ERROR(f'File not found: {csv_file}'))
             return
         except Exception as e:
+            run.fail(f'Error reading file: {str(e)}')
             self.stdout.write(self.style.ERROR(f'Error reading file: {str(e)}'))
             return
         
+        run.counts.update(created=created_count, updated=updated_count, errors=error_count)
+        
         self.stdout.write(self.style.SUCCESS('\n' + '='*60))
         self.stdout.write(self.style.SUCCESS('Import complete!'))
         self.stdout.write(self.style.SUCCESS(f'  Created: {created_count}'))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from radios.models import Radio, Brand
+from radios.caching import catalogue_changes
+from radios.snapshot import Snapshot, SnapshotError, TEXT_COLUMNS, INTERNED_COLUMNS, INT_COLUMNS, BRAND_COLUMNS
+
+
+class Command(BaseCommand):
+    help = 'Load a binary catalogue snapshot into the database, upserting radios by (brand, model) and brands by name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file written by export_snapshot')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk writes (default: 1000)')
+
+    def handle(self, *args, **options):
+        try:
+            snap = Snapshot(options['path'])
+        except (OSError, SnapshotError) as e:
+            raise CommandError(str(e))
+        batch_size = options['batch_size']
+        radio_fields = TEXT_COLUMNS + INTERNED_COLUMNS + INT_COLUMNS
+        with snap, catalogue_changes(), transaction.atomic():
+            brands = []
+            for name in snap.brands:
+                fields = snap.brand(name)
+                if fields:
+                    fields['grantee_code'] = fields['grantee_code'] or None
+                    brands.append(Brand(**fields))
+            Brand.objects.bulk_create(
+                brands, batch_size=batch_size,
+                update_conflicts=True, unique_fields=['name'], update_fields=BRAND_COLUMNS + ['updated_at'],
+            )
+            batch = []
+            for row in snap:
+                # Keep the local primary keys; updated_at is set to the import time
+                row.pop('id')
+                row.pop('updated_at')
+                radio = Radio(**row)
+                radio.set_fcc_id_parts()
+                batch.append(radio)
+                if len(batch) >= batch_size:
+                    self._write(batch, radio_fields)
+                    batch = []
+            self._write(batch, radio_fields)
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(snap)} radios and {len(brands)} brands from {options["path"]}.'))
+
+    def _write(self, batch, fields):
+        Radio.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['brand', 'model'], update_fields=fields + Radio.FCC_ID_PARTS + ['updated_at'],
+        )
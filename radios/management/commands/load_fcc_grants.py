@@ -0,0 +1,47 @@
+import glob
+import os
+from django.core.management.base import BaseCommand, CommandError
+from radios.fcc_ingest import row_state, store_grants
+from radios.fcc_xml import parse_file
+from radios.import_telemetry import track_import
+
+DEFAULT_PATTERN = os.path.join('data', '*authorization_search_results.xml')
+
+
+class Command(BaseCommand):
+    help = 'Bulk load every row of FCC authorization search exports into the FccGrant table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('xml_files', nargs='*', help=f'FCC XML exports (default: {DEFAULT_PATTERN})')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk inserts (default: 1000)')
+
+    def handle(self, *args, **options):
+        paths = options['xml_files'] or sorted(glob.glob(DEFAULT_PATTERN))
+        if not paths:
+            raise CommandError('No FCC XML files found.')
+
+        total = 0
+        for path in paths:
+            with track_import('load_fcc_grants', source=path) as run:
+                # Read and parsed in chunks, in the declared encoding
+                with run.stage('parse'):
+                    parsed = parse_file(path)
+                run.add_bytes(parsed.size)
+                if parsed.error:
+                    run.fail(f"XML parsing error: {parsed.error}")
+                    self.stdout.write(self.style.ERROR(f'{path}: XML parsing error: {parsed.error}'))
+                    continue
+                with run.stage('normalize'):
+                    states = []
+                    for row in parsed.records:
+                        if not row['fcc_id']:
+                            continue
+                        states.append(row_state(row))
+                run.add_rows(len(states))
+                with run.stage('db_write'):
+                    # Grants only: the radio importers' row hashes and watermarks are left alone
+                    store_grants(states, batch_size=options['batch_size'])
+                run.counts['rows'] = len(states)
+            total += len(states)
+            self.stdout.write(f'{path}: {len(states)} grant rows ({run.summary()})')
+        self.stdout.write(self.style.SUCCESS(f'Loaded {total} grant rows from {len(paths)} files.'))
@@ -1,5 +1,10 @@
+import time
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 from radios.models import Radio
+from radios.merging import MERGE_FIELDS, merge_radio_fields
+from radios.caching import catalogue_changes
 
 class Command(BaseCommand):
     help = "Merge all radios from a source brand into a target brand, deduplicating by (brand, model)."
@@ -7,32 +12,62 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('source_brand', type=str, help='Brand name to merge from (e.g., Baofeng)')
         parser.add_argument('target_brand', type=str, help='Brand name to merge into (e.g., PO FUNG ELECTRONIC (HK) INTERNATONAL GROUP COMPANY LIMITED)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing to the database')
+        parser.add_argument('--batch-size', type=int, default=500, help='Batch size for bulk updates (default: 500)')
 
     def handle(self, *args, **options):
         source = options['source_brand']
         target = options['target_brand']
+        if source == target:
+            self.stdout.write(self.style.WARNING('Source and target brand are the same; nothing to do.'))
+            return
+
+        start = time.perf_counter()
+        # Two queries: every radio of the source brand, and the target brand's radios by model
+        source_radios = list(Radio.objects.filter(brand=source))
+        target_radios = {r.model: r for r in Radio.objects.filter(brand=target)}
+        loaded = time.perf_counter()
+
+        # Resolve conflicts in memory
+        to_update = {}
+        moved = 0
         deduped = 0
-        # For each model in the source brand
-        for radio in Radio.objects.filter(brand=source):
-            # Check if a radio with the same model exists in the target brand
-            try:
-                target_radio = Radio.objects.get(brand=target, model=radio.model)
-                # Merge: keep the most complete, merge notes
-                fields = [
-                    'fcc_id','intro_year','freq_bands_tx','power_watts','satellite_tracking','harmonic_suppression','gps','aprs','air_band','dmr','display','battery_mah','cost_approx','rebadges_clones','website','notes'
-                ]
-                for f in fields:
-                    val = getattr(target_radio, f)
-                    if not val:
-                        setattr(target_radio, f, getattr(radio, f))
-                # Merge notes
-                if radio.notes and radio.notes not in (target_radio.notes or ''):
-                    target_radio.notes = (target_radio.notes or '') + '\n' + radio.notes
-                target_radio.save()
-                radio.delete()
-                deduped += 1
-            except Radio.DoesNotExist:
-                # No conflict, just update brand
-                radio.brand = target
-                radio.save()
-        self.stdout.write(self.style.SUCCESS(f"Merged and deduplicated {deduped} radios from '{source}' into '{target}'."))
+        for radio in source_radios:
+            target_radio = target_radios.get(radio.model)
+            if target_radio is None:
+                moved += 1
+                continue
+            if merge_radio_fields(target_radio, radio):
+                to_update[target_radio.pk] = target_radio
+            deduped += 1
+        computed = time.perf_counter()
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"[dry run] Would move {moved} radios and merge {deduped} duplicates "
+                f"({len(to_update)} target records updated) from '{source}' into '{target}'."
+            )
+        else:
+            now = timezone.now()
+            for r in to_update.values():
+                r.updated_at = now
+            with catalogue_changes(), transaction.atomic():
+                Radio.objects.bulk_update(
+                    to_update.values(), MERGE_FIELDS + Radio.FCC_ID_PARTS + ['updated_at'], batch_size=options['batch_size']
+                )
+                # Move every source radio whose model is not already used by the target brand
+                Radio.objects.filter(brand=source).exclude(
+                    model__in=Radio.objects.filter(brand=target).values('model')
+                ).update(brand=target, updated_at=now)
+                # Whatever is left in the source brand was merged above
+                Radio.objects.filter(brand=source).delete()
+        written = time.perf_counter()
+
+        self.stdout.write(
+            f"Timing: load {loaded - start:.3f}s, compute {computed - loaded:.3f}s, "
+            f"write {written - computed:.3f}s, total {written - start:.3f}s"
+        )
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Merged and deduplicated {deduped} radios and moved {moved} radios from '{source}' into '{target}'."
+            ))
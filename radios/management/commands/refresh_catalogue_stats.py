@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from radios.stats import SUMMARIES, refresh_all
+
+
+class Command(BaseCommand):
+    help = "Refresh the precomputed statistics behind the stats page; summaries whose source has not changed are skipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('summaries', nargs='*', help=f"Summaries to refresh (default: all of {', '.join(SUMMARIES)})")
+        parser.add_argument('--force', action='store_true', help='Refresh even when the source has not changed')
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['summaries'] if name not in SUMMARIES]
+        if unknown:
+            raise CommandError(f"Unknown summary: {', '.join(unknown)} (choose from {', '.join(SUMMARIES)})")
+        start = time.perf_counter()
+        results = refresh_all(options['summaries'], force=options['force'])
+        for name, refreshed in results.items():
+            if refreshed is None:
+                self.stdout.write(f"{name}: unchanged")
+            else:
+                written = '' if refreshed.rows_written is None else f", {refreshed.rows_written} written"
+                self.stdout.write(f"{name}: {refreshed.rows} rows{written} in {refreshed.duration_s:.3f}s")
+        done = sum(1 for refreshed in results.values() if refreshed is not None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {done} of {len(results)} summaries in {time.perf_counter() - start:.3f}s."
+        ))
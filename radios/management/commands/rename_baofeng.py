@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from radios.models import Radio
+from radios.caching import bump_catalogue_version
 
 class Command(BaseCommand):
     help = "Rename all radios with brand 'Baofeng' to the official applicant name."
@@ -8,5 +10,6 @@ class Command(BaseCommand):
         old_brand = 'Baofeng'
         new_brand = 'PO FUNG ELECTRONIC (HK) INTERNATONAL GROUP COMPANY LIMITED'
         qs = Radio.objects.filter(brand=old_brand)
-        count = qs.update(brand=new_brand)
+        count = qs.update(brand=new_brand, updated_at=timezone.now())
+        bump_catalogue_version()
         self.stdout.write(self.style.SUCCESS(f"Renamed {count} radios from '{old_brand}' to '{new_brand}'."))
\ No newline at end of file
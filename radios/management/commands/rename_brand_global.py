@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from radios.models import Radio, Brand
+from radios.caching import bump_catalogue_version
 
 class Command(BaseCommand):
     help = "Globally rename a brand in both Radio and Brand tables."
@@ -11,8 +13,11 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         old_name = options['old_name']
         new_name = options['new_name']
-        radio_count = Radio.objects.filter(brand=old_name).update(brand=new_name)
-        brand_count = Brand.objects.filter(name=old_name).update(name=new_name)
+        # QuerySet.update() skips auto_now; updated_at drives the page caches and edge syncs
+        now = timezone.now()
+        radio_count = Radio.objects.filter(brand=old_name).update(brand=new_name, updated_at=now)
+        brand_count = Brand.objects.filter(name=old_name).update(name=new_name, updated_at=now)
+        bump_catalogue_version()
         self.stdout.write(self.style.SUCCESS(
             f"Renamed {radio_count} radios and {brand_count} brands from '{old_name}' to '{new_name}'."
         ))
@@ -0,0 +1,56 @@
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from radios.jobs import claim_next, run_job, requeue_stale, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of background job workers that process the database job queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads (default: 2)')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between queue polls when idle (default: 1.0)')
+        parser.add_argument('--stale-after', type=int, default=120, help='Requeue running jobs without a heartbeat for this many seconds (default: 120)')
+        parser.add_argument('--once', action='store_true', help='Process the queued jobs and exit instead of polling forever')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *a: self.stop.set())
+        signal.signal(signal.SIGTERM, lambda *a: self.stop.set())
+
+        requeued = requeue_stale(options['stale_after'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs.'))
+
+        threads = [
+            threading.Thread(target=self.work, args=(options,), name=f'worker-{i + 1}')
+            for i in range(options['workers'])
+        ]
+        self.stdout.write(f"Starting {len(threads)} job workers (Ctrl+C to stop)...")
+        for t in threads:
+            t.start()
+        # Join with a timeout so the main thread keeps receiving signals
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+        self.stdout.write(self.style.SUCCESS('Job workers stopped.'))
+
+    def work(self, options):
+        name = worker_name()
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_next(name)
+                if job is None:
+                    if options['once']:
+                        return
+                    self.stop.wait(options['poll'])
+                    continue
+                self.stdout.write(f'[{name}] Running {job}')
+                run_job(job)
+                job.refresh_from_db()
+                style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+                self.stdout.write(style(f'[{name}] {job}: {job.message}'))
+        finally:
+            connection.close()
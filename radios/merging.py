@@ -0,0 +1,32 @@
+"""
+Shared helpers for merging duplicate Radio records.
+
+Used by the bulk maintenance commands (merge_brand_radios, clean_grantee_prefix)
+so that they all agree on which fields are merged and how notes are combined.
+"""
+
+# Fields copied from a duplicate into the kept record when the kept record has no value
+MERGE_FIELDS = [
+    'fcc_id', 'intro_year', 'freq_bands_tx', 'power_watts', 'satellite_tracking',
+    'harmonic_suppression', 'gps', 'aprs', 'air_band', 'dmr', 'display',
+    'battery_mah', 'cost_approx', 'rebadges_clones', 'website', 'notes',
+]
+
+
+def merge_radio_fields(keep, other):
+    """
+    Merge `other` into `keep` in memory: fill empty fields and append notes.
+    Returns True if `keep` was modified. Nothing is saved.
+    """
+    changed = False
+    for f in MERGE_FIELDS:
+        if not getattr(keep, f) and getattr(other, f):
+            setattr(keep, f, getattr(other, f))
+            changed = True
+    if changed:
+        keep.set_fcc_id_parts()
+    # Merge notes
+    if other.notes and other.notes not in (keep.notes or ''):
+        keep.notes = (keep.notes or '') + '\n' + other.notes
+        changed = True
+    return changed
@@ -0,0 +1,152 @@
+"""
+Per-request SQL and latency instrumentation.
+
+QueryStatsMiddleware counts the SQL queries of every request, their total
+time and repeated statements (the N+1 signature), adds a Server-Timing header
+and keeps rolling percentiles per URL name for the JSON stats endpoint.
+Enable it with QUERY_STATS_ENABLED = True in settings.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponseNotAllowed
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callable collecting per-statement timings."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # SQL arrives parameterized, so the statement text is its own fingerprint
+            self.statements[sql] += 1
+
+    def duplicates(self, limit=5):
+        return [(sql, n) for sql, n in self.statements.most_common(limit) if n > 1]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RequestStats:
+    """Thread-safe rolling window of request samples keyed by URL name."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.totals = Counter()
+        self.duplicate_fingerprints = defaultdict(Counter)
+
+    def record(self, url_name, wall_ms, sql_ms, queries, duplicates):
+        with self.lock:
+            self.samples[url_name].append((wall_ms, sql_ms, queries))
+            self.totals[url_name] += 1
+            for sql, n in duplicates:
+                self.duplicate_fingerprints[url_name][sql] += n
+
+    def snapshot(self):
+        with self.lock:
+            items = {name: list(samples) for name, samples in self.samples.items()}
+            totals = dict(self.totals)
+            dups = {name: c.most_common(5) for name, c in self.duplicate_fingerprints.items()}
+        result = {}
+        for name, samples in sorted(items.items()):
+            wall = sorted(s[0] for s in samples)
+            sql = sorted(s[1] for s in samples)
+            queries = sorted(s[2] for s in samples)
+            result[name] = {
+                'requests': totals.get(name, 0),
+                'window': len(samples),
+                'wall_ms': {p: _round(_percentile(wall, n)) for p, n in (('p50', 50), ('p95', 95), ('p99', 99))},
+                'sql_ms': {p: _round(_percentile(sql, n)) for p, n in (('p50', 50), ('p95', 95), ('p99', 99))},
+                'queries': {p: _percentile(queries, n) for p, n in (('p50', 50), ('p95', 95), ('max', 100))},
+                'duplicate_queries': [{'sql': sql, 'count': n} for sql, n in dups.get(name, [])],
+            }
+        return result
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+            self.duplicate_fingerprints.clear()
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+request_stats = RequestStats(window=getattr(settings, 'QUERY_STATS_WINDOW', 500))
+
+
+class QueryStatsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_STATS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_warning = getattr(settings, 'QUERY_STATS_DUPLICATE_WARNING', 10)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+        sql_ms = recorder.duration * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.view_name if match else None) or 'unresolved'
+        duplicates = recorder.duplicates()
+        request_stats.record(url_name, wall_ms, sql_ms, recorder.count, duplicates)
+
+        response['Server-Timing'] = (
+            f'db;dur={sql_ms:.1f};desc="{recorder.count} queries", '
+            f'app;dur={wall_ms - sql_ms:.1f}, total;dur={wall_ms:.1f}'
+        )
+        if duplicates and duplicates[0][1] >= self.duplicate_warning:
+            logger.warning(
+                "%s ran the same query %d times (%d queries total): %s",
+                url_name, duplicates[0][1], recorder.count, duplicates[0][0][:200],
+            )
+        return response
+
+
+class ReadOnlyReplicaMiddleware:
+    """Reject writes with a clear message when serving the read-only edge replica."""
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EDGE_REPLICA', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in self.SAFE_METHODS:
+            return HttpResponseNotAllowed(
+                self.SAFE_METHODS, 'This is a read-only replica of the catalogue; changes must be made on the main server.',
+            )
+        return self.get_response(request)
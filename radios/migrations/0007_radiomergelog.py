@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0006_alter_brand_grantee_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RadioMergeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kept_label', models.CharField(help_text='Brand and model of the kept radio at merge time', max_length=300)),
+                ('merged_radios', models.JSONField(default=list, help_text='Snapshot of every radio removed by the merge')),
+                ('field_sources', models.JSONField(default=dict, help_text='Field name -> pk of the radio whose value was kept')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('kept_radio', models.ForeignKey(blank=True, help_text='Radio that was kept', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='merge_logs', to='radios.radio')),
+            ],
+            options={
+                'verbose_name': 'Radio Merge Log',
+                'verbose_name_plural': 'Radio Merge Logs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
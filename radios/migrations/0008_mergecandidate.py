@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0007_radiomergelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MergeCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('radio_ids', models.JSONField(default=list, help_text='Primary keys of the radios in the group')),
+                ('size', models.PositiveIntegerField(default=0, help_text='Number of radios in the group')),
+                ('score', models.FloatField(help_text='Mean model-name similarity (0-1)')),
+                ('block_key', models.CharField(blank=True, help_text='Block the group was found in (e.g., brand:BAOFENG:UV)', max_length=300)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('merged', 'Merged'), ('dismissed', 'Dismissed')], db_index=True, default='open', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Merge Candidate',
+                'verbose_name_plural': 'Merge Candidates',
+                'ordering': ['-score', 'id'],
+                'indexes': [models.Index(fields=['status', '-score'], name='radios_merg_status_38cfae_idx')],
+            },
+        ),
+    ]
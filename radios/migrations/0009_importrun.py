@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0008_mergecandidate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(db_index=True, help_text='Import job (e.g., import_radios, grantee_xml_preview)', max_length=100)),
+                ('source', models.CharField(blank=True, help_text='Input file name or path', max_length=500)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('error', 'Error')], default='ok', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('duration_s', models.FloatField(default=0, help_text='Wall time in seconds')),
+                ('rows', models.PositiveIntegerField(default=0, help_text='Input rows processed')),
+                ('bytes', models.PositiveBigIntegerField(default=0, help_text='Input bytes processed')),
+                ('rows_per_sec', models.FloatField(default=0)),
+                ('bytes_per_sec', models.FloatField(default=0)),
+                ('peak_memory_bytes', models.PositiveBigIntegerField(blank=True, help_text='Peak Python memory (tracemalloc)', null=True)),
+                ('stages', models.JSONField(default=dict, help_text='Stage name -> seconds (read, sanitize, parse, ...)')),
+                ('counts', models.JSONField(default=dict, help_text='Result counters (created, updated, skipped, ...)')),
+            ],
+            options={
+                'verbose_name': 'Import Run',
+                'verbose_name_plural': 'Import Runs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['kind', '-started_at'], name='radios_impo_kind_924928_idx')],
+            },
+        ),
+    ]
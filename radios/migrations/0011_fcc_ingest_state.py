@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0010_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FccRowHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_hash', models.CharField(help_text='SHA-1 of the normalized row', max_length=40, unique=True)),
+                ('grantee_code', models.CharField(db_index=True, max_length=20)),
+                ('fcc_id', models.CharField(max_length=100)),
+                ('grant_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'FCC Row Hash',
+                'verbose_name_plural': 'FCC Row Hashes',
+            },
+        ),
+        migrations.CreateModel(
+            name='GranteeWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grantee_code', models.CharField(max_length=20, unique=True)),
+                ('last_grant_date', models.DateField(blank=True, help_text='Newest grant_date seen in an ingested export', null=True)),
+                ('rows', models.PositiveIntegerField(default=0, help_text='FCC rows recorded for this grantee')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Grantee Watermark',
+                'verbose_name_plural': 'Grantee Watermarks',
+                'ordering': ['grantee_code'],
+            },
+        ),
+    ]
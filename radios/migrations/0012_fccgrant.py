@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0011_fcc_ingest_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FccGrant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_hash', models.CharField(help_text='SHA-1 of the normalized row', max_length=40, unique=True)),
+                ('grantee_code', models.CharField(max_length=20)),
+                ('product_code', models.CharField(max_length=100)),
+                ('fcc_id', models.CharField(max_length=100)),
+                ('applicant_name', models.CharField(blank=True, max_length=300)),
+                ('address', models.CharField(blank=True, max_length=300)),
+                ('city', models.CharField(blank=True, max_length=200)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('zip_code', models.CharField(blank=True, max_length=50)),
+                ('application_purpose', models.CharField(blank=True, max_length=200)),
+                ('grant_date', models.DateField(blank=True, null=True)),
+                ('lower_freq_mhz', models.DecimalField(blank=True, decimal_places=6, max_digits=14, null=True)),
+                ('upper_freq_mhz', models.DecimalField(blank=True, decimal_places=6, max_digits=14, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'FCC Grant',
+                'verbose_name_plural': 'FCC Grants',
+                'ordering': ['-grant_date', 'lower_freq_mhz'],
+                'indexes': [models.Index(fields=['grantee_code', 'product_code'], name='radios_fccg_grantee_02f27b_idx'), models.Index(fields=['grant_date'], name='radios_fccg_grant_d_11d8a4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0012_fccgrant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='radio',
+            name='fcc_id_key',
+            field=models.CharField(blank=True, db_index=True, help_text='FCC ID upper-cased without dashes or spaces, for lookups', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='radio',
+            name='grantee_code',
+            field=models.CharField(blank=True, help_text='FCC grantee code part of the FCC ID', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='radio',
+            name='product_code',
+            field=models.CharField(blank=True, help_text='FCC product code part of the FCC ID', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='radio',
+            index=models.Index(fields=['grantee_code', 'product_code'], name='radios_radi_grantee_16b924_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0013_radio_fcc_id_parts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='radio',
+            name='family_id',
+            field=models.BigIntegerField(blank=True, db_index=True, help_text='Smallest pk of the rebadge/clone family (set by build_radio_families)', null=True),
+        ),
+        migrations.CreateModel(
+            name='RadioRelation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('rebadge', 'Rebadge / clone'), ('fcc_id', 'Shared FCC ID')], max_length=20)),
+                ('note', models.CharField(blank=True, help_text='Qualifier from the rebadges text (e.g., Variant)', max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relations_out', to='radios.radio')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relations_in', to='radios.radio')),
+            ],
+            options={
+                'verbose_name': 'Radio Relation',
+                'verbose_name_plural': 'Radio Relations',
+                'ordering': ['source', 'target'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'target', 'kind'), name='radios_relation_unique_edge')],
+            },
+        ),
+    ]
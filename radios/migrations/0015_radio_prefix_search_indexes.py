@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Admin prefix search runs UPPER(col::text) LIKE UPPER('term%'); these expression
+# indexes let PostgreSQL answer it with an index range scan. Other backends skip them.
+INDEXES = {
+    'radios_radio_brand_upper_prefix': 'brand',
+    'radios_radio_model_upper_prefix': 'model',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+            f'ON "radios_radio" (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('radios', '0014_radio_families'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0015_radio_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='radio',
+            index=models.Index(fields=['created_at'], name='radios_radi_created_68f4ef_idx'),
+        ),
+    ]
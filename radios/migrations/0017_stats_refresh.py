@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0016_radio_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Summary name (e.g., brand_year)', max_length=100, unique=True)),
+                ('fingerprint', models.CharField(help_text='Row count, newest pk and updated_at of the source when refreshed', max_length=200)),
+                ('rows', models.PositiveIntegerField(default=0, help_text='Rows in the summary after the refresh')),
+                ('rows_written', models.PositiveIntegerField(blank=True, help_text='Rows inserted or deleted (plain tables only)', null=True)),
+                ('duration_s', models.FloatField(default=0, help_text='Wall time in seconds')),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Stats Refresh',
+                'verbose_name_plural': 'Stats Refreshes',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CLAIM_KEY = 'claim'
+
+
+def copy_lock_keys(apps, schema_editor):
+    Job = apps.get_model('radios', 'Job')
+    JobLock = apps.get_model('radios', 'JobLock')
+    db = schema_editor.connection.alias
+    JobLock.objects.using(db).create(key=CLAIM_KEY)
+    for job in Job.objects.using(db).exclude(lock_key__isnull=True).exclude(lock_key='').only('pk', 'lock_key', 'status'):
+        job.lock_keys = [job.lock_key]
+        job.save(update_fields=['lock_keys'])
+        if job.status == 'running':
+            JobLock.objects.using(db).create(key=job.lock_key, job=job)
+
+
+def restore_lock_key(apps, schema_editor):
+    Job = apps.get_model('radios', 'Job')
+    for job in Job.objects.using(schema_editor.connection.alias).exclude(lock_keys=[]).only('pk', 'lock_keys'):
+        job.lock_key = job.lock_keys[0]
+        job.save(update_fields=['lock_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0017_stats_refresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('job', models.ForeignKey(blank=True, help_text='Running job holding the key; empty for the row every claim updates first', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='locks', to='radios.job')),
+            ],
+            options={
+                'verbose_name': 'Job lock',
+                'verbose_name_plural': 'Job locks',
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lock_keys',
+            field=models.JSONField(blank=True, default=list, help_text='Jobs sharing a lock key never run at the same time (e.g., ["grantee:2AJGM"]); "catalogue" excludes every other key'),
+        ),
+        migrations.RunPython(copy_lock_keys, restore_lock_key),
+        migrations.RemoveConstraint(
+            model_name='job',
+            name='radios_job_one_running_per_lock',
+        ),
+        migrations.RemoveField(
+            model_name='job',
+            name='lock_key',
+        ),
+    ]
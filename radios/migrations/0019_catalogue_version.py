@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0018_job_lock_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(help_text='Bumped after every committed change to radios or brands')),
+            ],
+            options={
+                'verbose_name': 'Catalogue Version',
+                'verbose_name_plural': 'Catalogue Versions',
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:37
+
+from django.db import migrations, models
+
+# The summaries as radios.stats defined them at this migration; later
+# changes to a summary's SELECT are picked up when radios.stats recreates
+# the views after a migrate (see stats.recreate_after_migrate)
+NEGATIVES = "'', 'NO', 'N', 'N/A', 'NONE', 'UNKNOWN', '-'"
+
+
+def _has(column):
+    return f"SUM(CASE WHEN UPPER(TRIM({column})) IN ({NEGATIVES}) THEN 0 ELSE 1 END)"
+
+
+def _selects(vendor):
+    if vendor == 'postgresql':
+        year, quarter = 'EXTRACT(YEAR FROM grant_date)::integer', 'EXTRACT(QUARTER FROM grant_date)::integer'
+    else:
+        year, quarter = "CAST(strftime('%Y', grant_date) AS INTEGER)", "(CAST(strftime('%m', grant_date) AS INTEGER) + 2) / 3"
+    return {
+        'brand_year': (
+            ['brand', 'intro_year'], ['radios'],
+            "SELECT brand, COALESCE(intro_year, 0) AS intro_year, COUNT(*) AS radios "
+            "FROM radios_radio GROUP BY brand, COALESCE(intro_year, 0)",
+        ),
+        'feature_adoption': (
+            ['intro_year'], ['radios', 'gps', 'aprs', 'dmr'],
+            "SELECT COALESCE(intro_year, 0) AS intro_year, COUNT(*) AS radios, "
+            f"{_has('gps')} AS gps, {_has('aprs')} AS aprs, {_has('dmr')} AS dmr "
+            "FROM radios_radio GROUP BY COALESCE(intro_year, 0)",
+        ),
+        'grants_quarter': (
+            ['grantee_code', 'year', 'quarter'], ['grants', 'fcc_ids'],
+            f"SELECT grantee_code, {year} AS year, {quarter} AS quarter, COUNT(*) AS grants, "
+            f"COUNT(DISTINCT fcc_id) AS fcc_ids FROM radios_fccgrant "
+            f"WHERE grant_date IS NOT NULL GROUP BY grantee_code, {year}, {quarter}",
+        ),
+    }
+
+
+def create_views(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for name, (key, values, select) in _selects(vendor).items():
+            table = f'radios_stats_{name}'
+            if vendor == 'postgresql':
+                cursor.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {table} AS {select}")
+            else:
+                text = {'brand', 'grantee_code'}
+                columns = ', '.join(f"{c} {'TEXT' if c in text else 'INTEGER'} NOT NULL" for c in key + values)
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_key ON {table} ({', '.join(key)})")
+
+
+def drop_views(apps, schema_editor):
+    kind = 'MATERIALIZED VIEW' if schema_editor.connection.vendor == 'postgresql' else 'TABLE'
+    with schema_editor.connection.cursor() as cursor:
+        for name in ('brand_year', 'feature_adoption', 'grants_quarter'):
+            cursor.execute(f"DROP {kind} IF EXISTS radios_stats_{name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radios', '0019_catalogue_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statsrefresh',
+            name='fingerprint',
+            field=models.CharField(help_text='Row count, newest pk, updated_at and (for radios) catalogue version of the source when refreshed', max_length=200),
+        ),
+        migrations.RunPython(create_views, drop_views),
+    ]
@@ -34,6 +34,11 @@ class Radio(models.Model):
     brand = models.CharField(max_length=100, db_index=True, help_text="Radio manufacturer/brand")
     model = models.CharField(max_length=200, help_text="Radio model name/number")
     fcc_id = models.CharField(max_length=50, blank=True, help_text="FCC ID (e.g., 2AJGM-UV5R)")
+    # Derived from fcc_id on save (and by the backfill_fcc_id_parts command)
+    grantee_code = models.CharField(max_length=20, blank=True, help_text="FCC grantee code part of the FCC ID")
+    product_code = models.CharField(max_length=50, blank=True, help_text="FCC product code part of the FCC ID")
+    fcc_id_key = models.CharField(max_length=50, blank=True, db_index=True, help_text="FCC ID upper-cased without dashes or spaces, for lookups")
+    family_id = models.BigIntegerField(null=True, blank=True, db_index=True, help_text="Smallest pk of the rebadge/clone family (set by build_radio_families)")
     intro_year = models.IntegerField(null=True, blank=True, help_text="Year introduced")
     
     # Technical specifications
@@ -70,13 +75,329 @@ class Radio(models.Model):
         indexes = [
             models.Index(fields=['brand', 'model']),
             models.Index(fields=['fcc_id']),
+            models.Index(fields=['grantee_code', 'product_code']),
+            # Newest radios on the dashboard
+            models.Index(fields=['created_at']),
         ]
         verbose_name = 'Radio'
         verbose_name_plural = 'Radios'
     
+    FCC_ID_PARTS = ['grantee_code', 'product_code', 'fcc_id_key']
+
     def __str__(self):
         return f"{self.brand} {self.model}"
     
+    def set_fcc_id_parts(self):
+        """Fill grantee_code, product_code and fcc_id_key from fcc_id. Returns True if any changed."""
+        from .fcc_ingest import split_fcc_id, fcc_id_key
+        if self.fcc_id:
+            grantee_code, product_code = split_fcc_id(self.fcc_id)
+        else:
+            # Keep a grantee code set by hand on a radio without an FCC ID
+            grantee_code, product_code = self.grantee_code, ''
+        parts = (grantee_code, product_code, fcc_id_key(self.fcc_id))
+        if parts == tuple(getattr(self, f) for f in self.FCC_ID_PARTS):
+            return False
+        self.grantee_code, self.product_code, self.fcc_id_key = parts
+        return True
+    
+    def save(self, *args, **kwargs):
+        self.set_fcc_id_parts()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fcc_id' in update_fields:
+            kwargs['update_fields'] = list(update_fields) + [f for f in self.FCC_ID_PARTS if f not in update_fields]
+        super().save(*args, **kwargs)
+    
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('radio_detail', kwargs={'pk': self.pk})
+
+
+class RadioRelation(models.Model):
+    """Edge of the rebadge/clone graph (see radios.families)"""
+    
+    KIND_REBADGE = 'rebadge'
+    KIND_FCC_ID = 'fcc_id'
+    KIND_CHOICES = [
+        (KIND_REBADGE, 'Rebadge / clone'),
+        (KIND_FCC_ID, 'Shared FCC ID'),
+    ]
+    
+    source = models.ForeignKey(Radio, on_delete=models.CASCADE, related_name='relations_out')
+    target = models.ForeignKey(Radio, on_delete=models.CASCADE, related_name='relations_in')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    note = models.CharField(max_length=200, blank=True, help_text="Qualifier from the rebadges text (e.g., Variant)")
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['source', 'target']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'target', 'kind'], name='radios_relation_unique_edge'),
+        ]
+        verbose_name = 'Radio Relation'
+        verbose_name_plural = 'Radio Relations'
+    
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id} ({self.kind})"
+
+
+class RadioMergeLog(models.Model):
+    """Audit record of an interactive merge of several radios into one"""
+    
+    kept_radio = models.ForeignKey(Radio, on_delete=models.SET_NULL, null=True, blank=True, related_name='merge_logs', help_text="Radio that was kept")
+    kept_label = models.CharField(max_length=300, help_text="Brand and model of the kept radio at merge time")
+    merged_radios = models.JSONField(default=list, help_text="Snapshot of every radio removed by the merge")
+    field_sources = models.JSONField(default=dict, help_text="Field name -> pk of the radio whose value was kept")
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Radio Merge Log'
+        verbose_name_plural = 'Radio Merge Logs'
+    
+    def __str__(self):
+        return f"Merged {len(self.merged_radios)} radios into {self.kept_label}"
+
+
+class MergeCandidate(models.Model):
+    """Group of radios proposed for merging by the find_merge_candidates job"""
+    
+    STATUS_OPEN = 'open'
+    STATUS_MERGED = 'merged'
+    STATUS_DISMISSED = 'dismissed'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_MERGED, 'Merged'),
+        (STATUS_DISMISSED, 'Dismissed'),
+    ]
+    
+    radio_ids = models.JSONField(default=list, help_text="Primary keys of the radios in the group")
+    size = models.PositiveIntegerField(default=0, help_text="Number of radios in the group")
+    score = models.FloatField(help_text="Mean model-name similarity (0-1)")
+    block_key = models.CharField(max_length=300, blank=True, help_text="Block the group was found in (e.g., brand:BAOFENG:UV)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN, db_index=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-score', 'id']
+        indexes = [
+            models.Index(fields=['status', '-score']),
+        ]
+        verbose_name = 'Merge Candidate'
+        verbose_name_plural = 'Merge Candidates'
+    
+    def __str__(self):
+        return f"{self.size} radios ({self.score:.2f}, {self.block_key})"
+
+
+class ImportRun(models.Model):
+    """Telemetry for one run of an import job (see radios.import_telemetry)"""
+    
+    STATUS_OK = 'ok'
+    STATUS_ERROR = 'error'
+    STATUS_CHOICES = [
+        (STATUS_OK, 'OK'),
+        (STATUS_ERROR, 'Error'),
+    ]
+    
+    kind = models.CharField(max_length=100, db_index=True, help_text="Import job (e.g., import_radios, grantee_xml_preview)")
+    source = models.CharField(max_length=500, blank=True, help_text="Input file name or path")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OK)
+    error = models.TextField(blank=True)
+    
+    # Timings and throughput
+    started_at = models.DateTimeField(db_index=True)
+    duration_s = models.FloatField(default=0, help_text="Wall time in seconds")
+    rows = models.PositiveIntegerField(default=0, help_text="Input rows processed")
+    bytes = models.PositiveBigIntegerField(default=0, help_text="Input bytes processed")
+    rows_per_sec = models.FloatField(default=0)
+    bytes_per_sec = models.FloatField(default=0)
+    peak_memory_bytes = models.PositiveBigIntegerField(null=True, blank=True, help_text="Peak Python memory (tracemalloc)")
+    stages = models.JSONField(default=dict, help_text="Stage name -> seconds (read, sanitize, parse, ...)")
+    counts = models.JSONField(default=dict, help_text="Result counters (created, updated, skipped, ...)")
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['kind', '-started_at']),
+        ]
+        verbose_name = 'Import Run'
+        verbose_name_plural = 'Import Runs'
+    
+    def __str__(self):
+        return f"{self.kind} {self.started_at:%Y-%m-%d %H:%M} ({self.rows} rows, {self.duration_s:.2f}s)"
+
+
+class Job(models.Model):
+    """Background job in the database-backed queue (see radios.jobs)"""
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=100, help_text="Registered job handler (e.g., import_grantee_radios)")
+    description = models.CharField(max_length=300, blank=True)
+    params = models.JSONField(default=dict, blank=True, help_text="Keyword arguments for the handler")
+    lock_keys = models.JSONField(default=list, blank=True, help_text="Jobs sharing a lock key never run at the same time (e.g., [\"grantee:2AJGM\"]); \"catalogue\" excludes every other key")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    
+    # Progress reported by the worker
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=500, blank=True, help_text="Latest progress or result message")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the worker")
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+    
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return 100 if self.status == self.STATUS_DONE else None
+        return min(100, round(100 * self.progress_done / self.progress_total))
+    
+    def get_absolute_url(self):
+        from django.urls import reverse
+        return reverse('job_detail', kwargs={'pk': self.pk})
+
+
+class JobLock(models.Model):
+    """A lock key held by a running job (see radios.jobs.claim_next)"""
+    
+    key = models.CharField(max_length=200, unique=True)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True, related_name='locks', help_text="Running job holding the key; empty for the row every claim updates first")
+    
+    class Meta:
+        verbose_name = 'Job lock'
+        verbose_name_plural = 'Job locks'
+    
+    def __str__(self):
+        return self.key
+
+
+class GranteeWatermark(models.Model):
+    """Latest FCC grant date ingested per grantee (see radios.fcc_ingest)"""
+    
+    grantee_code = models.CharField(max_length=20, unique=True)
+    last_grant_date = models.DateField(null=True, blank=True, help_text="Newest grant_date seen in an ingested export")
+    rows = models.PositiveIntegerField(default=0, help_text="FCC rows recorded for this grantee")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['grantee_code']
+        verbose_name = 'Grantee Watermark'
+        verbose_name_plural = 'Grantee Watermarks'
+    
+    def __str__(self):
+        return f"{self.grantee_code} @ {self.last_grant_date}"
+
+
+class FccRowHash(models.Model):
+    """Content hash of one normalized FCC authorization row that has been ingested"""
+    
+    row_hash = models.CharField(max_length=40, unique=True, help_text="SHA-1 of the normalized row")
+    grantee_code = models.CharField(max_length=20, db_index=True)
+    fcc_id = models.CharField(max_length=100)
+    grant_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'FCC Row Hash'
+        verbose_name_plural = 'FCC Row Hashes'
+    
+    def __str__(self):
+        return f"{self.fcc_id} {self.grant_date} {self.row_hash[:8]}"
+
+
+class FccGrant(models.Model):
+    """One row of an FCC equipment authorization export (see radios.fcc_ingest)"""
+    
+    row_hash = models.CharField(max_length=40, unique=True, help_text="SHA-1 of the normalized row")
+    grantee_code = models.CharField(max_length=20)
+    product_code = models.CharField(max_length=100)
+    fcc_id = models.CharField(max_length=100)
+    applicant_name = models.CharField(max_length=300, blank=True)
+    address = models.CharField(max_length=300, blank=True)
+    city = models.CharField(max_length=200, blank=True)
+    state = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    zip_code = models.CharField(max_length=50, blank=True)
+    application_purpose = models.CharField(max_length=200, blank=True)
+    grant_date = models.DateField(null=True, blank=True)
+    lower_freq_mhz = models.DecimalField(max_digits=14, decimal_places=6, null=True, blank=True)
+    upper_freq_mhz = models.DecimalField(max_digits=14, decimal_places=6, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-grant_date', 'lower_freq_mhz']
+        indexes = [
+            models.Index(fields=['grantee_code', 'product_code']),
+            models.Index(fields=['grant_date']),
+        ]
+        verbose_name = 'FCC Grant'
+        verbose_name_plural = 'FCC Grants'
+    
+    def __str__(self):
+        return f"{self.fcc_id} {self.grant_date} {self.application_purpose}"
+
+
+class StatsRefresh(models.Model):
+    """Last refresh of one precomputed statistics summary (see radios.stats)"""
+    
+    name = models.CharField(max_length=100, unique=True, help_text="Summary name (e.g., brand_year)")
+    fingerprint = models.CharField(max_length=200, help_text="Row count, newest pk, updated_at and (for radios) catalogue version of the source when refreshed")
+    rows = models.PositiveIntegerField(default=0, help_text="Rows in the summary after the refresh")
+    rows_written = models.PositiveIntegerField(null=True, blank=True, help_text="Rows inserted or deleted (plain tables only)")
+    duration_s = models.FloatField(default=0, help_text="Wall time in seconds")
+    refreshed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Stats Refresh'
+        verbose_name_plural = 'Stats Refreshes'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.refreshed_at:%Y-%m-%d %H:%M} ({self.rows} rows)"
+
+
+class CatalogueVersion(models.Model):
+    """The catalogue version every cached page is keyed on; one row (see radios.caching)"""
+    
+    version = models.BigIntegerField(help_text="Bumped after every committed change to radios or brands")
+    
+    class Meta:
+        verbose_name = 'Catalogue Version'
+        verbose_name_plural = 'Catalogue Versions'
+    
+    def __str__(self):
+        return str(self.version)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+
+from . import autocomplete, stats
+from .caching import catalogue_changed
+from .models import Brand, Radio
+
+
+def connect():
+    # The version bump is connected first so its on_commit callback runs before the index's
+    for model in (Radio, Brand):
+        post_save.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_changed_save_{model.__name__}')
+        post_delete.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_changed_delete_{model.__name__}')
+    post_save.connect(autocomplete.radio_saved, sender=Radio, dispatch_uid='autocomplete_radio_saved')
+    post_delete.connect(autocomplete.radio_deleted, sender=Radio, dispatch_uid='autocomplete_radio_deleted')
+    stats.connect_migrate_signals()
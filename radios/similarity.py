@@ -0,0 +1,353 @@
+"""
+"Radios like this one" from normalized spec vectors.
+
+    similar(radio.pk)                   # [(pk, score)], best first
+    similar(radio.pk, k=5, metric='cosine')
+
+Each radio's specs become one row of a float32 matrix: transmit bands as
+one column each, log power, log battery, log price, intro year and the
+GPS/APRS/DMR/air band/satellite flags. Columns are standardized with the
+catalogue mean and spread, blanks take the mean, so a spec nobody filled
+in does not count for or against a match. A lookup is one matrix-vector
+product over the whole catalogue and an argpartition for the top k; no
+database query is needed. The default metric is Euclidean distance in the
+standardized space; cosine compares only the direction in which radios
+differ from the average, so a radio close to average matches poorly.
+
+The matrix lives in each process like the typeahead index. When the
+catalogue version moves, the next lookup syncs it incrementally: rows
+changed since the last sync are re-encoded in place and deleted radios
+are dropped. The column scaling is kept from the last full build, which
+runs again once a fifth of the rows have changed.
+
+`python manage.py build_similar_radios` writes the matrix and, optionally,
+every radio's neighbour list to SIMILAR_RADIOS_PATH. Processes start from
+that file instead of encoding the catalogue, and answer from the stored
+lists until the first change, after which lookups are computed again.
+"""
+import math
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from . import caching
+from .stats import NEGATIVE_FLAGS
+
+COSINE = 'cosine'
+L2 = 'l2'
+METRICS = (L2, COSINE)
+
+SPEC_FIELDS = [
+    'freq_bands_tx', 'power_watts', 'battery_mah', 'cost_approx', 'intro_year',
+    'gps', 'aprs', 'dmr', 'air_band', 'satellite_tracking',
+]
+FLAG_FIELDS = ['gps', 'aprs', 'dmr', 'air_band', 'satellite_tracking']
+
+# Band column -> words in freq_bands_tx ("VHF, 220, UHF", "Tri-Band (220)", "FRS/GMRS")
+BANDS = {
+    'hf': r'\bHF\b',
+    '6m': r'\b6M\b|QUAD',
+    'vhf': r'\bVHF\b|\b2M\b|DUAL|TRI|QUAD|MULTI',
+    '220': r'\b220\b|1\.25M|TRI|QUAD',
+    'uhf': r'\bUHF\b|70CM|DUAL|TRI|QUAD|MULTI',
+    'gmrs': r'GMRS|FRS',
+}
+BAND_PATTERNS = {band: re.compile(pattern) for band, pattern in BANDS.items()}
+# Ranges in MHz, for values like "136-600Mhz"
+BAND_RANGES = {'6m': (50, 54), 'vhf': (136, 174), '220': (220, 225), 'uhf': (400, 520)}
+MHZ_RANGE = re.compile(r'(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*MHZ')
+NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+COLUMNS = list(BANDS) + ['power', 'battery', 'price', 'year'] + FLAG_FIELDS
+# The bands describe one property between them, so each counts for less
+WEIGHTS = np.array([0.5] * len(BANDS) + [1.0] * (len(COLUMNS) - len(BANDS)), dtype=np.float64)
+
+# Radios changed since the last full build, as a share of the catalogue, before scaling is recomputed
+REBUILD_SHARE = 0.2
+# Re-read rows saved this close before the previous sync; a row written twice is harmless
+SYNC_OVERLAP = timedelta(seconds=2)
+# Rows scored at once by all_neighbours; each is a row of catalogue-size float32 scores
+BLOCK_SIZE = 64
+
+
+def _numbers(text):
+    return [float(n) for n in NUMBER.findall(text or '')]
+
+
+def _log(value):
+    return math.log1p(value) if value is not None and value > 0 else math.nan
+
+
+def encode(freq_bands_tx, power_watts, battery_mah, cost_approx, intro_year, *flags):
+    """Raw spec vector of one radio, NaN where the spec is unknown; SPEC_FIELDS order."""
+    bands = (freq_bands_tx or '').upper()
+    if bands.strip():
+        found = {band for band, pattern in BAND_PATTERNS.items() if pattern.search(bands)}
+        for low, high in ((float(a), float(b)) for a, b in MHZ_RANGE.findall(bands)):
+            found.update(band for band, (start, end) in BAND_RANGES.items() if low <= end and high >= start)
+        vector = [1.0 if band in found else 0.0 for band in BANDS]
+    else:
+        vector = [math.nan] * len(BANDS)
+    power = _numbers(power_watts)
+    vector.append(_log(max(power)) if power else math.nan)
+    vector.append(_log(battery_mah))
+    # "$100-150" is the middle of the range; "Discont." is unknown
+    price = _numbers(cost_approx)
+    vector.append(_log(sum(price) / len(price)) if price else math.nan)
+    vector.append(float(intro_year) if intro_year else math.nan)
+    for value in flags:
+        value = (value or '').strip().upper()
+        vector.append(math.nan if not value else 0.0 if value in NEGATIVE_FLAGS else 1.0)
+    return vector
+
+
+def _spec_rows(queryset):
+    for row in queryset.values_list('pk', *SPEC_FIELDS).iterator(chunk_size=5000):
+        yield row[0], encode(*row[1:])
+
+
+class SpecIndex:
+    def __init__(self):
+        self.pks = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, len(COLUMNS)), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.valid = np.zeros(0, dtype=bool)     # a live radio with at least one known spec
+        self.rows = {}                           # pk -> row
+        self.free = []                           # rows of deleted radios, reused first
+        self.size = 0
+        self.mean = np.zeros(len(COLUMNS))
+        self.scale = np.ones(len(COLUMNS))
+        self.changed = 0                         # rows re-encoded since the last full build
+        self.neighbours = None                   # (metric, pks array n x k, scores) from build_similar_radios
+        self.synced_at = None
+        self.version = None
+        self.lock = threading.RLock()
+
+    # --- building ---
+
+    def build(self):
+        from .models import Radio
+        version = caching.catalogue_version()
+        synced_at = timezone.now()
+        pks, raw = [], []
+        for pk, vector in _spec_rows(Radio.objects.all()):
+            pks.append(pk)
+            raw.append(vector)
+        raw = np.array(raw, dtype=np.float64).reshape(len(raw), len(COLUMNS))
+        known = ~np.isnan(raw)
+        counts = np.maximum(known.sum(axis=0), 1)
+        mean = np.where(known, raw, 0).sum(axis=0) / counts
+        spread = np.sqrt(np.where(known, (raw - mean) ** 2, 0).sum(axis=0) / counts)
+        with self.lock:
+            self.mean = mean
+            self.scale = WEIGHTS / np.where(spread > 0, spread, 1.0)
+            self._reset(np.array(pks, dtype=np.int64), self._scaled(raw), known.any(axis=1))
+            self.changed = 0
+            self.neighbours = None
+            self.synced_at, self.version = synced_at, version
+
+    def _scaled(self, raw):
+        raw = np.where(np.isnan(raw), self.mean, raw)
+        return ((raw - self.mean) * self.scale).astype(np.float32)
+
+    def _reset(self, pks, matrix, valid):
+        self.pks, self.matrix, self.valid = pks, matrix, valid
+        self.norms = np.linalg.norm(matrix, axis=1)
+        self.rows = {int(pk): i for i, pk in enumerate(pks)}
+        self.free = []
+        self.size = len(pks)
+
+    def sync(self):
+        """Bring the matrix up to date with the rows saved or deleted since the last sync."""
+        from .models import Radio
+        version = caching.catalogue_version()
+        synced_at = timezone.now()
+        live = set(Radio.objects.values_list('pk', flat=True).iterator(chunk_size=10000))
+        changed = list(_spec_rows(Radio.objects.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP)))
+        with self.lock:
+            removed = [pk for pk in self.rows if pk not in live]
+            seen = {pk for pk, _ in changed}
+            # Rows written without touching updated_at (raw SQL imports) still show up as new pks
+            added = sorted(live - set(self.rows) - seen)
+            for start in range(0, len(added), 500):
+                changed.extend(_spec_rows(Radio.objects.filter(pk__in=added[start:start + 500])))
+            for pk in removed:
+                self._remove(pk)
+            # Rows re-read inside the overlap usually come back unchanged
+            updated = sum(self._set(pk, vector) for pk, vector in changed)
+            if removed or updated:
+                self.neighbours = None
+            self.changed += len(removed) + updated
+            if self.changed > REBUILD_SHARE * max(self.size, 1):
+                self.build()
+                return
+            self.synced_at, self.version = synced_at, version
+
+    def _set(self, pk, vector):
+        """Store the radio's vector; False when it was already there unchanged."""
+        raw = np.array([vector], dtype=np.float64)
+        scaled, valid = self._scaled(raw)[0], not np.isnan(raw).all()
+        row = self.rows.get(pk)
+        if row is None:
+            row = self.free.pop() if self.free else self._append()
+            self.rows[pk] = row
+            self.pks[row] = pk
+        elif self.valid[row] == valid and np.array_equal(self.matrix[row], scaled):
+            return False
+        self.matrix[row] = scaled
+        self.norms[row] = np.linalg.norm(scaled)
+        self.valid[row] = valid
+        return True
+
+    def _append(self):
+        if self.size == len(self.pks):
+            capacity = max(16, 2 * len(self.pks))
+            self.pks = np.resize(self.pks, capacity)
+            self.matrix = np.resize(self.matrix, (capacity, len(COLUMNS)))
+            self.norms = np.resize(self.norms, capacity)
+            self.valid = np.concatenate([self.valid[:self.size], np.zeros(capacity - self.size, dtype=bool)])
+        self.size += 1
+        return self.size - 1
+
+    def _remove(self, pk):
+        row = self.rows.pop(pk)
+        self.valid[row] = False
+        self.free.append(row)
+
+    # --- lookups ---
+
+    def scores(self, rows, metric=L2):
+        """Similarity of every radio to each of `rows` (higher is closer); shape len(rows) x size."""
+        matrix, norms = self.matrix[:self.size], self.norms[:self.size]
+        query = matrix[rows]
+        dots = query @ matrix.T
+        if metric == L2:
+            # Negated squared distance, |a|^2 - 2ab + |b|^2
+            return 2 * dots - norms ** 2 - (norms[rows] ** 2)[:, None]
+        return dots / (np.maximum(norms[rows], 1e-6)[:, None] * np.maximum(norms, 1e-6))
+
+    def top(self, scores, exclude, k):
+        scores = np.where(self.valid[:self.size], scores, -np.inf)
+        scores[exclude] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(self.pks[i]), float(scores[i])) for i in best]
+
+    def similar(self, pk, k=10, metric=L2):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        with self.lock:
+            row = self.rows.get(pk)
+            if row is None or not self.valid[row]:
+                return []
+            if self.neighbours is not None and self.neighbours[0] == metric and k <= self.neighbours[1].shape[1]:
+                pks, scores = self.neighbours[1][row], self.neighbours[2][row]
+                return [(int(p), float(s)) for p, s in zip(pks[:k], scores[:k]) if p >= 0]
+            return self.top(self.scores([row], metric)[0], row, k)
+
+    def all_neighbours(self, k=10, metric=L2, block_size=BLOCK_SIZE):
+        """
+        (pks, scores): the top-k of every row, -1 padding short lists. This
+        is a catalogue-squared amount of work, done a block of rows at a time
+        and in place, since it is what build_similar_radios spends its time on.
+        """
+        with self.lock:
+            size = self.size
+            pks = np.full((size, k), -1, dtype=np.int64)
+            scores = np.zeros((size, k), dtype=np.float32)
+            top_k = min(k, size - 1)
+            if top_k <= 0:
+                return pks, scores
+            matrix, norms, valid = self.matrix[:size], self.norms[:size], self.valid[:size]
+            squares, safe_norms = norms ** 2, np.maximum(norms, 1e-6)
+            invalid = np.flatnonzero(~valid)
+            for start in range(0, size, block_size):
+                rows = np.arange(start, min(start + block_size, size))
+                block = matrix[rows] @ matrix.T
+                if metric == L2:
+                    # |q|^2 is the same along a row, so it is left out until the top k are known
+                    block *= 2
+                    block -= squares
+                else:
+                    block /= safe_norms
+                    block /= safe_norms[rows][:, None]
+                block[:, invalid] = -np.inf
+                block[np.arange(len(rows)), rows] = -np.inf
+                best = np.argpartition(block, size - top_k, axis=1)[:, size - top_k:]
+                best_scores = np.take_along_axis(block, best, axis=1)
+                order = np.argsort(-best_scores, axis=1, kind='stable')
+                best = np.take_along_axis(best, order, axis=1)
+                best_scores = np.take_along_axis(best_scores, order, axis=1)
+                if metric == L2:
+                    best_scores -= squares[rows][:, None]
+                found = np.isfinite(best_scores) & valid[rows][:, None]
+                pks[rows, :top_k] = np.where(found, self.pks[best], -1)
+                scores[rows, :top_k] = np.where(found, best_scores, 0)
+            return pks, scores
+
+    # --- files ---
+
+    def save(self, path, neighbours=0, metric=L2):
+        with self.lock:
+            arrays = {
+                'pks': self.pks[:self.size], 'matrix': self.matrix[:self.size], 'valid': self.valid[:self.size],
+                'mean': self.mean, 'scale': self.scale, 'columns': np.array(COLUMNS),
+                'synced_at': np.array(self.synced_at.timestamp()),
+            }
+            if neighbours:
+                arrays['neighbour_pks'], arrays['neighbour_scores'] = self.all_neighbours(neighbours, metric)
+                arrays['metric'] = np.array(metric)
+            # np.savez appends .npz to names without it; write beside the target and swap
+            tmp = f'{path}.tmp.npz'
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+
+    def load(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            if list(data['columns']) != COLUMNS:
+                raise ValueError(f"{path} was built with different spec columns")
+            with self.lock:
+                self.mean, self.scale = data['mean'], data['scale']
+                self._reset(data['pks'].astype(np.int64), data['matrix'].astype(np.float32), data['valid'])
+                # Dropped on the first sync that changes a row
+                self.neighbours = None
+                if 'neighbour_pks' in data:
+                    self.neighbours = (str(data['metric']), data['neighbour_pks'], data['neighbour_scores'])
+                self.changed = 0
+                self.synced_at = datetime.fromtimestamp(float(data['synced_at']), dt_timezone.utc)
+                # Unknown; the first lookup syncs from synced_at
+                self.version = ''
+
+
+_index = SpecIndex()
+
+
+def get_index():
+    """
+    The process-wide index: loaded from SIMILAR_RADIOS_PATH or built on
+    first use, synced when the catalogue version moved since.
+    """
+    if _index.version is None or _index.version != caching.catalogue_version():
+        with _index.lock:
+            if _index.version is None:
+                path = getattr(settings, 'SIMILAR_RADIOS_PATH', '')
+                if path and os.path.exists(path):
+                    _index.load(path)
+                else:
+                    _index.build()
+            if _index.version != caching.catalogue_version():
+                _index.sync()
+    return _index
+
+
+def similar(pk, k=10, metric=L2):
+    """[(pk, score)] of the k radios with the closest specs, best first."""
+    return get_index().similar(pk, k, metric)
@@ -0,0 +1,300 @@
+"""
+Compact binary snapshot of the Radio and Brand tables.
+
+    write_snapshot('catalogue.snap')            # manage.py export_snapshot
+    with Snapshot('catalogue.snap') as snap:    # no Django needed to read
+        radio = snap.lookup('Baofeng', 'UV-5R')
+
+The file is columnar and read through mmap: numeric columns are raw
+little-endian arrays cast straight from the mapping, string columns are an
+offsets array plus one UTF-8 blob, and low-cardinality strings (brand
+names, feature flags) are interned as uint32 codes into a shared table.
+An embedded index sorts the rows by (brand, model) with the start of
+each brand's run, so a lookup is two binary searches with no parsing step.
+
+Layout (all integers little-endian, sections 8-byte aligned):
+
+    header   magic, format version, row count, brand count, created, section count
+    sections name, offset, length, array typecode  (one entry per section)
+    payload  the sections
+"""
+import array
+import bisect
+import mmap
+import struct
+import sys
+import time
+
+MAGIC = b'RADSNAP\x00'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<8sHHIIqI')
+SECTION = struct.Struct('<32sQQc7x')
+
+NULL_INT = -2 ** 31
+
+# Radio columns by storage kind
+TEXT_COLUMNS = ['model', 'fcc_id', 'rebadges_clones', 'website', 'notes']
+INTERNED_COLUMNS = [
+    'freq_bands_tx', 'power_watts', 'satellite_tracking', 'harmonic_suppression', 'gps',
+    'aprs', 'air_band', 'dmr', 'display', 'cost_approx',
+]
+INT_COLUMNS = ['intro_year', 'battery_mah']
+
+# Brand columns, stored per entry of the brand table
+BRAND_COLUMNS = ['grantee_code', 'full_name', 'website', 'country', 'notes']
+
+RADIO_FIELDS = ['id', 'brand'] + TEXT_COLUMNS + INTERNED_COLUMNS + INT_COLUMNS + ['updated_at']
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class _Writer:
+    def __init__(self):
+        self.sections = []
+
+    def add(self, name, data, typecode='B'):
+        assert len(name) <= 32, name
+        if isinstance(data, array.array):
+            typecode = data.typecode
+            if sys.byteorder != 'little':
+                data = array.array(typecode, data)
+                data.byteswap()
+            data = data.tobytes()
+        self.sections.append((name, typecode, data))
+
+    def add_strings(self, name, values):
+        offsets = array.array('Q', [0])
+        blob = bytearray()
+        for value in values:
+            blob += (value or '').encode('utf-8')
+            offsets.append(len(blob))
+        self.add(f'{name}.off', offsets)
+        self.add(f'{name}.str', bytes(blob))
+
+    def write(self, path, row_count, brand_count):
+        offset = _align(HEADER.size + SECTION.size * len(self.sections))
+        entries = []
+        for name, typecode, data in self.sections:
+            entries.append((name, offset, len(data), typecode))
+            offset = _align(offset + len(data))
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, row_count, brand_count, int(time.time()), len(entries)))
+            for name, offset, length, typecode in entries:
+                f.write(SECTION.pack(name.encode('ascii'), offset, length, typecode.encode('ascii')))
+            for (name, typecode, data), (_, offset, length, _) in zip(self.sections, entries):
+                f.write(b'\x00' * (offset - f.tell()))
+                f.write(data)
+
+
+def _intern(values):
+    """Sorted table of distinct strings and the uint32 code of every value."""
+    table = sorted(set(values))
+    codes = {value: i for i, value in enumerate(table)}
+    return table, array.array('I', (codes[v] for v in values))
+
+
+def write_snapshot(path, radios=None, brands=None):
+    """
+    Write the catalogue to `path`. `radios` and `brands` default to all rows;
+    pass querysets to export a subset. Returns the number of radios written.
+    """
+    from .models import Radio, Brand
+    if radios is None:
+        radios = Radio.objects.all()
+    if brands is None:
+        brands = Brand.objects.all()
+    rows = list(radios.order_by('pk').values_list(*RADIO_FIELDS).iterator(chunk_size=5000))
+    brand_rows = {row[0]: row[1:] for row in brands.values_list('name', *BRAND_COLUMNS).iterator()}
+    columns = dict(zip(RADIO_FIELDS, zip(*rows))) if rows else {f: () for f in RADIO_FIELDS}
+
+    out = _Writer()
+    # Brand names from both tables share one sorted table, so codes order like the names
+    brand_table = sorted(set(columns['brand']) | set(brand_rows))
+    brand_codes = {name: i for i, name in enumerate(brand_table)}
+    out.add_strings('brand', brand_table)
+    for i, field in enumerate(BRAND_COLUMNS):
+        out.add_strings(f'brand.{field}', [(brand_rows.get(name) or ('',) * len(BRAND_COLUMNS))[i] for name in brand_table])
+    out.add('brand.in_table', array.array('B', (name in brand_rows for name in brand_table)))
+
+    out.add('id', array.array('q', columns['id']))
+    brand_column = array.array('I', (brand_codes[b] for b in columns['brand']))
+    out.add('brand.code', brand_column)
+    for field in TEXT_COLUMNS:
+        out.add_strings(field, columns[field])
+    for field in INTERNED_COLUMNS:
+        table, codes = _intern([v or '' for v in columns[field]])
+        out.add_strings(field, table)
+        out.add(f'{field}.code', codes)
+    for field in INT_COLUMNS:
+        out.add(field, array.array('i', (NULL_INT if v is None else v for v in columns[field])))
+    out.add('updated_at', array.array('d', (v.timestamp() for v in columns['updated_at'])))
+
+    # (brand, model) index: row numbers sorted by brand code then model, plus each brand's first position
+    order = sorted(range(len(rows)), key=lambda r: (brand_column[r], columns['model'][r]))
+    out.add('index', array.array('I', order))
+    starts = array.array('I', [0] * (len(brand_table) + 1))
+    for r in order:
+        starts[brand_column[r] + 1] += 1
+    for i in range(len(brand_table)):
+        starts[i + 1] += starts[i]
+    out.add('index.brand_start', starts)
+
+    out.write(path, len(rows), len(brand_table))
+    return len(rows)
+
+
+class _Strings:
+    """Read-only sequence of strings over an offsets section and a blob section."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class Snapshot:
+    """Memory-mapped reader; rows are decoded only when accessed."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        magic, version, _, self.row_count, self.brand_count, self.created, section_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f'{path} is not a radio catalogue snapshot')
+        if version != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f'{path} has snapshot format {version}; this reader supports {FORMAT_VERSION}')
+        self.version = version
+        self._sections = {}
+        for i in range(section_count):
+            name, offset, length, typecode = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b'\x00').decode('ascii')] = (offset, length, typecode.decode('ascii'))
+
+        self.brands = self._strings('brand')
+        self.brand_codes = self.section('brand.code')
+        self.index = self.section('index')
+        self.brand_start = self.section('index.brand_start')
+        self.ids = self.section('id')
+        self._text = {field: self._strings(field) for field in TEXT_COLUMNS}
+        self._interned = {field: (self._strings(field), self.section(f'{field}.code')) for field in INTERNED_COLUMNS}
+        self._ints = {field: self.section(field) for field in INT_COLUMNS}
+        self._updated_at = self.section('updated_at')
+        self._brand_fields = {field: self._strings(f'brand.{field}') for field in BRAND_COLUMNS}
+        self._brand_in_table = self.section('brand.in_table')
+
+    # --- raw access ---
+
+    def section(self, name):
+        """Section as a memoryview cast to its array type (a copy on big-endian hosts)."""
+        try:
+            offset, length, typecode = self._sections[name]
+        except KeyError:
+            raise SnapshotError(f'Snapshot has no section {name!r}')
+        view = memoryview(self._mmap)[offset:offset + length]
+        self._views.append(view)
+        if typecode == 'B':
+            return view
+        if sys.byteorder != 'little':
+            data = array.array(typecode, view.tobytes())
+            data.byteswap()
+            return data
+        cast = view.cast(typecode)
+        self._views.append(cast)
+        return cast
+
+    def numpy(self, name):
+        """Numeric section as a zero-copy NumPy array (requires numpy)."""
+        import numpy as np
+        offset, length, typecode = self._sections[name]
+        dtype = np.dtype(typecode if typecode != 'B' else 'u1').newbyteorder('<')
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def _strings(self, name):
+        return _Strings(self.section(f'{name}.off'), self.section(f'{name}.str'))
+
+    # --- rows ---
+
+    def __len__(self):
+        return self.row_count
+
+    def row(self, r):
+        """Radio row `r` (storage order) as a dict with the same keys as the model fields."""
+        record = {'id': self.ids[r], 'brand': self.brands[self.brand_codes[r]]}
+        for field, strings in self._text.items():
+            record[field] = strings[r]
+        for field, (table, codes) in self._interned.items():
+            record[field] = table[codes[r]]
+        for field, values in self._ints.items():
+            value = values[r]
+            record[field] = None if value == NULL_INT else value
+        record['updated_at'] = self._updated_at[r]
+        return record
+
+    def __iter__(self):
+        for r in range(self.row_count):
+            yield self.row(r)
+
+    def brand_code(self, name):
+        code = bisect.bisect_left(self.brands, name)
+        if code < len(self.brands) and self.brands[code] == name:
+            return code
+        return None
+
+    def brand(self, name):
+        """Brand table fields for `name`, or None when it is not in the Brand table."""
+        code = self.brand_code(name)
+        if code is None or not self._brand_in_table[code]:
+            return None
+        return dict({field: strings[code] for field, strings in self._brand_fields.items()}, name=name)
+
+    def _brand_range(self, name):
+        code = self.brand_code(name)
+        if code is None:
+            return 0, 0
+        return self.brand_start[code], self.brand_start[code + 1]
+
+    def lookup(self, brand, model):
+        """Radio dict for (brand, model) or None; binary search on the embedded index."""
+        lo, hi = self._brand_range(brand)
+        models = self._text['model']
+        pos = bisect.bisect_left(self.index, model, lo, hi, key=lambda r: models[r])
+        if pos < hi and models[self.index[pos]] == model:
+            return self.row(self.index[pos])
+        return None
+
+    def radios_for_brand(self, brand):
+        """Rows of one brand in model order."""
+        lo, hi = self._brand_range(brand)
+        return [self.row(self.index[pos]) for pos in range(lo, hi)]
+
+    # --- lifecycle ---
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,299 @@
+"""
+Precomputed catalogue statistics.
+
+    python manage.py refresh_catalogue_stats          # cron, or queued from the Jobs page
+    rows('brand_year', brand='Baofeng')               # what the stats page reads
+
+Each summary is a GROUP BY over Radio or FccGrant stored as a table the
+pages read instead of the source:
+
+- brand_year: radios per brand per intro_year
+- feature_adoption: radios per intro_year with GPS, APRS and DMR
+- grants_quarter: FCC grants per grantee per calendar quarter
+
+On PostgreSQL a summary is a materialized view with a unique index, and a
+refresh is REFRESH MATERIALIZED VIEW CONCURRENTLY, so readers keep seeing
+the previous rows while it runs. Other backends get a plain table; a
+refresh computes the summary and writes only the rows that differ, in one
+transaction. Either way a summary is only refreshed when its source
+changed since the last refresh (see source_fingerprint). Until the first
+refresh the pages show no rows.
+
+Migration 0020_stats_views creates the views. A materialized view blocks
+ALTER and DROP of the columns it reads, so on PostgreSQL a migrate whose
+plan has radios migrations on Radio or FccGrant drops them first and
+creates them again, from SUMMARIES, once it is done (see
+connect_migrate_signals). Should the migrate fail in between, the next
+read or refresh of a summary creates it again.
+
+An unknown intro_year is stored as 0.
+"""
+import time
+
+from django.apps import apps
+from django.db import connection, connections, migrations, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Count, Max
+from django.db.models.signals import post_migrate, pre_migrate
+from django.utils import timezone
+
+from .models import CatalogueVersion, Radio, FccGrant, StatsRefresh
+
+# Feature values that mean the radio does not have it; anything else
+# ("Yes", "Optional", "Digital", ...) counts as having it
+NEGATIVE_FLAGS = ('', 'NO', 'N', 'N/A', 'NONE', 'UNKNOWN', '-')
+FEATURES = ['gps', 'aprs', 'dmr']
+TEXT_COLUMNS = {'brand', 'grantee_code'}
+
+
+def _has(column):
+    negatives = ', '.join(f"'{value}'" for value in NEGATIVE_FLAGS)
+    return f"SUM(CASE WHEN UPPER(TRIM({column})) IN ({negatives}) THEN 0 ELSE 1 END)"
+
+
+def _year_quarter(vendor):
+    if vendor == 'postgresql':
+        return 'EXTRACT(YEAR FROM grant_date)::integer', 'EXTRACT(QUARTER FROM grant_date)::integer'
+    return "CAST(strftime('%Y', grant_date) AS INTEGER)", "(CAST(strftime('%m', grant_date) AS INTEGER) + 2) / 3"
+
+
+class Summary:
+    def __init__(self, name, source, key, values, select, title=''):
+        self.name = name
+        self.source = source
+        self.key = key
+        self.values = values
+        self._select = select
+        self.title = title
+
+    @property
+    def table(self):
+        return f'radios_stats_{self.name}'
+
+    @property
+    def columns(self):
+        return self.key + self.values
+
+    def select(self, vendor):
+        return self._select(vendor)
+
+
+SUMMARIES = {
+    summary.name: summary for summary in [
+        Summary(
+            'brand_year', Radio, ['brand', 'intro_year'], ['radios'],
+            lambda vendor: (
+                "SELECT brand, COALESCE(intro_year, 0) AS intro_year, COUNT(*) AS radios "
+                "FROM radios_radio GROUP BY brand, COALESCE(intro_year, 0)"
+            ),
+            title='Radios per brand per year',
+        ),
+        Summary(
+            'feature_adoption', Radio, ['intro_year'], ['radios'] + FEATURES,
+            lambda vendor: (
+                "SELECT COALESCE(intro_year, 0) AS intro_year, COUNT(*) AS radios, "
+                + ', '.join(f'{_has(feature)} AS {feature}' for feature in FEATURES)
+                + " FROM radios_radio GROUP BY COALESCE(intro_year, 0)"
+            ),
+            title='Feature adoption by year',
+        ),
+        Summary(
+            'grants_quarter', FccGrant, ['grantee_code', 'year', 'quarter'], ['grants', 'fcc_ids'],
+            lambda vendor: (
+                "SELECT grantee_code, {0} AS year, {1} AS quarter, COUNT(*) AS grants, "
+                "COUNT(DISTINCT fcc_id) AS fcc_ids FROM radios_fccgrant "
+                "WHERE grant_date IS NOT NULL GROUP BY grantee_code, {0}, {1}"
+            ).format(*_year_quarter(vendor)),
+            title='FCC grants per grantee per quarter',
+        ),
+    ]
+}
+
+
+def source_fingerprint(summary):
+    """
+    Row count and newest pk of the summary's source. FccGrant rows are only
+    ever inserted, so those two cover it. Radio rows are also edited in
+    place (a brand rename rewrites the brand of every radio and may leave
+    the count, the newest pk and even the newest updated_at as they were),
+    so for Radio the stored catalogue version is added: every committed
+    change to a radio or brand bumps it (see radios.caching).
+    """
+    fields = {'rows': Count('pk'), 'last_pk': Max('pk')}
+    if summary.source is Radio:
+        fields['updated'] = Max('updated_at')
+    stats = summary.source.objects.aggregate(**fields)
+    parts = [str(stats[name]) for name in fields]
+    if summary.source is Radio:
+        # Read the row, not the per-process cached value
+        parts.append(str(CatalogueVersion.objects.filter(pk=1).values_list('version', flat=True).first()))
+    return ':'.join(parts)
+
+
+def _create(cursor, summary, vendor):
+    if vendor == 'postgresql':
+        cursor.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {summary.table} AS {summary.select(vendor)}")
+        # REFRESH ... CONCURRENTLY needs a unique index over every row
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {summary.table}_key ON {summary.table} ({', '.join(summary.key)})"
+        )
+    else:
+        columns = ', '.join(f"{c} {'TEXT' if c in TEXT_COLUMNS else 'INTEGER'} NOT NULL" for c in summary.columns)
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {summary.table} ({columns})")
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {summary.table}_key ON {summary.table} ({', '.join(summary.key)})"
+        )
+
+
+def _exists(cursor, summary, vendor):
+    if vendor == 'postgresql':
+        cursor.execute("SELECT to_regclass(%s)", [summary.table])
+    else:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s", [summary.table])
+    row = cursor.fetchone()
+    return row is not None and row[0] is not None
+
+
+def _ensure(cursor, summary, vendor):
+    """
+    Create the summary if it is missing (a migrate that failed after
+    dropping the views); returns True when it did. A new materialized view
+    is computed at once, a new plain table is empty.
+    """
+    if _exists(cursor, summary, vendor):
+        return False
+    _create(cursor, summary, vendor)
+    return True
+
+
+def create_views(using='default'):
+    """Create every summary that does not exist yet; a new materialized view is computed at once."""
+    vendor = connections[using].vendor
+    with connections[using].cursor() as cursor:
+        for summary in SUMMARIES.values():
+            _create(cursor, summary, vendor)
+
+
+def drop_views(using='default'):
+    kind = 'MATERIALIZED VIEW' if connections[using].vendor == 'postgresql' else 'TABLE'
+    with connections[using].cursor() as cursor:
+        for summary in SUMMARIES.values():
+            cursor.execute(f"DROP {kind} IF EXISTS {summary.table}")
+
+
+def _views_migrated(using):
+    return ('radios', '0020_stats_views') in MigrationRecorder(connections[using]).applied_migrations()
+
+
+def _alters_sources(plan):
+    """Whether a migrate plan changes a table the summaries read."""
+    sources = {summary.source._meta.model_name for summary in SUMMARIES.values()}
+    for migration, backwards in plan:
+        if migration.app_label != 'radios':
+            continue
+        for operation in migration.operations:
+            if isinstance(operation, migrations.RunSQL):
+                return True
+            names = {getattr(operation, attr, None) for attr in ('model_name', 'name', 'old_name')}
+            if {str(name).lower() for name in names if name} & sources:
+                return True
+    return False
+
+
+def drop_before_migrate(sender, using='default', plan=None, **kwargs):
+    # Plain tables do not depend on their source, so only materialized views are in the way
+    if plan and connections[using].vendor == 'postgresql' and _alters_sources(plan):
+        drop_views(using)
+
+
+def recreate_after_migrate(sender, using='default', **kwargs):
+    # Also picks up a changed SELECT in SUMMARIES; the rows stay current for StatsRefresh
+    if connections[using].vendor == 'postgresql' and _views_migrated(using):
+        create_views(using)
+
+
+def connect_migrate_signals():
+    config = apps.get_app_config('radios')
+    pre_migrate.connect(drop_before_migrate, sender=config, dispatch_uid='stats_drop_before_migrate')
+    post_migrate.connect(recreate_after_migrate, sender=config, dispatch_uid='stats_recreate_after_migrate')
+
+
+def _write_changes(cursor, summary, vendor):
+    """Bring the plain table in line with a fresh SELECT; returns the number of rows written."""
+    width = len(summary.key)
+    cursor.execute(summary.select(vendor))
+    fresh = {tuple(row[:width]): tuple(row[width:]) for row in cursor.fetchall()}
+    cursor.execute(f"SELECT {', '.join(summary.columns)} FROM {summary.table}")
+    current = {tuple(row[:width]): tuple(row[width:]) for row in cursor.fetchall()}
+
+    where = ' AND '.join(f'{column} = %s' for column in summary.key)
+    gone = [key for key in current if key not in fresh]
+    changed = [key for key, values in fresh.items() if current.get(key) != values]
+    if gone or changed:
+        cursor.executemany(f"DELETE FROM {summary.table} WHERE {where}", gone + [k for k in changed if k in current])
+        placeholders = ', '.join(['%s'] * len(summary.columns))
+        cursor.executemany(
+            f"INSERT INTO {summary.table} ({', '.join(summary.columns)}) VALUES ({placeholders})",
+            [key + fresh[key] for key in changed],
+        )
+    return len(gone) + len(changed)
+
+
+def refresh(summary, force=False):
+    """
+    Refresh one summary if its source changed (or `force`). Returns the
+    StatsRefresh row, or None when the summary was already current.
+    """
+    fingerprint = source_fingerprint(summary)
+    last = StatsRefresh.objects.filter(name=summary.name).first()
+    if last and last.fingerprint == fingerprint and not force:
+        return None
+    start = time.perf_counter()
+    vendor = connection.vendor
+    with transaction.atomic(), connection.cursor() as cursor:
+        created = _ensure(cursor, summary, vendor)
+        if vendor == 'postgresql':
+            if not created:
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {summary.table}")
+            written = None
+        else:
+            written = _write_changes(cursor, summary, vendor)
+        cursor.execute(f"SELECT COUNT(*) FROM {summary.table}")
+        rows = cursor.fetchone()[0]
+        refreshed, _ = StatsRefresh.objects.update_or_create(name=summary.name, defaults={
+            'fingerprint': fingerprint,
+            'rows': rows,
+            'rows_written': written,
+            'duration_s': round(time.perf_counter() - start, 3),
+            'refreshed_at': timezone.now(),
+        })
+    return refreshed
+
+
+def refresh_all(names=None, force=False):
+    """{name: StatsRefresh or None} for the named summaries (all by default)."""
+    return {name: refresh(SUMMARIES[name], force) for name in names or SUMMARIES}
+
+
+def rows(name, **filters):
+    """
+    Precomputed rows of a summary as dicts, in key order. `filters` match
+    key columns exactly. Empty until the first refresh; a summary that has
+    gone missing since is computed again first.
+    """
+    summary = SUMMARIES[name]
+    if not StatsRefresh.objects.filter(name=name).exists():
+        return []
+    unknown = set(filters) - set(summary.key)
+    if unknown:
+        raise ValueError(f"{name} has no key column {', '.join(sorted(unknown))}")
+    sql = f"SELECT {', '.join(summary.columns)} FROM {summary.table}"
+    if filters:
+        sql += " WHERE " + ' AND '.join(f'{column} = %s' for column in filters)
+    sql += f" ORDER BY {', '.join(summary.key)}"
+    with connection.cursor() as cursor:
+        with transaction.atomic():
+            if _ensure(cursor, summary, connection.vendor) and connection.vendor != 'postgresql':
+                _write_changes(cursor, summary, connection.vendor)
+        cursor.execute(sql, list(filters.values()))
+        return [dict(zip(summary.columns, row)) for row in cursor.fetchall()]
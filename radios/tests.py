@@ -1,5 +1,8 @@
-from django.test import TestCase
-from .models import Radio
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .models import Radio, Brand
 
 
 class RadioModelTest(TestCase):
@@ -19,3 +22,1005 @@ class RadioModelTest(TestCase):
         radio = Radio.objects.get(model='UV-5R')
         self.assertEqual(radio.brand, 'Baofeng')
         self.assertEqual(radio.fcc_id, '2AJGM-UV5R')
+
+
+class MergeBrandRadiosCommandTest(TestCase):
+    def setUp(self):
+        Radio.objects.create(brand='Baofeng', model='UV-5R', intro_year=2012, notes='Classic')
+        Radio.objects.create(brand='Baofeng', model='BF-888S')
+        Radio.objects.create(brand='PO FUNG', model='UV-5R', fcc_id='2AJGM-UV5R')
+
+    def test_merge_moves_and_deduplicates(self):
+        call_command('merge_brand_radios', 'Baofeng', 'PO FUNG', stdout=StringIO())
+        self.assertFalse(Radio.objects.filter(brand='Baofeng').exists())
+        self.assertEqual(Radio.objects.filter(brand='PO FUNG').count(), 2)
+        merged = Radio.objects.get(brand='PO FUNG', model='UV-5R')
+        self.assertEqual(merged.fcc_id, '2AJGM-UV5R')
+        self.assertEqual(merged.intro_year, 2012)
+        self.assertIn('Classic', merged.notes)
+
+    def test_dry_run_writes_nothing(self):
+        call_command('merge_brand_radios', 'Baofeng', 'PO FUNG', '--dry-run', stdout=StringIO())
+        self.assertEqual(Radio.objects.filter(brand='Baofeng').count(), 2)
+
+
+class CleanGranteePrefixCommandTest(TestCase):
+    def setUp(self):
+        Brand.objects.create(name='PO FUNG', grantee_code='2AJGM')
+        Radio.objects.create(brand='PO FUNG', model='2AJGM-UV5R', fcc_id='2AJGM-UV5R')
+        Radio.objects.create(brand='PO FUNG', model='UV5R', intro_year=2012)
+        Radio.objects.create(brand='PO FUNG', model='2AJGMBF888S')
+        Radio.objects.create(brand='Other', model='2AJGM-X1')
+
+    def test_cleans_all_brands(self):
+        call_command('clean_grantee_prefix', stdout=StringIO())
+        models = set(Radio.objects.filter(brand='PO FUNG').values_list('model', flat=True))
+        self.assertEqual(models, {'UV5R', 'BF888S'})
+        merged = Radio.objects.get(brand='PO FUNG', model='UV5R')
+        self.assertEqual(merged.fcc_id, '2AJGM-UV5R')
+        self.assertEqual(merged.intro_year, 2012)
+        # Radios of brands without that grantee code are left alone
+        self.assertTrue(Radio.objects.filter(brand='Other', model='2AJGM-X1').exists())
+
+    def test_single_brand(self):
+        call_command('clean_grantee_prefix', 'Other', '2AJGM', stdout=StringIO())
+        self.assertTrue(Radio.objects.filter(brand='Other', model='X1').exists())
+        self.assertTrue(Radio.objects.filter(brand='PO FUNG', model='2AJGMBF888S').exists())
+
+    def test_chained_prefixes(self):
+        # ABCABCX -> ABCX lands on the name ABCX -> X is leaving; created first so its row is updated first
+        Radio.objects.create(brand='Chain', model='ABCABCX', intro_year=2020)
+        Radio.objects.create(brand='Chain', model='ABCX', intro_year=2010)
+        call_command('clean_grantee_prefix', 'Chain', 'ABC', stdout=StringIO())
+        models = dict(Radio.objects.filter(brand='Chain').values_list('model', 'intro_year'))
+        self.assertEqual(models, {'ABCX': 2020, 'X': 2010})
+
+
+class BrandSyncTest(TestCase):
+    def test_sync_radio_brands_creates_missing(self):
+        Brand.objects.create(name='Icom', grantee_code='AFJ')
+        Radio.objects.create(brand='Icom', model='IC-705')
+        Radio.objects.create(brand='Baofeng', model='UV-5R')
+        Radio.objects.create(brand='Baofeng', model='BF-888S')
+        call_command('sync_radio_brands', stdout=StringIO())
+        self.assertEqual(set(Brand.objects.values_list('name', flat=True)), {'Icom', 'Baofeng'})
+
+    def test_sync_brands_upserts_by_grantee_code(self):
+        from .brand_sync import sync_brands
+        Brand.objects.create(name='Icom', grantee_code='AFJ', country='')
+        Brand.objects.create(name='Yaesu', grantee_code='K66')
+        result = sync_brands(
+            [
+                {'grantee_code': 'AFJ', 'name': 'Icom', 'country': 'Japan'},
+                {'grantee_code': 'ALH', 'name': 'Kenwood', 'country': 'Japan'},
+                {'grantee_code': 'XXX', 'name': 'Yaesu', 'country': ''},
+            ],
+            update_fields=['name', 'country'],
+        )
+        self.assertEqual(result, {'created': 1, 'updated': 1, 'unchanged': 0, 'conflicts': 1})
+        self.assertEqual(Brand.objects.get(grantee_code='AFJ').country, 'Japan')
+        self.assertEqual(Brand.objects.get(grantee_code='ALH').name, 'Kenwood')
+
+
+class MergeRadiosViewTest(TestCase):
+    def setUp(self):
+        self.a = Radio.objects.create(brand='Baofeng', model='UV-5R', intro_year=2012)
+        self.b = Radio.objects.create(brand='Baofeng', model='UV-5R Plus', fcc_id='2AJGM-UV5RP')
+        self.c = Radio.objects.create(brand='Baofeng', model='UV5R')
+
+    def test_merge_keeps_selected_values_and_logs(self):
+        from .models import RadioMergeLog
+        data = {
+            'radio_ids': [self.a.pk, self.b.pk, self.c.pk],
+            'confirm': '1',
+            'fcc_id': str(self.b.pk),
+            'model': str(self.a.pk),
+        }
+        # The delete also cascades to RadioRelation edges of the merged radios
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('merge_radios'), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Radio.objects.count(), 1)
+        kept = Radio.objects.get()
+        self.assertEqual(kept.pk, self.a.pk)
+        self.assertEqual(kept.fcc_id, '2AJGM-UV5RP')
+        log = RadioMergeLog.objects.get()
+        self.assertEqual({r['pk'] for r in log.merged_radios}, {self.b.pk, self.c.pk})
+
+
+class MergeCandidateTest(TestCase):
+    def setUp(self):
+        Brand.objects.create(name='Baofeng', grantee_code='2AJGM')
+        self.a = Radio.objects.create(brand='Baofeng', model='UV-5R', intro_year=2012)
+        self.b = Radio.objects.create(brand='Baofeng', model='UV5R', fcc_id='2AJGM-UV5R')
+        self.c = Radio.objects.create(brand='Icom', model='IC-705')
+
+    def test_find_candidates_and_open_prefilled(self):
+        from .models import MergeCandidate
+        call_command('find_merge_candidates', stdout=StringIO())
+        candidate = MergeCandidate.objects.get()
+        self.assertEqual(candidate.radio_ids, [self.a.pk, self.b.pk])
+        self.assertEqual(candidate.score, 1.0)
+        response = self.client.get(reverse('merge_radios'), {'candidate': candidate.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].initial['fcc_id'], str(self.b.pk))
+
+    def test_bad_candidate_ids(self):
+        self.assertEqual(self.client.get(reverse('merge_radios'), {'candidate': 'x'}).status_code, 404)
+        response = self.client.post(reverse('merge_candidates'), {'dismiss': '1 OR 1'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_similar_models_are_grouped(self):
+        from .clustering import find_candidate_groups
+        rows = [(1, 'Tyt', 'MD-380', ''), (2, 'Tyt', 'MD380 ', ''), (3, 'Tyt', 'MD-UV380', '')]
+        groups = find_candidate_groups(rows, threshold=0.7)
+        self.assertEqual([pks for _, pks, _ in groups], [[1, 2]])
+
+    def test_grantee_blocks_follow_split_fcc_id(self):
+        from .clustering import find_candidate_groups, grantee_code_for
+        self.assertEqual(grantee_code_for('2AJGMUV5R', 'XYZ'), '2AJGM')
+        self.assertEqual(grantee_code_for('2AJGMUV-5R', 'XYZ'), '2AJGM')
+        self.assertEqual(grantee_code_for('', 'XYZ'), 'XYZ')
+        # Different brand names, so only the grantee block can pair them
+        rows = [(1, 'Baofeng', 'UV-5R', '2AJGMUV5R'), (2, 'Pofung', 'UV5R', '2AJGM-UV-5R')]
+        groups = find_candidate_groups(rows, threshold=0.7)
+        self.assertEqual([(pks, key) for _, pks, key in groups], [([1, 2], 'grantee:2AJGM:UV')])
+
+
+class QueryStatsMiddlewareTest(TestCase):
+    def test_server_timing_and_stats_endpoint(self):
+        from .middleware import request_stats
+        request_stats.reset()
+        Radio.objects.create(brand='Icom', model='IC-705')
+        response = self.client.get(reverse('radio_list'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        response = self.client.get(reverse('request_stats'), REMOTE_ADDR='127.0.0.1')
+        views = response.json()['views']
+        self.assertEqual(views['radio_list']['requests'], 1)
+        self.assertGreater(views['radio_list']['queries']['max'], 0)
+
+
+class ImportTelemetryTest(TestCase):
+    @override_settings(IMPORT_TRACE_MEMORY=True)
+    def test_import_brands_records_run(self):
+        from .models import ImportRun
+        call_command('import_brands', 'data/brands.csv', stdout=StringIO())
+        run = ImportRun.objects.get(kind='import_brands')
+        self.assertEqual(run.status, ImportRun.STATUS_OK)
+        self.assertGreater(run.rows, 0)
+        self.assertGreater(run.bytes, 0)
+        self.assertIn('db_write', run.stages)
+        self.assertIsNotNone(run.peak_memory_bytes)
+
+    def test_failed_run_is_recorded(self):
+        from .models import ImportRun
+        call_command('import_brands', 'data/missing.csv', stdout=StringIO())
+        self.assertEqual(ImportRun.objects.get().status, ImportRun.STATUS_ERROR)
+
+    def test_overlapping_runs_share_tracemalloc(self):
+        import tracemalloc
+        from .import_telemetry import ImportRecorder
+        first, second = ImportRecorder('a'), ImportRecorder('b')
+        first.start()
+        second.start()
+        first.stop()
+        self.assertTrue(tracemalloc.is_tracing())
+        second.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(first.peak_memory)
+        self.assertIsNone(second.peak_memory)
+        alone = ImportRecorder('c')
+        alone.start()
+        alone.stop()
+        self.assertIsNotNone(alone.peak_memory)
+
+
+class JobQueueTest(TestCase):
+    def test_confirm_import_runs_as_job(self):
+        import base64
+        import json
+        from .jobs import claim_next, run_job
+        from .models import Job
+        records = [{'brand': 'Baofeng', 'grantee_code': '2AJGM', 'model': 'UV5R'}]
+        payload = base64.b64encode(json.dumps(records).encode('utf-8')).decode('ascii')
+        response = self.client.post(reverse('import_grantee_radios'), {'confirm_import': '1', 'radio_data_b64': payload})
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertEqual(job.lock_keys, ['grantee:2AJGM'])
+
+        run_job(claim_next('test'), heartbeat_interval=None)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(job.result['created'], 1)
+        self.assertTrue(Radio.objects.filter(brand='Baofeng', model='UV5R').exists())
+        status = self.client.get(reverse('job_status', args=[job.pk])).json()
+        self.assertTrue(status['finished'])
+        self.assertEqual(status['percent'], 100)
+
+    def test_same_lock_key_never_runs_twice(self):
+        from .jobs import enqueue, claim_next
+        first = enqueue('sync_radio_brands', lock_keys=['grantee:ABC'])
+        enqueue('sync_radio_brands', lock_keys=['grantee:ABC'])
+        other = enqueue('sync_radio_brands', lock_keys=['grantee:XYZ'])
+        self.assertEqual(claim_next('a').pk, first.pk)
+        self.assertEqual(claim_next('b').pk, other.pk)
+        self.assertIsNone(claim_next('c'))
+
+    def test_catalogue_key_excludes_every_other_key(self):
+        from .jobs import enqueue, claim_next, run_job
+        grantee = enqueue('sync_radio_brands', lock_keys=['grantee:ABC'])
+        catalogue = enqueue('sync_radio_brands', lock_keys=['catalogue'])
+        later = enqueue('sync_radio_brands', lock_keys=['grantee:XYZ'])
+        self.assertEqual(claim_next('a').pk, grantee.pk)
+        # The catalogue job waits for the grantee job; the job queued after it may run
+        self.assertEqual(claim_next('b').pk, later.pk)
+        self.assertIsNone(claim_next('c'))
+        run_job(grantee, heartbeat_interval=None)
+        run_job(later, heartbeat_interval=None)
+        self.assertEqual(claim_next('c').pk, catalogue.pk)
+        enqueue('sync_radio_brands', lock_keys=['grantee:ABC'])
+        self.assertIsNone(claim_next('d'))
+
+    def test_merge_locks_both_brands(self):
+        from .models import Job
+        Brand.objects.create(name='Pofung', grantee_code='2AJGM')
+        self.client.post(reverse('job_list'), {
+            'kind': 'merge_brand_radios', 'source_brand': 'Pofung', 'target_brand': 'Baofeng',
+        })
+        self.assertEqual(Job.objects.get().lock_keys, ['brand:Baofeng', 'brand:Pofung', 'grantee:2AJGM'])
+
+    def test_queue_maintenance_command(self):
+        from .jobs import claim_next, run_job
+        from .models import Job
+        Radio.objects.create(brand='Yaesu', model='FT-60R')
+        self.client.post(reverse('job_list'), {'kind': 'sync_radio_brands'})
+        run_job(claim_next('test'), heartbeat_interval=None)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.STATUS_DONE, job.error)
+        self.assertTrue(Brand.objects.filter(name='Yaesu').exists())
+
+
+class IncrementalFccIngestTest(TestCase):
+    def rows(self, *specs):
+        from .fcc_ingest import normalize_row
+        return [
+            dict(normalize_row({'fcc_id': fcc_id, 'grant_date': grant_date, 'lower_freq_mhz': freq}), grantee_code='AFJ')
+            for fcc_id, grant_date, freq in specs
+        ]
+
+    def test_second_run_only_sees_the_delta(self):
+        from .fcc_ingest import classify_rows, record_rows
+        from .models import GranteeWatermark
+        first = self.rows(('AFJ-A1', '01/05/2020', '144.0'), ('AFJ-B2', '03/01/2021', '430.0'))
+        delta = classify_rows(first)
+        self.assertEqual(delta.counts['new'], 2)
+        record_rows(delta.states)
+        self.assertEqual(str(GranteeWatermark.objects.get(grantee_code='AFJ').last_grant_date), '2021-03-01')
+
+        second = first + self.rows(('AFJ-B2', '06/01/2022', '446.0'), ('AFJ-C3', '06/01/2022', '144.00000'))
+        delta = classify_rows(second)
+        self.assertEqual((delta.counts['new'], delta.counts['changed'], delta.counts['unchanged']), (1, 1, 1))
+        self.assertEqual(len(delta.rows), 2)
+        self.assertEqual(delta.rows_skipped, 2)
+
+    def test_state_is_keyed_on_split_fcc_id(self):
+        from .fcc_ingest import classify_rows, record_rows
+        from .models import GranteeWatermark
+        from .views_import import parse_fcc_id
+        self.assertEqual(parse_fcc_id('2AJGMUV5R', {'2AJGM': 'Baofeng', '2AJ': 'Other'}), ('2AJGM', 'UV5R'))
+        # Whatever grantee code an importer put on the rows, the stored state uses the FCC ID's
+        rows = [dict(row, grantee_code='2AJ') for row in self.rows(('2AJGM-UV5R', '01/05/2020', '144.0'))]
+        record_rows(classify_rows(rows).states)
+        self.assertTrue(GranteeWatermark.objects.filter(grantee_code='2AJGM').exists())
+        self.assertEqual(classify_rows(self.rows(('2AJGM-UV5R', '01/05/2020', '144.0'))).counts['unchanged'], 1)
+
+
+class FccXmlStreamTest(TestCase):
+    XML = (
+        '<?xml version="1.0" encoding="ISO-8859-1" standalone="no"?>\n<Results>\n'
+        '<Row><applicant_name>Soci\u00e9t\u00e9 A & B &amp; C</applicant_name><fcc_id>afj-a1</fcc_id>'
+        '<grant_date>01/05/2020</grant_date></Row>\n'
+        '<Row><applicant_name>Kenwood</applicant_name><fcc_id>AFJ-B2</fcc_id></Row>\n</Results>\n'
+    )
+
+    def parse(self, data, chunk_size):
+        from .fcc_xml import FccXmlParser
+        parser = FccXmlParser()
+        for i in range(0, len(data), chunk_size):
+            parser.feed(data[i:i + chunk_size])
+        return parser, parser.close()
+
+    def test_chunked_parse_uses_the_declared_encoding(self):
+        data = self.XML.encode('iso-8859-1')
+        # Every chunk size splits the declaration, a character reference or a bare '&' somewhere
+        for chunk_size in (1, 3, 7, 64, len(data)):
+            parser, records = self.parse(data, chunk_size)
+            self.assertEqual(parser.encoding, 'iso8859-1')
+            self.assertEqual([r['fcc_id'] for r in records], ['AFJ-A1', 'AFJ-B2'])
+            self.assertEqual(records[0]['applicant_name'], 'Soci\u00e9t\u00e9 A & B & C')
+            self.assertEqual(records[0]['grant_date'], '2020-01-05')
+
+    def test_undeclared_encoding_falls_back_to_latin1(self):
+        data = self.XML.split('\n', 1)[1].encode('iso-8859-1')
+        parser, records = self.parse(data, 5)
+        self.assertEqual(parser.encoding, 'iso8859-1')
+        self.assertEqual(records[0]['applicant_name'], 'Soci\u00e9t\u00e9 A & B & C')
+        parser, records = self.parse(data.decode('iso-8859-1').encode('utf-8'), 5)
+        self.assertEqual((parser.encoding, records[0]['applicant_name']), ('utf-8', 'Soci\u00e9t\u00e9 A & B & C'))
+
+    def test_upload_is_parsed_by_the_handler(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import ImportRun
+        from unittest import mock
+        upload = SimpleUploadedFile('AFJ.xml', self.XML.encode('iso-8859-1'), content_type='text/xml')
+        # data/results.xml (the FCC grantee list) is not part of the repository
+        with mock.patch('radios.views_import.load_grantee_map', return_value={'AFJ': 'Kenwood'}):
+            response = self.client.post(reverse('import_grantee_radios'), {'xml_file': upload})
+        self.assertEqual([r['model'] for r in response.context['preview']], ['A1', 'B2'])
+        self.assertEqual(type(response.wsgi_request.FILES['xml_file']).__name__, 'StreamedXmlFile')
+        run = ImportRun.objects.get(kind='grantee_xml_preview')
+        self.assertEqual((run.rows, run.counts['encoding']), (2, 'iso8859-1'))
+        broken = SimpleUploadedFile('bad.xml', b'<Results><Row></Results>', content_type='text/xml')
+        response = self.client.post(reverse('import_grantee_radios'), {'xml_file': broken})
+        self.assertContains(response, 'XML parsing error')
+
+
+class GranteeBatchImportTest(TestCase):
+    GRANTEES = {'AUJ': 'Midland', 'AFJ': 'Kenwood'}
+
+    def upload(self):
+        import io
+        import zipfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write('data/AFJauthorization_search_results.xml', 'exports/AFJ.xml')
+            # The same export as the loose file below; its rows count once
+            zf.write('data/AUJauthorization_search_results.xml', 'exports/AUJ.xml')
+        with open('data/AUJauthorization_search_results.xml', 'rb') as f:
+            loose = SimpleUploadedFile('AUJ.xml', f.read(), content_type='text/xml')
+        return [loose, SimpleUploadedFile('exports.zip', archive.getvalue(), content_type='application/zip')]
+
+    def test_files_and_zip_give_one_merged_preview(self):
+        from unittest import mock
+        from django.test import override_settings
+        from .jobs import claim_next, run_job
+        from .models import Job
+        with mock.patch('radios.views_import.load_grantee_map', return_value=self.GRANTEES), \
+                override_settings(IMPORT_PARSE_WORKERS=2):
+            response = self.client.post(reverse('import_grantee_radios'), {'xml_file': self.upload()})
+        self.assertEqual([f.name for f in response.context['files']], ['AUJ.xml', 'exports/AFJ.xml', 'exports/AUJ.xml'])
+        preview = response.context['preview']
+        keys = [(r['grantee_code'], r['model']) for r in preview]
+        self.assertEqual(len(keys), len(set(keys)))
+        subtotals = {row['grantee_code']: row for row in response.context['subtotals']}
+        self.assertEqual(set(subtotals), {'AUJ', 'AFJ'})
+        self.assertEqual(subtotals['AUJ']['files'], 2)
+        self.assertEqual(subtotals['AUJ']['rows'], 2 * subtotals['AUJ']['rows_delta'])
+        self.assertEqual(sum(row['radios'] for row in subtotals.values()), len(preview))
+
+        response = self.client.post(reverse('import_grantee_radios'), {
+            'confirm_import': '1',
+            'radio_data_b64': response.context['radio_data_b64'],
+            'row_state_b64': response.context['row_state_b64'],
+        })
+        job = Job.objects.get()
+        self.assertEqual(job.lock_keys, ['grantee:AFJ', 'grantee:AUJ'])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            run_job(claim_next('test'), heartbeat_interval=None)
+        job.refresh_from_db()
+        self.assertEqual(job.result['created'], len(preview))
+        self.assertIn('2 grantees', job.message)
+        # One transaction: a single catalogue version bump once it commits
+        self.assertEqual(len(callbacks), 1)
+        # bulk_create skips save(), so the FCC ID parts are filled in explicitly
+        self.assertEqual(set(Radio.objects.filter(brand='Midland').values_list('grantee_code', flat=True)), {'AUJ'})
+
+    def test_archive_members_past_the_limit_are_reported(self):
+        from unittest import mock
+        from .fcc_xml import parse_uploads
+        with mock.patch('radios.fcc_xml.MAX_ZIP_MEMBERS', 1):
+            parsed = parse_uploads(self.upload()[1:], workers=1)
+        self.assertEqual([p.name for p in parsed], ['exports.zip', 'exports/AFJ.xml'])
+        self.assertIn('1 of its 2 .xml files were not read', parsed[0].error)
+
+
+class FccGrantTest(TestCase):
+    def test_load_grants_and_show_history(self):
+        from .models import FccGrant
+        call_command('load_fcc_grants', 'data/AUJauthorization_search_results.xml', stdout=StringIO())
+        self.assertEqual(FccGrant.objects.count(), 23)
+        # Reloading the same export adds nothing
+        call_command('load_fcc_grants', 'data/AUJauthorization_search_results.xml', stdout=StringIO())
+        self.assertEqual(FccGrant.objects.count(), 23)
+
+        radio = Radio.objects.create(brand='AUJ', model='PXDZ558U001', fcc_id='AUJ-PXDZ558U001')
+        response = self.client.get(reverse('radio_detail', args=[radio.pk]))
+        self.assertEqual(len(response.context['fcc_grants']), 2)
+        self.assertContains(response, 'FCC Grant History')
+
+    def test_loaded_grants_do_not_hide_rows_from_the_radio_import(self):
+        from unittest import mock
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        call_command('load_fcc_grants', 'data/2AJTB_authorization_search_results.xml', stdout=StringIO())
+        with open('data/2AJTB_authorization_search_results.xml', 'rb') as f:
+            upload = SimpleUploadedFile('2AJTB.xml', f.read(), content_type='text/xml')
+        with mock.patch('radios.views_import.load_grantee_map', return_value={'2AJTB': 'Tidradio'}):
+            response = self.client.post(reverse('import_grantee_radios'), {'xml_file': upload})
+        counts = response.context['delta']
+        self.assertEqual((counts['new'], counts['unchanged']), (5, 0))
+
+
+class CatalogueStatsTest(TestCase):
+    def setUp(self):
+        from datetime import date
+        from .models import FccGrant
+        Radio.objects.create(brand='Baofeng', model='UV-5R', intro_year=2012, gps='No', aprs='')
+        Radio.objects.create(brand='Baofeng', model='UV-82', intro_year=2014, gps='Yes', dmr='No')
+        Radio.objects.create(brand='Anytone', model='AT-D878UV', intro_year=2014, gps='Optional', aprs='Analog', dmr='Yes')
+        for n, grant_date in enumerate([date(2020, 2, 1), date(2020, 3, 30), date(2020, 7, 4)]):
+            FccGrant.objects.create(row_hash=str(n), grantee_code='2AJGM', product_code='UV5R', fcc_id='2AJGM-UV5R', grant_date=grant_date)
+
+    def get_json(self, **params):
+        response = self.client.get(reverse('catalogue_stats_json'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_refresh_and_read(self):
+        # Nothing is computed before the first refresh
+        self.assertEqual(self.get_json(summary='brand_year')['brand_year']['rows'], [])
+        call_command('refresh_catalogue_stats', stdout=StringIO())
+        data = self.get_json()
+        self.assertEqual(data['feature_adoption']['rows'], [
+            {'intro_year': 2012, 'radios': 1, 'gps': 0, 'aprs': 0, 'dmr': 0},
+            {'intro_year': 2014, 'radios': 2, 'gps': 2, 'aprs': 1, 'dmr': 1},
+        ])
+        self.assertEqual(data['grants_quarter']['rows'], [
+            {'grantee_code': '2AJGM', 'year': 2020, 'quarter': 1, 'grants': 2, 'fcc_ids': 1},
+            {'grantee_code': '2AJGM', 'year': 2020, 'quarter': 3, 'grants': 1, 'fcc_ids': 1},
+        ])
+        rows = self.get_json(summary='brand_year', brand='Baofeng', intro_year='2014')['brand_year']['rows']
+        self.assertEqual(rows, [{'brand': 'Baofeng', 'intro_year': 2014, 'radios': 1}])
+        response = self.client.get(reverse('catalogue_stats'), {'brand': 'Anytone', 'grantee_code': '2AJGM'})
+        self.assertContains(response, '2020 Q3')
+        self.assertEqual(len(response.context['brand_year']), 1)
+        self.assertEqual(self.client.get(reverse('catalogue_stats_json'), {'year': 'x'}).status_code, 400)
+
+    def test_refresh_only_changed_summaries(self):
+        from .stats import refresh_all
+        refresh_all()
+        self.assertEqual(refresh_all(), {'brand_year': None, 'feature_adoption': None, 'grants_quarter': None})
+        Radio.objects.filter(model='UV-5R').delete()
+        Radio.objects.create(brand='Yaesu', model='FT-60R')
+        refreshed = refresh_all()
+        self.assertIsNone(refreshed['grants_quarter'])
+        # One brand-year row gone, one added
+        self.assertEqual(refreshed['brand_year'].rows_written, 2)
+        rows = self.get_json(summary='brand_year')['brand_year']['rows']
+        self.assertIn({'brand': 'Yaesu', 'intro_year': 0, 'radios': 1}, rows)
+        self.assertNotIn(2012, [row['intro_year'] for row in rows])
+
+    def test_bulk_rename_is_a_source_change(self):
+        from .caching import catalogue_changes
+        from .stats import refresh_all
+        refresh_all()
+        # Count, newest pk and newest updated_at all stay as they were
+        with self.captureOnCommitCallbacks(execute=True), catalogue_changes():
+            Radio.objects.filter(brand='Anytone').update(brand='AnyTone')
+        refreshed = refresh_all()
+        self.assertIsNone(refreshed['grants_quarter'])
+        self.assertEqual(refreshed['brand_year'].rows_written, 2)
+        self.assertIn('AnyTone', [row['brand'] for row in self.get_json(summary='brand_year')['brand_year']['rows']])
+
+    def test_views_come_from_the_migration(self):
+        from django.db import connection
+        from .stats import SUMMARIES
+        tables = set(connection.introspection.table_names())
+        self.assertLessEqual({summary.table for summary in SUMMARIES.values()}, tables)
+
+    def test_missing_view_is_created_again(self):
+        from .stats import drop_views, refresh_all
+        refresh_all()
+        # A migrate that failed between dropping and recreating the views
+        drop_views()
+        rows = self.get_json(summary='feature_adoption')['feature_adoption']['rows']
+        self.assertEqual([row['intro_year'] for row in rows], [2012, 2014])
+        drop_views()
+        self.assertEqual(refresh_all(force=True)['brand_year'].rows, 3)
+
+    def test_only_migrations_on_the_sources_drop_the_views(self):
+        from django.db import connection
+        from django.db.migrations.loader import MigrationLoader
+        from .stats import _alters_sources
+        nodes = MigrationLoader(connection).graph.nodes
+        self.assertTrue(_alters_sources([(nodes['radios', '0013_radio_fcc_id_parts'], False)]))
+        self.assertTrue(_alters_sources([(nodes['radios', '0012_fccgrant'], True)]))
+        self.assertFalse(_alters_sources([(nodes['radios', '0017_stats_refresh'], False)]))
+        self.assertFalse(_alters_sources([(nodes['admin', '0001_initial'], False)]))
+
+
+class CachedRenderingTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.radio = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R')
+
+    def test_list_is_cached_until_the_catalogue_changes(self):
+        url = reverse('radio_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'UV-5R')
+        with self.captureOnCommitCallbacks(execute=True):
+            Radio.objects.create(brand='Baofeng', model='BF-F8HP')
+        self.assertContains(self.client.get(url), 'BF-F8HP')
+
+    def test_bulk_changes_bump_the_version_once(self):
+        from .caching import catalogue_changes, catalogue_version
+        version = catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with catalogue_changes():
+                Radio.objects.create(brand='Baofeng', model='UV-82')
+                Radio.objects.filter(brand='Baofeng').update(notes='Updated')
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(catalogue_version(), version)
+
+    def test_brand_rename_reaches_cached_fragments(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        Radio.objects.filter(pk=self.radio.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        detail = reverse('radio_detail', args=[self.radio.pk])
+        self.client.get(reverse('radio_list'))
+        last_modified = self.client.get(detail)['Last-Modified']
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rename_brand_global', 'Baofeng', 'Pofung', stdout=StringIO())
+        self.assertNotContains(self.client.get(reverse('radio_list')), 'Baofeng')
+        response = self.client.get(detail, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Baofeng')
+
+    def test_version_is_shared_through_the_database(self):
+        from django.core.cache import cache
+        from .caching import bump_catalogue_version, catalogue_version, VERSION_KEY
+        version = catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_catalogue_version()
+        # Another process keeps its own copy of the counter until VERSION_TTL runs out
+        cache.set(VERSION_KEY, version)
+        self.assertEqual(catalogue_version(), version)
+        cache.delete(VERSION_KEY)
+        self.assertEqual(catalogue_version(), version + 1)
+
+    def test_detail_conditional_get(self):
+        url = reverse('radio_detail', args=[self.radio.pk])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncAggregatesTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for brand, model in [('Baofeng', 'UV-5R'), ('Baofeng', 'UV-82'), ('Yaesu', 'FT-60R')]:
+            Radio.objects.create(brand=brand, model=model)
+
+    async def test_async_aggregates_match_sync(self):
+        from asgiref.sync import sync_to_async
+        from .aggregates import adashboard_stats, alist_aggregates, dashboard_stats, list_aggregates
+        stats = await adashboard_stats()
+        self.assertEqual(stats['total_radios'], 3)
+        self.assertEqual(stats['total_brands'], 2)
+        self.assertEqual(stats['top_brands'][0], {'brand': 'Baofeng', 'count': 2})
+        self.assertEqual(stats, await sync_to_async(dashboard_stats)())
+        self.assertEqual(await alist_aggregates(), await sync_to_async(list_aggregates)())
+
+    async def test_async_views(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.test import AsyncRequestFactory
+        from .views import AsyncRadioListView, adashboard_view
+        request = AsyncRequestFactory().get('/radios/', {'brand': 'Yaesu'})
+        request.user, request.session = AnonymousUser(), {}
+        request._messages = FallbackStorage(request)
+        response = await AsyncRadioListView.as_view()(request)
+        self.assertContains(response, 'FT-60R')
+        self.assertNotContains(response, 'UV-82')
+        response = await adashboard_view(request)
+        self.assertContains(response, 'UV-82')
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from . import autocomplete
+        cache.clear()
+        self.addCleanup(cache.clear)
+        autocomplete._index.version = None
+        for model in ['UV-5R', 'UV-82', 'BF-F8HP']:
+            Radio.objects.create(brand='Baofeng', model=model)
+        Radio.objects.create(brand='Uniden', model='BC125AT', fcc_id='AMWUB371')
+        Brand.objects.create(name='Unicom', grantee_code='UNC')
+
+    def complete(self, prefix, **kwargs):
+        from .autocomplete import complete
+        return [(r['kind'], r['value']) for r in complete(prefix, **kwargs)]
+
+    def test_prefix_lookup_and_ranking(self):
+        # Normalized keys: punctuation and case are ignored
+        self.assertEqual(self.complete('uv5')[0], ('model', 'UV-5R'))
+        self.assertEqual(self.complete('baofeng uv8'), [('model', 'UV-82')])
+        self.assertEqual(self.complete('amwub'), [('fcc_id', 'AMWUB371')])
+        # Exact key first, then brands with more radios; Unicom has none
+        self.assertEqual(self.complete('uni', kinds=['brand']), [('brand', 'Uniden'), ('brand', 'Unicom')])
+        self.assertEqual(self.complete('u', limit=2), [('model', 'UV-5R'), ('model', 'UV-82')])
+
+    def test_long_ranges_rank_every_key(self):
+        from unittest import mock
+        from . import autocomplete
+        for model in ['UA-1', 'UA-2']:
+            Radio.objects.create(brand='Acme', model=model)
+        # 'u' now matches more keys than are scanned; the ones sorting first are the rarer brand's
+        with mock.patch.object(autocomplete, 'MAX_SCAN', 2):
+            autocomplete._index.version = None
+            self.assertEqual(self.complete('u', limit=2), [('model', 'UV-5R'), ('model', 'UV-82')])
+            self.assertIn('u', autocomplete._index.tops)
+            self.assertEqual(self.complete('u', limit=1, kinds=['brand']), [('brand', 'Uniden')])
+
+    def test_signals_update_the_index_in_place(self):
+        from . import autocomplete
+        self.complete('uv')
+        with self.captureOnCommitCallbacks(execute=True):
+            radio = Radio.objects.create(brand='Baofeng', model='UV-17')
+        version = autocomplete._index.version
+        self.assertIn(('model', 'UV-17'), self.complete('uv1'))
+        self.assertEqual(autocomplete._index.version, version)
+        with self.captureOnCommitCallbacks(execute=True):
+            radio.delete()
+        self.assertEqual(self.complete('uv1'), [])
+
+    def test_bulk_changes_rebuild(self):
+        from .caching import catalogue_changes
+        self.complete('uv')
+        with self.captureOnCommitCallbacks(execute=True):
+            with catalogue_changes():
+                Radio.objects.filter(model='UV-82').update(model='UV-82HP')
+        self.assertEqual(self.complete('uv82'), [('model', 'UV-82HP')])
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('radio_autocomplete'), {'q': 'bf', 'kind': 'model'})
+        self.assertEqual(response.json()['results'][0]['label'], 'Baofeng BF-F8HP')
+
+
+class FccIdPartsTest(TestCase):
+    def test_parts_are_derived_on_save(self):
+        radio = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2ajgm-uv5r')
+        self.assertEqual((radio.grantee_code, radio.product_code, radio.fcc_id_key), ('2AJGM', 'UV5R', '2AJGMUV5R'))
+        radio.fcc_id = 'AMWUB371'
+        radio.save(update_fields=['fcc_id'])
+        radio.refresh_from_db()
+        self.assertEqual((radio.grantee_code, radio.product_code, radio.fcc_id_key), ('AMW', 'UB371', 'AMWUB371'))
+
+    def test_backfill_and_reverse_lookup(self):
+        radio = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R')
+        # Rows written before the columns existed
+        Radio.objects.filter(pk=radio.pk).update(grantee_code='', product_code='', fcc_id_key='')
+        out = StringIO()
+        call_command('backfill_fcc_id_parts', stdout=out)
+        self.assertIn('Updated FCC ID parts of 1 of 1 radios', out.getvalue())
+        for spelling in ['2AJGM-UV5R', '2ajgmuv5r', '2AJGM UV5R']:
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse('radio_by_fcc_id', args=[spelling]))
+            self.assertRedirects(response, radio.get_absolute_url(), fetch_redirect_response=False)
+        data = self.client.get(reverse('radio_by_fcc_id_json', args=['2AJGM--uv5r'])).json()
+        self.assertEqual([r['id'] for r in data['radios']], [radio.pk])
+        self.assertEqual(self.client.get(reverse('radio_by_fcc_id', args=['XYZ123'])).status_code, 404)
+
+    def test_punctuation_query_does_not_match_everything(self):
+        from .views import filter_radios
+        Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R')
+        Radio.objects.create(brand='Yaesu', model='FT60R', fcc_id='K6620500X30')
+        self.assertEqual([r.model for r in filter_radios(Radio.objects.all(), '-')], ['UV-5R'])
+        self.assertFalse(filter_radios(Radio.objects.all(), '--').exists())
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(User.objects.create_superuser('admin', '', 'pw'))
+        Brand.objects.create(name='Baofeng')
+        self.uv5r = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R', intro_year=2012, dmr='No')
+        self.h777 = Radio.objects.create(brand='Retevis', model='H777', fcc_id='YAMH777', intro_year=2014)
+        self.url = reverse('admin:radios_radio_changelist')
+
+    def test_filters_come_from_brand_table_and_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        filters = {spec.parameter_name: [value for value, _ in spec.lookup_choices] for spec in response.context['cl'].filter_specs}
+        self.assertEqual(filters['brand'], ['Baofeng'])
+        self.assertEqual(filters['intro_year'], ['2012', '2014'])
+        self.assertEqual(filters['dmr'], ['No'])
+        self.assertIsNone(response.context['cl'].full_result_count)
+        response = self.client.get(self.url, {'intro_year': '2014'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.h777])
+        # Retevis has no Brand row but still filters
+        response = self.client.get(self.url, {'brand': 'Retevis'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.h777])
+
+    def test_prefix_and_fcc_id_search(self):
+        def found(term):
+            return set(self.client.get(self.url, {'q': term}).context['cl'].result_list)
+        self.assertEqual(found('uv-5'), {self.uv5r})
+        self.assertEqual(found('retev'), {self.h777})
+        self.assertEqual(found('5R'), set())
+        self.assertEqual(found('2ajgm uv'), {self.uv5r})
+
+
+class BulkEditTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.radios = [Radio.objects.create(brand='TYT', model=f'MD-{n}', website='http://bad.example') for n in (380, 390, 9600)]
+        self.other = Radio.objects.create(brand='Baofeng', model='UV-5R')
+
+    def test_web_bulk_edit_is_one_update(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .caching import catalogue_version
+        url = reverse('bulk_edit_radios')
+        response = self.client.get(url, {'brand': 'tyt'})
+        self.assertEqual(response.context['count'], 3)
+        self.client.get(reverse('radio_list'))
+        version = catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'brand': 'tyt', 'apply': '1', 'set_dmr': 'on', 'dmr': 'Yes', 'set_website': 'on', 'website': ''})
+        self.assertRedirects(response, reverse('radio_list'), fetch_redirect_response=False)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in queries), 1)
+        self.assertNotEqual(catalogue_version(), version)
+        for radio in self.radios:
+            old_updated_at = radio.updated_at
+            radio.refresh_from_db()
+            self.assertEqual((radio.dmr, radio.website), ('Yes', ''))
+            self.assertGreater(radio.updated_at, old_updated_at)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.dmr, '')
+        # Nothing ticked: the form asks again instead of writing
+        response = self.client.post(url, {'radio_ids': [self.other.pk], 'apply': '1'})
+        self.assertEqual(response.context['count'], 1)
+        self.assertTrue(response.context['form'].errors)
+
+    def test_json_bulk_edit(self):
+        url = reverse('bulk_edit_json')
+        ids = [r.pk for r in self.radios[:2]]
+        response = self.client.post(url, {'ids': ids, 'changes': {'intro_year': 2015}, 'dry_run': True}, content_type='application/json')
+        self.assertEqual(response.json(), {'count': 2, 'applied': False})
+        self.assertFalse(Radio.objects.filter(intro_year=2015).exists())
+        response = self.client.post(url, {'ids': ids, 'changes': {'intro_year': 2015}}, content_type='application/json')
+        self.assertEqual(response.json(), {'count': 2, 'applied': True})
+        rows = {str(self.radios[0].pk): {'intro_year': 2014}, str(self.radios[2].pk): {'intro_year': 2017, 'website': None}}
+        response = self.client.post(url, {'rows': rows}, content_type='application/json')
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(
+            list(Radio.objects.filter(brand='TYT').values_list('intro_year', 'website')),
+            [(2014, 'http://bad.example'), (2015, 'http://bad.example'), (2017, '')],
+        )
+        response = self.client.post(url, {'ids': ids, 'changes': {'model': 'X', 'intro_year': 'soon'}}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'model', 'intro_year'})
+
+    def test_admin_actions(self):
+        from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', '', 'pw'))
+        url = reverse('admin:radios_radio_changelist')
+        selected = {'action': 'bulk_edit_fields', ACTION_CHECKBOX_NAME: [r.pk for r in self.radios]}
+        response = self.client.post(url, selected)
+        self.assertEqual(response.context['count'], 3)
+        response = self.client.post(url, dict(selected, apply='1', set_gps='on', gps='No'))
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(Radio.objects.filter(gps='No').count(), 3)
+        # "Select all" on the brand=TYT changelist: the filter decides, not the checked boxes
+        self.client.post(f'{url}?brand=TYT', {'action': 'delete_radios', 'select_across': '1', ACTION_CHECKBOX_NAME: [self.other.pk], 'apply': '1'})
+        self.assertEqual(list(Radio.objects.all()), [self.other])
+
+
+class RadioFamilyTest(TestCase):
+    def test_split_references(self):
+        from .families import split_references
+        self.assertEqual(
+            split_references('Radtel RT-860 / BinTolk BT7700, AnyTone AT-D868/878 (Base)'),
+            [('Radtel RT-860', ''), ('BinTolk BT7700', ''), ('AnyTone AT-D868/878', 'Base')],
+        )
+        self.assertEqual(split_references('N/A'), [])
+        self.assertEqual(split_references('baofengradio.com'), [])
+
+    def test_build_families(self):
+        uv5r = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R')
+        f8 = Radio.objects.create(brand='Baofeng', model='BF-F8+', rebadges_clones='Baofeng UV-5R (Variant)')
+        # Another spelling of the same FCC ID joins the family too
+        pofung = Radio.objects.create(brand='Pofung', model='UV5R', fcc_id='2AJGMUV5R')
+        h777 = Radio.objects.create(brand='Retevis', model='H777')
+        bf888 = Radio.objects.create(brand='Baofeng', model='BF-888S', rebadges_clones='Retevis H777, Arcshell AR-5')
+        lone = Radio.objects.create(brand='Icom', model='IC-705')
+        out = StringIO()
+        call_command('build_radio_families', stdout=out)
+        self.assertIn('Stored 3 relations in 2 families', out.getvalue())
+        self.assertIn('1 references not in the catalogue', out.getvalue())
+        for radio in (uv5r, f8, pofung, h777, bf888, lone):
+            radio.refresh_from_db()
+        self.assertEqual({f8.family_id, pofung.family_id}, {uv5r.pk})
+        self.assertEqual(bf888.family_id, h777.pk)
+        self.assertIsNone(lone.family_id)
+
+        response = self.client.get(reverse('radio_detail', args=[uv5r.pk]))
+        self.assertEqual([r.pk for r in response.context['family']], [f8.pk, pofung.pk])
+        data = self.client.get(reverse('radio_family', args=[h777.pk])).json()
+        self.assertEqual([r['id'] for r in data['family']], [bf888.pk])
+
+
+@override_settings(SIMILAR_RADIOS_PATH='')
+class SimilarRadiosTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from . import similarity
+        cache.clear()
+        self.addCleanup(cache.clear)
+        similarity._index = similarity.SpecIndex()
+        handheld = dict(freq_bands_tx='VHF, UHF', power_watts='5W', gps='No', dmr='No')
+        self.uv5r = Radio.objects.create(brand='Baofeng', model='UV-5R', battery_mah=1800, cost_approx='$25', intro_year=2012, **handheld)
+        self.uv82 = Radio.objects.create(brand='Baofeng', model='UV-82', battery_mah=2800, cost_approx='$30', intro_year=2014, **handheld)
+        dmr = dict(handheld, gps='Yes', dmr='Yes')
+        self.rt3s = Radio.objects.create(brand='Retevis', model='RT3S', battery_mah=2000, cost_approx='$90', intro_year=2019, **dmr)
+        self.md390 = Radio.objects.create(brand='TYT', model='MD-UV390', battery_mah=3000, cost_approx='$120', intro_year=2018, **dmr)
+        self.mobile = Radio.objects.create(
+            brand='Yaesu', model='FTM-400', freq_bands_tx='VHF, UHF', power_watts='50W', cost_approx='$500', intro_year=2014, gps='Yes', dmr='No',
+        )
+        Radio.objects.create(brand='Unknown', model='No specs')
+
+    def similar(self, radio, **params):
+        response = self.client.get(reverse('radio_similar', args=[radio.pk]), params)
+        return [r['model'] for r in response.json()['similar']]
+
+    def test_encode(self):
+        from .similarity import BANDS, encode
+        bands = dict(zip(BANDS, encode('Tri-Band (220)', '2W / 5W', None, '$100-150', None, 'Yes', '', 'No', '', '')))
+        self.assertEqual(bands, {'hf': 0, '6m': 0, 'vhf': 1, '220': 1, 'uhf': 1, 'gmrs': 0})
+        self.assertEqual(dict(zip(BANDS, encode('136-600Mhz', '', None, '', None, '', '', '', '', ''))), {'hf': 0, '6m': 0, 'vhf': 1, '220': 1, 'uhf': 1, 'gmrs': 0})
+
+    def test_nearest_by_specs(self):
+        # The radio without specs is never suggested
+        similar = self.similar(self.uv5r)
+        self.assertEqual(similar[:2], ['UV-82', 'RT3S'])
+        self.assertEqual(len(similar), 4)
+        self.assertEqual(self.similar(self.rt3s, k=1), ['MD-UV390'])
+        self.assertEqual(self.similar(self.rt3s, k=1, metric='cosine'), ['MD-UV390'])
+        self.assertEqual(self.client.get(reverse('radio_similar', args=[self.rt3s.pk]), {'metric': 'x'}).status_code, 400)
+        response = self.client.get(reverse('radio_detail', args=[self.uv82.pk]))
+        self.assertEqual(response.context['similar_radios'][0], self.uv5r)
+        self.assertContains(response, 'Similar Radios')
+
+    def test_incremental_sync_and_stored_neighbours(self):
+        import os
+        import tempfile
+        from unittest import mock
+        from . import similarity
+        self.assertEqual(self.similar(self.md390, k=1), ['RT3S'])
+        # Small enough a catalogue that two changes would otherwise mean a full rebuild
+        self.enterContext(mock.patch.object(similarity, 'REBUILD_SHARE', 10))
+        with self.captureOnCommitCallbacks(execute=True):
+            clone = Radio.objects.create(
+                brand='Radioddity', model='GD-77', freq_bands_tx='VHF, UHF', power_watts='5W', battery_mah=3000,
+                cost_approx='$120', intro_year=2018, gps='Yes', dmr='Yes',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uv82.delete()
+        self.assertEqual(self.similar(self.md390, k=2), ['GD-77', 'RT3S'])
+        self.assertNotIn('UV-82', self.similar(self.uv5r))
+        # Synced in place rather than rebuilt
+        self.assertGreater(similarity._index.changed, 0)
+
+        path = os.path.join(tempfile.mkdtemp(), 'similar.npz')
+        self.addCleanup(os.remove, path)
+        call_command('build_similar_radios', path, neighbours=2, stdout=StringIO())
+        index = similarity.SpecIndex()
+        index.load(path)
+        self.assertIsNotNone(index.neighbours)
+        self.assertEqual([pk for pk, _ in index.similar(self.md390.pk, k=2)], [clone.pk, self.rt3s.pk])
+
+
+class SnapshotTest(TestCase):
+    def test_export_lookup_and_import(self):
+        import os
+        import tempfile
+        from .snapshot import Snapshot
+        Brand.objects.create(name='Baofeng', grantee_code='2AJGM', country='China')
+        Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R', gps='No', battery_mah=1800)
+        Radio.objects.create(brand='Baofeng', model='BF-F8HP', gps='No')
+        Radio.objects.create(brand='Yaesu', model='FT-60R', intro_year=2004)
+        path = os.path.join(tempfile.mkdtemp(), 'catalogue.snap')
+        call_command('export_snapshot', path, stdout=StringIO())
+
+        with Snapshot(path) as snap:
+            self.assertEqual(len(snap), 3)
+            radio = snap.lookup('Baofeng', 'UV-5R')
+            self.assertEqual((radio['fcc_id'], radio['gps'], radio['battery_mah'], radio['intro_year']), ('2AJGM-UV5R', 'No', 1800, None))
+            self.assertIsNone(snap.lookup('Baofeng', 'UV-82'))
+            self.assertIsNone(snap.lookup('Icom', 'IC-705'))
+            self.assertEqual([r['model'] for r in snap.radios_for_brand('Baofeng')], ['BF-F8HP', 'UV-5R'])
+            self.assertEqual(snap.brand('Baofeng')['country'], 'China')
+            self.assertIsNone(snap.brand('Yaesu'))
+
+        Radio.objects.all().delete()
+        call_command('import_snapshot', path, stdout=StringIO())
+        self.assertEqual(Radio.objects.get(model='FT-60R').intro_year, 2004)
+        self.assertEqual(Radio.objects.count(), 3)
+
+
+class EdgeReplicaTest(TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        self.path = os.path.join(tempfile.mkdtemp(), 'edge.sqlite3')
+
+    def test_full_build_then_delta(self):
+        import sqlite3
+        keep = Radio.objects.create(brand='Baofeng', model='UV-5R', fcc_id='2AJGM-UV5R', gps='No')
+        gone = Radio.objects.create(brand='Yaesu', model='FT-60R')
+        out = StringIO()
+        call_command('build_edge_replica', self.path, stdout=out)
+        self.assertIn('Full build', out.getvalue())
+
+        keep.model = 'UV-5R Plus'
+        keep.save()
+        gone.delete()
+        out = StringIO()
+        call_command('build_edge_replica', self.path, stdout=out)
+        self.assertIn('Delta', out.getvalue())
+        self.assertIn('1 radios and 0 brands copied, 1 radios', out.getvalue())
+
+        db = sqlite3.connect(self.path)
+        matches = db.execute("SELECT rowid FROM edge_radio_fts WHERE edge_radio_fts MATCH '\"plu\"*'").fetchall()
+        self.assertEqual(matches, [(keep.pk,)])
+        facets = db.execute("SELECT value, count FROM edge_facet WHERE facet = 'brand'").fetchall()
+        self.assertEqual(facets, [('Baofeng', 1)])
+        db.close()
+
+    def test_brand_rename_reaches_the_replica(self):
+        import sqlite3
+        Brand.objects.create(name='Baofeng')
+        Radio.objects.create(brand='Baofeng', model='UV-5R')
+        call_command('build_edge_replica', self.path, stdout=StringIO())
+        call_command('rename_brand_global', 'Baofeng', 'Pofung', stdout=StringIO())
+        out = StringIO()
+        call_command('build_edge_replica', self.path, stdout=out)
+        self.assertIn('1 radios and 1 brands copied', out.getvalue())
+        db = sqlite3.connect(self.path)
+        self.assertEqual(db.execute("SELECT brand FROM radios_radio").fetchall(), [('Pofung',)])
+        self.assertEqual(db.execute("SELECT name FROM radios_brand").fetchall(), [('Pofung',)])
+        db.close()
+
+    def test_row_committed_after_the_sync_it_predates(self):
+        import sqlite3
+        from datetime import datetime, timedelta
+        Radio.objects.create(brand='Baofeng', model='UV-5R')
+        call_command('build_edge_replica', self.path, stdout=StringIO())
+        db = sqlite3.connect(self.path)
+        last_sync = datetime.fromisoformat(db.execute("SELECT value FROM edge_meta WHERE key = 'last_sync'").fetchone()[0])
+        db.close()
+        # An import stamped the row before that sync read the table, then committed
+        late = Radio.objects.create(brand='Baofeng', model='UV-82')
+        Radio.objects.filter(pk=late.pk).update(updated_at=last_sync - timedelta(seconds=1))
+        out = StringIO()
+        call_command('build_edge_replica', self.path, stdout=out)
+        # The UV-5R inside the overlap is re-read but already current
+        self.assertIn('1 radios and 0 brands copied', out.getvalue())
+        db = sqlite3.connect(self.path)
+        self.assertEqual(db.execute("SELECT model FROM radios_radio ORDER BY id").fetchall(), [('UV-5R',), ('UV-82',)])
+        db.close()
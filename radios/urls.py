@@ -1,15 +1,40 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from .views_import import import_grantee_radios
-from .views_merge import merge_radios
+from .views_merge import merge_radios, merge_candidates
+from .views_bulk_edit import bulk_edit_radios, bulk_edit_json
+from .views_stats import request_stats_view, catalogue_stats_view, catalogue_stats_json
+from .views_jobs import job_list, job_detail, job_status, job_retry
+
+# WSGI keeps the sync views; an async view there would get an event loop per request
+if settings.ASYNC_VIEWS:
+    dashboard_view, radio_list_view = views.adashboard_view, views.AsyncRadioListView.as_view()
+else:
+    dashboard_view, radio_list_view = views.dashboard_view, views.RadioListView.as_view()
 
 urlpatterns = [
-    path('', views.dashboard_view, name='dashboard'),
-    path('radios/', views.RadioListView.as_view(), name='radio_list'),
+    path('', dashboard_view, name='dashboard'),
+    path('radios/', radio_list_view, name='radio_list'),
+    path('radios/autocomplete.json', views.radio_autocomplete, name='radio_autocomplete'),
+    path('radios/fcc/<str:fcc_id>/', views.radio_by_fcc_id, name='radio_by_fcc_id'),
+    path('radios/fcc/<str:fcc_id>.json', views.radio_by_fcc_id, {'as_json': True}, name='radio_by_fcc_id_json'),
     path('radios/add/', views.RadioCreateView.as_view(), name='radio_add'),
     path('radios/<int:pk>/', views.RadioDetailView.as_view(), name='radio_detail'),
+    path('radios/<int:pk>/family.json', views.radio_family_json, name='radio_family'),
+    path('radios/<int:pk>/similar.json', views.radio_similar_json, name='radio_similar'),
     path('radios/<int:pk>/edit/', views.RadioUpdateView.as_view(), name='radio_edit'),
     path('radios/<int:pk>/delete/', views.RadioDeleteView.as_view(), name='radio_delete'),
     path('import-grantee-radios/', import_grantee_radios, name='import_grantee_radios'),
     path('merge-radios/', merge_radios, name='merge_radios'),
+    path('merge-candidates/', merge_candidates, name='merge_candidates'),
+    path('bulk-edit/', bulk_edit_radios, name='bulk_edit_radios'),
+    path('bulk-edit.json', bulk_edit_json, name='bulk_edit_json'),
+    path('jobs/', job_list, name='job_list'),
+    path('jobs/<int:pk>/', job_detail, name='job_detail'),
+    path('jobs/<int:pk>.json', job_status, name='job_status'),
+    path('jobs/<int:pk>/retry/', job_retry, name='job_retry'),
+    path('stats/', catalogue_stats_view, name='catalogue_stats'),
+    path('stats/catalogue.json', catalogue_stats_json, name='catalogue_stats_json'),
+    path('stats/requests.json', request_stats_view, name='request_stats'),
 ]
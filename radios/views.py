@@ -1,12 +1,43 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
+from django.core.cache import cache
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.views.generic.base import ContextMixin
+from django.urls import reverse, reverse_lazy
+from urllib.parse import urlencode
 from django.contrib import messages
-from django.db.models import Q, Count
-from .models import Radio
+from django.db.models import Q, Max
+from .models import Radio, FccGrant
+from .fcc_ingest import fcc_id_key
+from . import aggregates, autocomplete, caching, edge, similarity
 from .forms import RadioForm, RadioSearchForm
 
 
+def filter_radios(queryset, query=None, brand=None):
+    """The list page's search and brand filter, shared with bulk editing."""
+    # Search functionality
+    if query and edge.is_edge():
+        # The replica carries an FTS5 index; words match as prefixes
+        queryset = edge.fts_filter(queryset, query)
+    elif query:
+        match = Q(brand__icontains=query) | Q(model__icontains=query) | Q(fcc_id__icontains=query)
+        key = fcc_id_key(query)
+        # '-' or ' ' normalizes to '', which every key starts with
+        if key:
+            match |= Q(fcc_id_key__startswith=key)
+        queryset = queryset.filter(match)
+
+    # Brand filter
+    if brand:
+        queryset = queryset.filter(brand__iexact=brand)
+
+    return queryset
+
+
 class RadioListView(ListView):
     """View for listing all radios with search and filter"""
     model = Radio
@@ -15,35 +46,56 @@ class RadioListView(ListView):
     paginate_by = 50
     
     def get_queryset(self):
-        queryset = Radio.objects.all()
-        
-        # Search functionality
-        query = self.request.GET.get('query')
-        if query:
-            queryset = queryset.filter(
-                Q(brand__icontains=query) |
-                Q(model__icontains=query) |
-                Q(fcc_id__icontains=query)
-            )
-        
-        # Brand filter
-        brand = self.request.GET.get('brand')
-        if brand:
-            queryset = queryset.filter(brand__iexact=brand)
-        
-        return queryset
+        return filter_radios(Radio.objects.all(), self.request.GET.get('query'), self.request.GET.get('brand'))
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        # The table and pagination are cached per catalogue version and query
+        # string; on a hit the page and count queries are never run
+        table_key = caching.versioned_key('radio_list_table', self.request.GET.urlencode())
+        fragments = cache.get(table_key)
+        if fragments is None:
+            context = super().get_context_data(**kwargs)
+            # Part of the row fragment keys: bulk renames change rows without a save()
+            context['catalogue_version'] = caching.catalogue_version()
+            fragments = (
+                render_to_string('radios/_radio_table.html', context, self.request),
+                render_to_string('radios/_radio_pagination.html', context, self.request),
+            )
+            cache.set(table_key, fragments, caching.FRAGMENT_TIMEOUT)
+        else:
+            context = ContextMixin.get_context_data(self, **kwargs)
+        context['radio_table'], context['radio_pagination'] = fragments
         context['search_form'] = RadioSearchForm(self.request.GET)
-        context['total_count'] = Radio.objects.count()
-        context['brands'] = Radio.objects.values('brand').annotate(
-            count=Count('id')
-        ).order_by('brand')
+        # Awaited ahead of the page by AsyncRadioListView
+        context.update(getattr(self, 'aggregates', None) or aggregates.list_aggregates())
         return context
 
 
+class AsyncRadioListView(RadioListView):
+    """RadioListView for ASGI: the count and brand aggregates are awaited together."""
 
+    async def get(self, request, *args, **kwargs):
+        self.aggregates = await aggregates.alist_aggregates()
+        return await sync_to_async(super().get)(request, *args, **kwargs)
+
+
+def radio_last_modified(request, pk):
+    """Newest of the radio's updated_at and its latest FCC grant row, for conditional GETs."""
+    row = Radio.objects.filter(pk=pk).values_list('updated_at', 'grantee_code', 'product_code').first()
+    if row is None:
+        return None
+    updated_at, grantee_code, product_code = row
+    if product_code:
+        latest = FccGrant.objects.filter(
+            grantee_code=grantee_code, product_code=product_code,
+        ).aggregate(latest=Max('created_at'))['latest']
+        if latest and latest > updated_at:
+            return latest
+    return updated_at
+
+
+
+@method_decorator(condition(last_modified_func=radio_last_modified), name='get')
 class RadioDetailView(DetailView):
     """View for displaying a single radio's details"""
     model = Radio
@@ -53,16 +105,45 @@ class RadioDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         radio = context.get('radio')
-        fcc_id = getattr(radio, 'fcc_id', None)
-        fcc_grantee = ''
-        fcc_product = ''
-        if fcc_id and '-' in fcc_id:
-            fcc_grantee, fcc_product = fcc_id.split('-', 1)
-        context['fcc_grantee'] = fcc_grantee
-        context['fcc_product'] = fcc_product
+        # Grant history, one query on the (grantee_code, product_code) index
+        grants = []
+        if radio.product_code:
+            grants = list(
+                FccGrant.objects.filter(grantee_code=radio.grantee_code, product_code=radio.product_code)
+                .order_by('-grant_date', 'lower_freq_mhz')[:100]
+            )
+        context['fcc_grants'] = grants
+        context['family'] = radio_family(radio)
+        context['catalogue_version'] = caching.catalogue_version()
+        # Edits to other radios can reorder this list without changing Last-Modified;
+        # a revalidated page may show the previous list until the radio changes
+        context['similar_radios'] = similar_radios(radio)
         return context
 
 
+def radio_family(radio):
+    """The other members of the radio's rebadge/clone family, one query on the family_id index."""
+    if radio.family_id is None:
+        return []
+    return list(
+        Radio.objects.filter(family_id=radio.family_id).exclude(pk=radio.pk)
+        .only('pk', 'brand', 'model', 'fcc_id').order_by('brand', 'model')
+    )
+
+
+def similar_radios(radio, k=10, metric=similarity.L2):
+    """The k radios with the closest specs, best first, each with its similarity score."""
+    matches = similarity.similar(radio.pk, k, metric)
+    radios = Radio.objects.only('pk', 'brand', 'model', 'fcc_id').in_bulk([pk for pk, _ in matches])
+    similar = []
+    for pk, score in matches:
+        # Deleted since the index last synced
+        if pk in radios:
+            radios[pk].similarity = score
+            similar.append(radios[pk])
+    return similar
+
+
 class RadioCreateView(CreateView):
     """View for creating a new radio entry"""
     model = Radio
@@ -101,12 +182,72 @@ class RadioDeleteView(DeleteView):
 
 def dashboard_view(request):
     """Dashboard view with statistics"""
-    context = {
-        'total_radios': Radio.objects.count(),
-        'total_brands': Radio.objects.values('brand').distinct().count(),
-        'recent_radios': Radio.objects.order_by('-created_at')[:10],
-        'top_brands': Radio.objects.values('brand').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10],
-    }
-    return render(request, 'radios/dashboard.html', context)
+    return render(request, 'radios/dashboard.html', aggregates.dashboard_stats())
+
+
+async def adashboard_view(request):
+    """dashboard_view for ASGI; the statistics queries are awaited together."""
+    context = await aggregates.adashboard_stats()
+    # Context processors read the session and user, which is sync ORM work
+    return await sync_to_async(render)(request, 'radios/dashboard.html', context)
+
+
+def radio_autocomplete(request):
+    """Typeahead completions for the search box: ?q=uv5&limit=10&kind=model"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 25)
+    except ValueError:
+        limit = 10
+    kinds = [k for k in request.GET.getlist('kind') if k in autocomplete.KINDS] or autocomplete.KINDS
+    query = request.GET.get('q', '')
+    return JsonResponse({'query': query, 'results': autocomplete.complete(query, limit, kinds)})
+
+
+def radio_by_fcc_id(request, fcc_id, as_json=False):
+    """Resolve any spelling of an FCC ID (2AJGM-UV5R, 2ajgmuv5r, 2AJGM UV5R) to its radios."""
+    radios = list(Radio.objects.filter(fcc_id_key=fcc_id_key(fcc_id)).order_by('brand', 'model'))
+    if as_json:
+        return JsonResponse({
+            'fcc_id_key': fcc_id_key(fcc_id),
+            'radios': [
+                {'id': r.pk, 'brand': r.brand, 'model': r.model, 'fcc_id': r.fcc_id, 'url': r.get_absolute_url()}
+                for r in radios
+            ],
+        })
+    if not radios:
+        raise Http404(f"No radio with FCC ID {fcc_id}")
+    if len(radios) == 1:
+        return redirect(radios[0])
+    return redirect(f"{reverse('radio_list')}?{urlencode({'query': radios[0].fcc_id})}")
+
+
+def radio_similar_json(request, pk):
+    """Radios with the closest specs: ?k=10&metric=l2|cosine"""
+    radio = get_object_or_404(Radio, pk=pk)
+    metric = request.GET.get('metric', similarity.L2)
+    if metric not in similarity.METRICS:
+        return JsonResponse({'error': f"metric must be one of {', '.join(similarity.METRICS)}"}, status=400)
+    try:
+        k = max(1, min(int(request.GET.get('k', 10)), 100))
+    except ValueError:
+        return JsonResponse({'error': 'k must be a number'}, status=400)
+    return JsonResponse({
+        'id': radio.pk,
+        'metric': metric,
+        'similar': [
+            {'id': r.pk, 'brand': r.brand, 'model': r.model, 'fcc_id': r.fcc_id, 'score': round(r.similarity, 4), 'url': r.get_absolute_url()}
+            for r in similar_radios(radio, k, metric)
+        ],
+    })
+
+
+def radio_family_json(request, pk):
+    radio = get_object_or_404(Radio, pk=pk)
+    return JsonResponse({
+        'id': radio.pk,
+        'family_id': radio.family_id,
+        'family': [
+            {'id': r.pk, 'brand': r.brand, 'model': r.model, 'fcc_id': r.fcc_id, 'url': r.get_absolute_url()}
+            for r in radio_family(radio)
+        ],
+    })
@@ -0,0 +1,86 @@
+import json
+
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.views.decorators.http import require_POST
+
+from .bulk_edit import BulkEditForm, apply_bulk_edit, apply_row_edits, clean_values
+from .models import Radio
+from .views import filter_radios
+
+
+def selected_radios(radio_ids=(), query='', brand=''):
+    """The checked radios, or else every radio matching the list filters; None when neither is given."""
+    pks = [int(pk) for pk in radio_ids if str(pk).isdigit()]
+    if pks:
+        return Radio.objects.filter(pk__in=pks)
+    if query or brand:
+        return filter_radios(Radio.objects.all(), query, brand)
+    return None
+
+
+def bulk_edit_radios(request):
+    """
+    Edit fields of the radios checked on the list page (radio_ids) or of
+    every radio matching its search (query, brand). The page shows how many
+    radios the edit will touch; Apply runs it as one UPDATE.
+    """
+    params = request.POST if request.method == 'POST' else request.GET
+    radio_ids = params.getlist('radio_ids')
+    query, brand = params.get('query', ''), params.get('brand', '')
+    queryset = selected_radios(radio_ids, query, brand)
+    if queryset is None:
+        messages.error(request, 'Select radios or search the list before editing in bulk.')
+        return redirect('radio_list')
+    form = BulkEditForm(request.POST if 'apply' in request.POST else None)
+    if form.is_bound and form.is_valid():
+        updated = apply_bulk_edit(queryset, form.changes())
+        messages.success(request, f"Updated {', '.join(form.changes())} on {updated} radios.")
+        return redirect('radio_list')
+    return render(request, 'radios/bulk_edit.html', {
+        'form': form,
+        'count': queryset.count(),
+        'radio_ids': radio_ids,
+        'query': query,
+        'brand': brand,
+    })
+
+
+@require_POST
+def bulk_edit_json(request):
+    """
+    JSON bulk edit. The body names the radios with "ids" or "query"/"brand"
+    and the values with "changes", or gives per-radio values as "rows"
+    ({"<id>": {"field": value}}). With "dry_run" only the count is returned.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'errors': {'__all__': ['Expected a JSON object.']}}, status=400)
+    dry_run = bool(data.get('dry_run'))
+    try:
+        if 'rows' in data:
+            rows = {int(pk): clean_values(values) for pk, values in dict(data['rows']).items()}
+            if dry_run:
+                return JsonResponse({'count': Radio.objects.filter(pk__in=list(rows)).count(), 'applied': False})
+            return JsonResponse({'count': apply_row_edits(rows), 'applied': True})
+        changes = clean_values(data.get('changes') or {})
+    except ValidationError as e:
+        return JsonResponse({'errors': e.message_dict}, status=400)
+    except (TypeError, ValueError, AttributeError):
+        return JsonResponse({'errors': {'rows': ['Expected {"<id>": {"field": value}}.']}}, status=400)
+    ids = data.get('ids') or []
+    if not isinstance(ids, list):
+        return JsonResponse({'errors': {'ids': ['Expected a list of radio ids.']}}, status=400)
+    queryset = selected_radios(ids, data.get('query', ''), data.get('brand', ''))
+    if queryset is None:
+        return JsonResponse({'errors': {'__all__': ['Give "ids" or a "query"/"brand" filter.']}}, status=400)
+    if not changes:
+        return JsonResponse({'errors': {'changes': ['Give at least one field to set.']}}, status=400)
+    if dry_run:
+        return JsonResponse({'count': queryset.count(), 'applied': False})
+    return JsonResponse({'count': apply_bulk_edit(queryset, changes), 'applied': True})
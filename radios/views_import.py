@@ -2,27 +2,36 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .forms import ImportGranteeXMLForm
 from .models import Radio, Brand
+from .import_telemetry import track_import
+from .jobs import enqueue
+from .fcc_ingest import classify_rows, record_rows, split_fcc_id
+from .fcc_xml import FccXmlUploadHandler, parse_uploads, sanitize_xml_content  # noqa: F401 (re-exported)
+from .caching import catalogue_changes
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 import xml.etree.ElementTree as ET
 import os
-import re
 import json
 import base64
 
 RESULTS_XML = os.path.join('data', 'results.xml')
 
 
-def sanitize_xml_content(content):
-    """
-    Sanitize XML content to fix common issues like unescaped ampersands.
-    FCC XML files often have '&' instead of '&amp;' in company names.
-    """
-    # Replace unescaped & with &amp; (but not already-escaped entities like &amp; &lt; &gt; &quot; &apos;)
-    # This regex finds & not followed by amp; lt; gt; quot; apos; or #
-    content = re.sub(r'&(?!(amp|lt|gt|quot|apos|#)\b)', '&amp;', content)
-    return content
+_grantee_maps = {}
 
 
 def load_grantee_map(results_xml):
+    # Parsed once per process and file version; every upload resolves against it
+    key = (results_xml, os.path.getmtime(results_xml))
+    if key not in _grantee_maps:
+        _grantee_maps.clear()
+        _grantee_maps[key] = _read_grantee_map(results_xml)
+    return _grantee_maps[key]
+
+
+def _read_grantee_map(results_xml):
     tree = ET.parse(results_xml)
     root = tree.getroot()
     grantee_map = {}
@@ -35,17 +44,11 @@ def load_grantee_map(results_xml):
 
 
 def parse_fcc_id(fcc_id, grantee_map):
-    fcc_id = fcc_id.strip()
-    grantee_code = None
-    for code in sorted(grantee_map.keys(), key=len, reverse=True):
-        if fcc_id.startswith(code):
-            grantee_code = code
-            break
-    if not grantee_code:
-        return None, fcc_id
-    # Remove grantee code prefix, and if next char is a dash, remove it too
-    model = fcc_id[len(grantee_code):].lstrip('-').strip()
-    return grantee_code, model
+    """(grantee_code, model) of an FCC ID whose grantee is in grantee_map, else (None, fcc_id)."""
+    grantee_code, model = split_fcc_id(fcc_id)
+    if grantee_code not in grantee_map:
+        return None, fcc_id.strip()
+    return grantee_code, model.strip()
 
 
 def freq_range_to_band(lower, upper):
@@ -67,7 +70,152 @@ def freq_range_to_band(lower, upper):
     return bands
 
 
+def grantee_fcc_id(data):
+    g_code, model = data['grantee_code'], data['model']
+    return f"{g_code}{model}" if '-' not in model else f"{g_code}-{model}"
+
+
+def import_grantee_records(radio_list, overwrite, progress=None, row_states=(), batch_size=1000):
+    """
+    Write previewed grantee radios to the database (the confirm step).
+    Runs in a background job; `progress(done, total)` is called as rows are written.
+    `row_states` are the FCC row hashes of the preview, recorded once the radios
+    are written so the next upload of the same export skips them.
+    Everything is written in one transaction: existing radios are looked up in
+    one query, new ones go in with bulk_create and, with `overwrite`, the FCC
+    IDs of existing ones are set with bulk_update.
+    Returns a dict of created/updated/skipped counts.
+    """
+    total_records = len(radio_list)
+    codes = sorted({data['grantee_code'] for data in radio_list})
+    
+    with track_import('grantee_xml_confirm', source=', '.join(codes)) as run:
+        run.add_rows(total_records)
+        with catalogue_changes(), transaction.atomic():
+            with run.stage('lookup'):
+                brands = {data['brand'] for data in radio_list}
+                existing = {
+                    (brand, model): pk
+                    for pk, brand, model in Radio.objects.filter(brand__in=brands).values_list('pk', 'brand', 'model').iterator()
+                }
+                new, updates, seen = [], [], set()
+                skipped_count = 0
+                now = timezone.now()
+                for data in radio_list:
+                    key = (data['brand'], data['model'])
+                    if key in seen:
+                        # Two grantee codes of one brand listing the same model
+                        skipped_count += 1
+                        continue
+                    seen.add(key)
+                    radio = Radio(brand=data['brand'], model=data['model'], fcc_id=grantee_fcc_id(data))
+                    if key not in existing:
+                        new.append(radio)
+                    elif overwrite:
+                        radio.pk, radio.updated_at = existing[key], now
+                        updates.append(radio)
+                    else:
+                        skipped_count += 1
+                        continue
+                    # bulk_create and bulk_update do not call save()
+                    radio.set_fcc_id_parts()
+            with run.stage('db_write'):
+                done = skipped_count
+                for objs, write in ((new, 'create'), (updates, 'update')):
+                    for i in range(0, len(objs), batch_size):
+                        batch = objs[i:i + batch_size]
+                        if write == 'create':
+                            Radio.objects.bulk_create(batch)
+                        else:
+                            Radio.objects.bulk_update(batch, ['fcc_id', *Radio.FCC_ID_PARTS, 'updated_at'])
+                        done += len(batch)
+                        if progress:
+                            progress(done, total_records)
+            with run.stage('record_state'):
+                record_rows(row_states)
+        counts = {'created': len(new), 'updated': len(updates), 'skipped': skipped_count}
+        run.counts.update(counts)
+    if progress:
+        progress(total_records, total_records)
+    return counts
+
+
+def grantee_import_summary(radio_list, counts):
+    """Human readable result line for a grantee import."""
+    codes = sorted({data['grantee_code'] for data in radio_list})
+    if len(codes) == 1:
+        msg_parts = [f"Grantee {codes[0]} ({radio_list[0]['brand']}): Processed {len(radio_list)} records"]
+    else:
+        msg_parts = [f"{len(codes)} grantees: Processed {len(radio_list)} records"]
+    if counts['created']:
+        msg_parts.append(f"{counts['created']} new radios added")
+    if counts['updated']:
+        msg_parts.append(f"{counts['updated']} existing radios updated")
+    if counts['skipped']:
+        msg_parts.append(f"{counts['skipped']} duplicates skipped")
+    return " • ".join(msg_parts)
+
+
+def preview_grantee_files(parsed_files, grantee_map, full_recheck=False):
+    """
+    Merge the rows of several parsed exports into one preview.
+    Returns (preview, delta, subtotals): the unique (brand, grantee, model)
+    radios to import, the IngestDelta of the combined rows (so rows repeated
+    across files count once) and per-grantee counts for the summary table.
+    """
+    records = []
+    files_by_code = {}
+    for parsed in parsed_files:
+        for record in parsed.records:
+            if not record['fcc_id']:
+                continue
+            grantee_code, model = parse_fcc_id(record['fcc_id'], grantee_map)
+            if not grantee_code or not model:
+                continue
+            record.update(grantee_code=grantee_code, model=model)
+            records.append(record)
+            files_by_code.setdefault(grantee_code, set()).add(parsed.name)
+
+    # Drop rows already imported from an earlier upload of these exports
+    delta = classify_rows(records, full=full_recheck)
+
+    # Aggregate the remaining rows by (brand, model)
+    radio_data = {}
+    for record in delta.rows:
+        brand_name = grantee_map.get(record['grantee_code'], record['grantee_code'])
+        key = (brand_name, record['grantee_code'], record['model'])
+        if key not in radio_data:
+            radio_data[key] = {
+                'brand': brand_name,
+                'grantee_code': record['grantee_code'],
+                'model': record['model'],
+            }
+
+    subtotals = {
+        code: {'grantee_code': code, 'brand': grantee_map.get(code, code), 'files': len(names), 'rows': 0, 'rows_delta': 0, 'radios': 0}
+        for code, names in files_by_code.items()
+    }
+    for record in records:
+        subtotals[record['grantee_code']]['rows'] += 1
+    for record in delta.rows:
+        subtotals[record['grantee_code']]['rows_delta'] += 1
+    for _, code, _ in radio_data:
+        subtotals[code]['radios'] += 1
+    preview = sorted(radio_data.values(), key=lambda r: (r['brand'], r['grantee_code'], r['model']))
+    return preview, delta, [subtotals[code] for code in sorted(subtotals)]
+
+
+@csrf_exempt
 def import_grantee_radios(request):
+    # The XML upload is parsed chunk by chunk while it arrives. The handler must be
+    # installed before anything reads request.POST, CsrfViewMiddleware included,
+    # so the CSRF check runs in the inner view instead.
+    request.upload_handlers.insert(0, FccXmlUploadHandler(request))
+    return _import_grantee_radios(request)
+
+
+@csrf_protect
+def _import_grantee_radios(request):
     if request.method == 'POST':
         # Check if this is confirmation of a preview (radio_data passed via hidden field)
         if 'confirm_import' in request.POST and 'radio_data_b64' in request.POST:
@@ -76,102 +224,77 @@ def import_grantee_radios(request):
             try:
                 radio_data_json = base64.b64decode(radio_data_b64).decode('utf-8')
                 radio_list = json.loads(radio_data_json)
+                row_states = json.loads(base64.b64decode(request.POST.get('row_state_b64', '')).decode('utf-8') or '[]')
             except (json.JSONDecodeError, ValueError, UnicodeDecodeError) as e:
                 messages.error(request, f"Invalid import data. Please try again. ({e})")
                 return redirect('import_grantee_radios')
             
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
-            total_records = len(radio_list)
-            
-            # Get grantee info from first record
-            grantee_code = radio_list[0]['grantee_code'] if radio_list else ''
-            grantee_name = radio_list[0]['brand'] if radio_list else ''
-            
-            for data in radio_list:
-                brand = data['brand']
-                model = data['model']
-                g_code = data['grantee_code']
-                fcc_id = f"{g_code}{model}" if '-' not in model else f"{g_code}-{model}"
-                if overwrite:
-                    radio, created = Radio.objects.update_or_create(
-                        brand=brand, model=model,
-                        defaults={'fcc_id': fcc_id}
-                    )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                else:
-                    if not Radio.objects.filter(brand=brand, model=model).exists():
-                        Radio.objects.create(brand=brand, model=model, fcc_id=fcc_id)
-                        created_count += 1
-                    else:
-                        skipped_count += 1
-            
-            # Build detailed success message
-            msg_parts = [f"Grantee {grantee_code} ({grantee_name}): Processed {total_records} records"]
-            if created_count:
-                msg_parts.append(f"{created_count} new radios added")
-            if updated_count:
-                msg_parts.append(f"{updated_count} existing radios updated")
-            if skipped_count:
-                msg_parts.append(f"{skipped_count} duplicates skipped")
-            messages.success(request, " • ".join(msg_parts))
-            return redirect('import_grantee_radios')
+            # The database writes run in a background worker; two imports touching the same
+            # grantee never overlap, so a batch locks every grantee it writes
+            codes = sorted({data['grantee_code'] for data in radio_list})
+            label = f"grantee {codes[0]}" if len(codes) == 1 else f"{len(codes)} grantees"
+            lock_keys = [f"grantee:{code}" for code in codes]
+            job = enqueue(
+                'import_grantee_radios',
+                {'records': radio_list, 'overwrite': overwrite, 'row_states': row_states},
+                lock_keys=lock_keys,
+                description=f"Import {len(radio_list)} radios for {label}",
+            )
+            messages.success(request, f"Import of {len(radio_list)} records queued.")
+            return redirect('job_detail', pk=job.pk)
         
         # Initial upload - parse XML and show preview
         form = ImportGranteeXMLForm(request.POST, request.FILES)
         if form.is_valid():
-            xml_file = form.cleaned_data['xml_file']
+            xml_files = form.cleaned_data['xml_file']
             overwrite = form.cleaned_data.get('overwrite_records', False)
+            full_recheck = form.cleaned_data.get('full_recheck', False)
             
-            # Read and sanitize XML content
-            try:
-                xml_content = xml_file.read().decode('utf-8', errors='replace')
-            except Exception:
-                xml_content = xml_file.read().decode('iso-8859-1', errors='replace')
+            with track_import('grantee_xml_preview', source=', '.join(f.name for f in xml_files)) as run:
+                # XML files were decoded, sanitized and parsed by FccXmlUploadHandler during
+                # the upload; zip members are parsed now, in up to IMPORT_PARSE_WORKERS processes
+                with run.stage('parse_zip'):
+                    parsed_files = parse_uploads(xml_files, workers=settings.IMPORT_PARSE_WORKERS)
+                errors = [f"{parsed.name}: {parsed.error}" for parsed in parsed_files if parsed.error]
+                parsed_files = [parsed for parsed in parsed_files if not parsed.error]
+                for error in errors:
+                    messages.error(request, f"XML parsing error in {error}")
+                if not parsed_files:
+                    run.fail('; '.join(errors))
+                    return render(request, 'radios/import_grantee_radios.html', {'form': form})
+                # Time spent in the parser itself, most of it while the body was being received
+                run.stages['parse'] = sum(parsed.seconds for parsed in parsed_files)
+                run.add_bytes(sum(parsed.size for parsed in parsed_files))
+                run.add_rows(sum(len(parsed.records) for parsed in parsed_files))
+                run.counts.update(
+                    files=len(parsed_files), failed_files=len(errors),
+                    encoding=', '.join(sorted({parsed.encoding for parsed in parsed_files})),
+                )
+                
+                # One grantee map for every file, then a single merged, deduplicated preview
+                with run.stage('grantee_resolution'):
+                    grantee_map = load_grantee_map(RESULTS_XML)
+                with run.stage('merge'):
+                    preview, delta, subtotals = preview_grantee_files(parsed_files, grantee_map, full_recheck)
+                run.counts.update(grantees=len(subtotals), unique=len(preview), **delta.counts)
             
-            xml_content = sanitize_xml_content(xml_content)
-            
-            # Parse sanitized XML
-            try:
-                root = ET.fromstring(xml_content)
-            except ET.ParseError as e:
-                messages.error(request, f"XML parsing error: {e}")
+            if not preview:
+                messages.info(request, f"Nothing to import: {delta.summary()}.")
                 return render(request, 'radios/import_grantee_radios.html', {'form': form})
             
-            # Load grantee code -> name map
-            grantee_map = load_grantee_map(RESULTS_XML)
-            
-            # Aggregate all rows by (brand, model)
-            radio_data = {}
-            for row in root.findall('Row'):
-                fcc_id = row.findtext('fcc_id', '').strip()
-                if not fcc_id:
-                    continue
-                grantee_code, model = parse_fcc_id(fcc_id, grantee_map)
-                if not grantee_code or not model:
-                    continue
-                brand_name = grantee_map.get(grantee_code, grantee_code)
-                key = (brand_name, grantee_code, model)
-                if key not in radio_data:
-                    radio_data[key] = {
-                        'brand': brand_name,
-                        'grantee_code': grantee_code,
-                        'model': model,
-                    }
-            
             # Show preview with radio data stored as base64-encoded JSON for confirmation
-            preview = list(radio_data.values())
             radio_data_json = json.dumps(preview)
             radio_data_b64 = base64.b64encode(radio_data_json.encode('utf-8')).decode('ascii')
+            row_state_b64 = base64.b64encode(json.dumps(delta.states).encode('utf-8')).decode('ascii')
             return render(request, 'radios/import_grantee_radios.html', {
                 'form': form,
                 'preview': preview,
+                'subtotals': subtotals,
+                'files': parsed_files,
                 'overwrite': overwrite,
                 'radio_data_b64': radio_data_b64,
+                'row_state_b64': row_state_b64,
+                'delta': delta.counts,
             })
     else:
         form = ImportGranteeXMLForm()
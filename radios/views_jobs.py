@@ -0,0 +1,90 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from .jobs import enqueue, CATALOGUE_KEY, MAINTENANCE_COMMANDS
+from .models import Brand, Job
+
+
+def _command_params(kind, post):
+    """Positional arguments and lock keys for a maintenance command queued from the form."""
+    if kind == 'merge_brand_radios':
+        source, target = post.get('source_brand', '').strip(), post.get('target_brand', '').strip()
+        if not (source and target):
+            raise ValueError('Enter both the source and the target brand.')
+        # Both brands' radios change, and so do those of their grantees
+        codes = Brand.objects.filter(name__in=[source, target]).exclude(grantee_code__isnull=True).values_list(
+            'grantee_code', flat=True
+        )
+        return [source, target], [f"brand:{source}", f"brand:{target}"] + [f"grantee:{code}" for code in codes if code]
+    if kind == 'clean_grantee_prefix':
+        brand, code = post.get('brand', '').strip(), post.get('grantee_code', '').strip()
+        if bool(brand) != bool(code):
+            raise ValueError('Enter both the brand and the grantee code, or neither to clean all brands.')
+        return ([brand, code], [f"brand:{brand}", f"grantee:{code}"]) if code else ([], [CATALOGUE_KEY])
+    if kind == 'refresh_catalogue_stats':
+        # Only reads the catalogue; one refresh at a time
+        return [], ['stats']
+    return [], [CATALOGUE_KEY]
+
+
+def job_list(request):
+    if request.method == 'POST':
+        kind = request.POST.get('kind', '')
+        if kind not in MAINTENANCE_COMMANDS:
+            messages.error(request, 'Choose a command to run.')
+            return redirect('job_list')
+        try:
+            args, lock_keys = _command_params(kind, request.POST)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('job_list')
+        options = {'dry_run': True} if request.POST.get('dry_run') and kind in ('merge_brand_radios', 'clean_grantee_prefix') else {}
+        job = enqueue(
+            kind, {'args': args, 'options': options}, lock_keys=lock_keys,
+            description=' '.join([MAINTENANCE_COMMANDS[kind]] + args) + (' (dry run)' if options else ''),
+        )
+        messages.success(request, f"{job.description} queued.")
+        return redirect('job_detail', pk=job.pk)
+
+    page = Paginator(
+        Job.objects.defer('params', 'result', 'error').order_by('-created_at', '-pk'), 50,
+    ).get_page(request.GET.get('page'))
+    return render(request, 'radios/job_list.html', {
+        'page_obj': page,
+        'commands': MAINTENANCE_COMMANDS.items(),
+    })
+
+
+def job_detail(request, pk):
+    job = get_object_or_404(Job.objects.defer('params'), pk=pk)
+    return render(request, 'radios/job_detail.html', {'job': job})
+
+
+def job_status(request, pk):
+    """JSON status polled by the job detail page."""
+    job = get_object_or_404(Job.objects.defer('params'), pk=pk)
+    result = job.result if isinstance(job.result, dict) else {}
+    return JsonResponse({
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'finished': job.status in (Job.STATUS_DONE, Job.STATUS_FAILED),
+        'progress_done': job.progress_done,
+        'progress_total': job.progress_total,
+        'percent': job.percent,
+        'message': job.message,
+        'output': result.get('output', ''),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
+@require_POST
+def job_retry(request, pk):
+    job = get_object_or_404(Job, pk=pk, status=Job.STATUS_FAILED)
+    retry = enqueue(job.kind, job.params, lock_keys=job.lock_keys, description=job.description)
+    messages.success(request, f"{job.description} queued again.")
+    return redirect('job_detail', pk=retry.pk)
@@ -1,33 +1,127 @@
-from django.shortcuts import render, redirect, get_list_or_404
+from django.shortcuts import render, redirect, get_list_or_404, get_object_or_404
 from django.contrib import messages
-from .models import Radio
-from .forms_merge_fields import MergeRadiosFieldsForm
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
+from django.forms.models import model_to_dict
+from django.utils import timezone
+from .models import Radio, RadioMergeLog, MergeCandidate
+from .forms_merge_fields import MergeRadiosFieldsForm, MERGE_FORM_FIELDS
 
 # Enhanced merge view: lets user pick which record's data to keep for each field
 
+
+def apply_merge(radios, field_sources):
+    """
+    Merge a list of radios into one. `field_sources` maps a field name to the pk
+    of the radio whose value is kept. The first radio in Meta ordering is kept;
+    the rest are deleted in one statement and recorded in a RadioMergeLog.
+    """
+    by_pk = {r.pk: r for r in radios}
+    keep = min(radios, key=lambda r: (r.brand, r.model, r.pk))
+    others = [r for r in radios if r.pk != keep.pk]
+
+    # Resolve the chosen values in memory
+    update_fields = []
+    for field, source_pk in field_sources.items():
+        source = by_pk.get(source_pk)
+        if source is None or source is keep:
+            continue
+        value = getattr(source, field)
+        if value != getattr(keep, field):
+            setattr(keep, field, value)
+            update_fields.append(field)
+
+    with transaction.atomic():
+        log = RadioMergeLog.objects.create(
+            kept_radio=keep,
+            kept_label=f"{keep.brand} {keep.model}",
+            merged_radios=[
+                dict(model_to_dict(r, fields=MERGE_FORM_FIELDS), pk=r.pk) for r in others
+            ],
+            field_sources={f: pk for f, pk in field_sources.items()},
+        )
+        # Delete first so the kept radio may take over a (brand, model) being removed
+        Radio.objects.filter(pk__in=[r.pk for r in others]).delete()
+        if update_fields:
+            keep.save(update_fields=update_fields + ['updated_at'])
+    return keep, log
+
+
+def prefill_field_sources(radios):
+    """Initial choice per field: the most complete radio that has a value for it."""
+    ranked = sorted(
+        radios,
+        key=lambda r: (-sum(bool(getattr(r, f)) for f in MERGE_FORM_FIELDS), r.brand, r.model, r.pk),
+    )
+    initial = {}
+    for field in MERGE_FORM_FIELDS:
+        source = next((r for r in ranked if getattr(r, field)), ranked[0])
+        initial[field] = str(source.pk)
+    return initial
+
+
 def merge_radios(request):
-    if request.method == 'POST':
-        radio_ids = request.POST.getlist('radio_ids')
-        radios = Radio.objects.filter(pk__in=radio_ids)
-        if not radios:
-            messages.error(request, 'No radios selected for merge.')
-            return redirect('radio_list')
+    candidate = None
+    candidate_id = request.POST.get('candidate') or request.GET.get('candidate')
+    if candidate_id:
+        if not candidate_id.isdigit():
+            raise Http404('No such merge candidate.')
+        candidate = get_object_or_404(MergeCandidate, pk=candidate_id, status=MergeCandidate.STATUS_OPEN)
+    if request.method == 'POST' or candidate:
+        if request.method == 'POST':
+            radio_ids = request.POST.getlist('radio_ids')
+        else:
+            radio_ids = [str(pk) for pk in candidate.radio_ids]
+        pks = [int(pk) for pk in radio_ids if pk.isdigit()]
+        # One query for the whole selection
+        by_pk = Radio.objects.in_bulk(pks)
+        radios = sorted(by_pk.values(), key=lambda r: (r.brand, r.model, r.pk))
+        if len(radios) < 2:
+            messages.error(request, 'Select at least two radios to merge.')
+            return redirect('merge_candidates' if candidate else 'radio_list')
         if 'confirm' in request.POST:
             form = MergeRadiosFieldsForm(radios, request.POST)
             if form.is_valid():
                 # Pick the selected values for each field
-                keep = radios.first()
-                for field in form.fields:
-                    selected_pk = form.cleaned_data[field]
-                    if selected_pk:
-                        value = getattr(radios.get(pk=selected_pk), field)
-                        setattr(keep, field, value)
-                keep.save()
-                for r in radios.exclude(pk=keep.pk):
-                    r.delete()
-                messages.success(request, f'Merged {len(radios)} radios into one record.')
+                field_sources = {
+                    field: int(form.cleaned_data[field])
+                    for field in MERGE_FORM_FIELDS if form.cleaned_data.get(field)
+                }
+                keep, log = apply_merge(radios, field_sources)
+                messages.success(request, f'Merged {len(radios)} radios into {keep}.')
+                if candidate:
+                    candidate.status = MergeCandidate.STATUS_MERGED
+                    candidate.save(update_fields=['status', 'updated_at'])
+                    return redirect('merge_candidates')
                 return redirect('radio_list')
+        elif candidate:
+            form = MergeRadiosFieldsForm(radios, initial=prefill_field_sources(radios))
         else:
             form = MergeRadiosFieldsForm(radios)
-        return render(request, 'radios/merge_radios.html', {'radios': radios, 'radio_ids': radio_ids, 'form': form})
+        return render(request, 'radios/merge_radios.html', {
+            'radios': radios,
+            'radio_ids': radio_ids,
+            'form': form,
+            'candidate': candidate,
+        })
     return redirect('radio_list')
+
+
+def merge_candidates(request):
+    """List open merge candidate groups proposed by find_merge_candidates."""
+    if request.method == 'POST' and 'dismiss' in request.POST:
+        dismiss = request.POST.get('dismiss', '')
+        updated = dismiss.isdigit() and MergeCandidate.objects.filter(
+            pk=dismiss, status=MergeCandidate.STATUS_OPEN
+        ).update(status=MergeCandidate.STATUS_DISMISSED, updated_at=timezone.now())
+        if updated:
+            messages.success(request, 'Merge candidate dismissed.')
+        return redirect('merge_candidates')
+    page = Paginator(
+        MergeCandidate.objects.filter(status=MergeCandidate.STATUS_OPEN), 50
+    ).get_page(request.GET.get('page'))
+    # Resolve the radios of every group on the page in one query
+    by_pk = Radio.objects.in_bulk({pk for c in page for pk in c.radio_ids})
+    groups = [(c, [by_pk[pk] for pk in c.radio_ids if pk in by_pk]) for c in page]
+    return render(request, 'radios/merge_candidates.html', {'page_obj': page, 'groups': groups})
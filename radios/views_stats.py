@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.shortcuts import render
+from . import stats
+from .middleware import request_stats
+from .models import StatsRefresh
+
+
+def request_stats_view(request):
+    """Rolling per-URL query and latency percentiles collected by QueryStatsMiddleware."""
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+        return HttpResponseForbidden('Staff only')
+    if request.method == 'POST' and request.POST.get('reset'):
+        request_stats.reset()
+    return JsonResponse({
+        'enabled': getattr(settings, 'QUERY_STATS_ENABLED', False),
+        'window': request_stats.window,
+        'views': request_stats.snapshot(),
+    })
+
+
+def _filters(summary, params):
+    """Key-column filters for `summary` from the query string; raises ValueError on a bad number."""
+    filters = {}
+    for column in summary.key:
+        value = params.get(column, '').strip()
+        if value:
+            filters[column] = value if column in stats.TEXT_COLUMNS else int(value)
+    return filters
+
+
+def _refreshes():
+    return {r.name: r for r in StatsRefresh.objects.all()}
+
+
+def catalogue_stats_view(request):
+    """Statistics page; reads only the precomputed summaries (see radios.stats)."""
+    try:
+        brand_filters = _filters(stats.SUMMARIES['brand_year'], request.GET)
+        grant_filters = _filters(stats.SUMMARIES['grants_quarter'], request.GET)
+    except ValueError:
+        return HttpResponseBadRequest('Years and quarters must be numbers.')
+    refreshes = _refreshes()
+    return render(request, 'radios/catalogue_stats.html', {
+        'status': [(summary, refreshes.get(name)) for name, summary in stats.SUMMARIES.items()],
+        'feature_adoption': stats.rows('feature_adoption'),
+        # The per-brand and per-grantee tables are long; they are shown for one brand or grantee
+        'brand_year': stats.rows('brand_year', **brand_filters) if 'brand' in brand_filters else [],
+        'grants_quarter': stats.rows('grants_quarter', **grant_filters) if 'grantee_code' in grant_filters else [],
+        'brand': brand_filters.get('brand', ''),
+        'grantee_code': grant_filters.get('grantee_code', ''),
+    })
+
+
+def catalogue_stats_json(request):
+    """
+    Precomputed statistics as JSON. ?summary= (repeatable) picks summaries,
+    all by default; key columns (brand, intro_year, grantee_code, year,
+    quarter) filter the summaries that have them.
+    """
+    names = request.GET.getlist('summary') or list(stats.SUMMARIES)
+    unknown = [name for name in names if name not in stats.SUMMARIES]
+    if unknown:
+        return JsonResponse({'error': f"Unknown summary: {', '.join(unknown)}", 'summaries': list(stats.SUMMARIES)}, status=400)
+    refreshes = _refreshes()
+    result = {}
+    for name in names:
+        summary = stats.SUMMARIES[name]
+        try:
+            filters = _filters(summary, request.GET)
+        except ValueError:
+            return JsonResponse({'error': 'Years and quarters must be numbers.'}, status=400)
+        refreshed = refreshes.get(name)
+        result[name] = {
+            'title': summary.title,
+            'refreshed_at': refreshed.refreshed_at.isoformat() if refreshed else None,
+            'columns': summary.columns,
+            'rows': stats.rows(name, **filters),
+        }
+    return JsonResponse(result)